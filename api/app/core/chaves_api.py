@@ -0,0 +1,83 @@
+# app/core/chaves_api.py
+"""Chaves de API de integração (header ``X-API-Key``).
+
+Só o SHA-256 de cada chave fica em ``chaves_api``. Os hashes ativos ficam em
+memória (o middleware de identificação não toca no banco) e são relidos em
+segundo plano após CHAVES_API_TTL_S. Chave desconhecida não vira identidade:
+senão cada chave aleatória ganharia um balde de limite de taxa novo.
+"""
+import hashlib
+import secrets
+import threading
+import time
+from typing import Optional, Set
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+_lock = threading.Lock()
+_hashes: Set[str] = set()
+_carregado_em: Optional[float] = None
+_recarregando = False
+
+def hash_chave(chave: str) -> str:
+    return hashlib.sha256(chave.encode()).hexdigest()
+
+def carregar(db: Session) -> int:
+    global _hashes, _carregado_em
+    hashes = set(db.execute(text("SELECT hash FROM chaves_api WHERE ativa")).scalars())
+    with _lock:
+        _hashes, _carregado_em = hashes, time.monotonic()
+    return len(hashes)
+
+def _recarregar() -> None:
+    global _recarregando, _carregado_em
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        carregar(db)
+    except Exception as e:
+        print(f"⚠️ Chaves de API não recarregadas: {str(e)}")
+        _carregado_em = time.monotonic()  # tenta de novo só após o TTL
+    finally:
+        db.close()
+        _recarregando = False
+
+def identificar(chave: str) -> Optional[str]:
+    """Identidade (``chave:<hash curto>``) de uma chave ativa; None se desconhecida."""
+    global _recarregando
+    if _carregado_em is None or time.monotonic() - _carregado_em > settings.chaves_api_ttl_s:
+        with _lock:
+            iniciar, _recarregando = not _recarregando, True
+        if iniciar:
+            threading.Thread(target=_recarregar, name="recarga-chaves-api", daemon=True).start()
+    h = hash_chave(chave)
+    return "chave:" + h[:16] if h in _hashes else None
+
+def criar(db: Session, nome: str) -> str:
+    """Gera e cadastra uma chave; devolve a chave em claro (mostrada uma única vez)."""
+    chave = secrets.token_urlsafe(32)
+    db.execute(text("INSERT INTO chaves_api (hash, nome) VALUES (:hash, :nome)"), {"hash": hash_chave(chave), "nome": nome})
+    db.commit()
+    return chave
+
+def revogar(db: Session, nome: str) -> int:
+    total = db.execute(text("UPDATE chaves_api SET ativa = FALSE WHERE nome = :nome AND ativa"), {"nome": nome}).rowcount
+    db.commit()
+    return total
+
+if __name__ == "__main__":
+    import argparse
+    from app.db.session import SessionLocal
+
+    ap = argparse.ArgumentParser(description="Chaves de API de integração (X-API-Key)")
+    ap.add_argument("acao", choices=["criar", "revogar"])
+    ap.add_argument("nome")
+    args = ap.parse_args()
+
+    sessao = SessionLocal()
+    try:
+        print(criar(sessao, args.nome) if args.acao == "criar" else f"{revogar(sessao, args.nome)} chave(s) revogada(s)")
+    finally:
+        sessao.close()
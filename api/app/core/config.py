@@ -3,10 +3,123 @@ import os
 
 class Settings(BaseModel):
     database_url: str = os.getenv("DATABASE_URL", "")
+    # réplicas de leitura (busca, chat, GET /tintas/), URLs separadas por vírgula; vazio = tudo no primário.
+    # réplica com atraso de replay acima de REPLICA_LAG_MAX_S (ou fora do ar) é pulada até a próxima medida
+    database_replica_urls: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    replica_lag_max_s: float = float(os.getenv("REPLICA_LAG_MAX_S", "5"))
+    replica_verificacao_s: float = float(os.getenv("REPLICA_VERIFICACAO_S", "5"))
     jwt_secret: str = os.getenv("JWT_SECRET", "change-me")
     jwt_alg: str = os.getenv("JWT_ALG", "HS256")
     jwt_exp_min: int = int(os.getenv("JWT_EXP_MIN", "60"))
+    # claims decodificados ficam em memória por até JWT_CACHE_TTL_S (nunca além do exp)
+    jwt_cache_tamanho: int = int(os.getenv("JWT_CACHE_TAMANHO", "4096"))
+    jwt_cache_ttl_s: float = float(os.getenv("JWT_CACHE_TTL_S", "300"))
+    # admin criado no startup se ainda não existir (o cadastro público só cria leitores); vazio = nenhum
+    admin_email: str = os.getenv("ADMIN_EMAIL", "")
+    admin_senha: str = os.getenv("ADMIN_SENHA", "")
+    # custo do bcrypt (hashes antigos são refeitos no próximo login) e threads dedicadas
+    bcrypt_rounds: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    bcrypt_workers: int = int(os.getenv("BCRYPT_WORKERS", "4"))
+    # cota por usuário no /chat/recomendar (0 = sem limite; admin é isento)
+    chat_cota_minuto: int = int(os.getenv("CHAT_COTA_MINUTO", "20"))
+    chat_cota_dia: int = int(os.getenv("CHAT_COTA_DIA", "500"))
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     embedding_model: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    # provedor de embeddings: openai | local (CPU, sentence-transformers); 0 = dimensão padrão do modelo
+    embedding_provedor: str = os.getenv("EMBEDDING_PROVEDOR", "openai")
+    embedding_dim: int = int(os.getenv("EMBEDDING_DIM", "0"))
+    embedding_local_modelo: str = os.getenv("EMBEDDING_LOCAL_MODELO", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    embedding_local_backend: str = os.getenv("EMBEDDING_LOCAL_BACKEND", "torch")  # torch | onnx | openvino
+    embedding_local_lote: int = int(os.getenv("EMBEDDING_LOCAL_LOTE", "64"))
+    embedding_local_workers: int = int(os.getenv("EMBEDDING_LOCAL_WORKERS", "2"))
+    # pool HTTP compartilhado pelos clientes OpenAI
+    openai_timeout_s: float = float(os.getenv("OPENAI_TIMEOUT_S", "30"))
+    openai_max_conexoes: int = int(os.getenv("OPENAI_MAX_CONEXOES", "20"))
+    openai_max_keepalive: int = int(os.getenv("OPENAI_MAX_KEEPALIVE", "10"))
+    openai_keepalive_s: float = float(os.getenv("OPENAI_KEEPALIVE_S", "30"))
+    # governador de chamadas de saída (por tipo: embeddings / chat)
+    openai_rpm: float = float(os.getenv("OPENAI_RPM", "500"))
+    openai_tpm: float = float(os.getenv("OPENAI_TPM", "200000"))
+    openai_max_concorrencia: int = int(os.getenv("OPENAI_MAX_CONCORRENCIA", "8"))
+    openai_max_fila: int = int(os.getenv("OPENAI_MAX_FILA", "64"))
+    openai_prazo_s: float = float(os.getenv("OPENAI_PRAZO_S", "20"))
+    openai_max_tentativas: int = int(os.getenv("OPENAI_MAX_TENTATIVAS", "4"))
 
-settings = Settings()
\ No newline at end of file
+    # re-ranking local sobre os candidatos do índice ANN
+    rerank_candidatos: int = int(os.getenv("RERANK_CANDIDATOS", "50"))
+    rerank_modelo: str = os.getenv("RERANK_MODELO", "")  # ex.: cross-encoder/mmarco-mMiniLMv2-L12-H384-v1
+    rerank_peso_semantico: float = float(os.getenv("RERANK_PESO_SEMANTICO", "0.6"))
+    rerank_peso_atributos: float = float(os.getenv("RERANK_PESO_ATRIBUTOS", "0.25"))
+    rerank_peso_lexical: float = float(os.getenv("RERANK_PESO_LEXICAL", "0.15"))
+    rerank_peso_modelo: float = float(os.getenv("RERANK_PESO_MODELO", "0.3"))
+    # resposta por template (sem LLM) para matches de alta confiança
+    resposta_modo: str = os.getenv("RESPOSTA_MODO", "auto")  # auto | template | llm
+    template_score_min: float = float(os.getenv("TEMPLATE_SCORE_MIN", "0.62"))
+    template_margem_min: float = float(os.getenv("TEMPLATE_MARGEM_MIN", "0.05"))
+    template_max_termos: int = int(os.getenv("TEMPLATE_MAX_TERMOS", "8"))
+    # memória de conversa (tamanho do histórico enviado ao LLM)
+    conversa_turnos_prompt: int = int(os.getenv("CONVERSA_TURNOS_PROMPT", "4"))
+    conversa_turno_max_chars: int = int(os.getenv("CONVERSA_TURNO_MAX_CHARS", "300"))
+    conversa_resumo_max_chars: int = int(os.getenv("CONVERSA_RESUMO_MAX_CHARS", "800"))
+    embedding_cache_tamanho: int = int(os.getenv("EMBEDDING_CACHE_TAMANHO", "2048"))
+    # consulta canônica antes do embedding (abreviações, correção pelo vocabulário do catálogo, sinônimos)
+    consulta_normalizar: bool = os.getenv("CONSULTA_NORMALIZAR", "1") == "1"
+    consulta_vocab_ttl_s: float = float(os.getenv("CONSULTA_VOCAB_TTL_S", "300"))
+    consulta_correcao_min: int = int(os.getenv("CONSULTA_CORRECAO_MIN", "4"))  # palavras menores não são corrigidas
+    consulta_correcao_min_2: int = int(os.getenv("CONSULTA_CORRECAO_MIN_2", "7"))  # a partir daqui, até 2 erros
+    consulta_correcao_freq_2: int = int(os.getenv("CONSULTA_CORRECAO_FREQ_2", "3"))  # frequência mínima do candidato a 2 erros
+    # contexto de prompt / payload de exibição pré-calculados por tinta (LRU por id + atualizado_em)
+    apresentacao_cache_tamanho: int = int(os.getenv("APRESENTACAO_CACHE_TAMANHO", "4096"))
+    # busca LLM-free (/busca/recomendar)
+    busca_slo_ms: float = float(os.getenv("BUSCA_SLO_MS", "300"))
+    busca_max_janela: int = int(os.getenv("BUSCA_MAX_JANELA", "100"))
+    # features citadas na consulta ("sem cheiro", "lavável") viram filtro jsonb; relaxa se faltar resultado
+    busca_features_consulta: bool = os.getenv("BUSCA_FEATURES_CONSULTA", "1") == "1"
+    # diversidade sobre os candidatos: MMR nos embeddings (λ = peso da relevância) e variantes de cor
+    # do mesmo nome + linha agrupadas num item (demais cores em outras_cores)
+    busca_mmr: bool = os.getenv("BUSCA_MMR", "1") == "1"
+    busca_mmr_lambda: float = float(os.getenv("BUSCA_MMR_LAMBDA", "0.7"))
+    busca_agrupar_cores: bool = os.getenv("BUSCA_AGRUPAR_CORES", "1") == "1"
+    # cor pedida na consulta ("azul mais claro", "#8fb3d9"): tintas de cor próxima (ΔE em Lab) entram como
+    # candidatas e a proximidade pesa BUSCA_COR_PESO no score; 0 desliga
+    busca_cor_peso: float = float(os.getenv("BUSCA_COR_PESO", "0.35"))
+    cor_delta_e_max: float = float(os.getenv("COR_DELTA_E_MAX", "50"))  # ΔE a partir do qual a proximidade é 0
+    cores_indice_ttl_s: float = float(os.getenv("CORES_INDICE_TTL_S", "300"))
+    cores_dicionario: str = os.getenv("CORES_DICIONARIO", "")  # JSON {"nome": "#rrggbb"} somado ao embutido
+    hnsw_iterative_scan: str = os.getenv("HNSW_ITERATIVE_SCAN", "relaxed_order")  # "" desliga (pgvector < 0.8)
+    autocompletar_ttl_s: float = float(os.getenv("AUTOCOMPLETAR_TTL_S", "300"))
+    # recomendação em lote
+    embedding_lote: int = int(os.getenv("EMBEDDING_LOTE", "256"))
+    lote_max_consultas: int = int(os.getenv("LOTE_MAX_CONSULTAS", "10000"))
+    # sincronização incremental do catálogo: tintas que sumiram do feed -> remover | marcar | manter;
+    # acima dessa fração do último import, as ausências só são aplicadas com --forcar
+    sinc_ausentes: str = os.getenv("SINC_AUSENTES", "marcar")
+    sinc_max_ausentes: float = float(os.getenv("SINC_MAX_AUSENTES", "0.2"))
+    fila_embeddings_max_tentativas: int = int(os.getenv("FILA_EMBEDDINGS_MAX_TENTATIVAS", "5"))
+    indice_memoria: bool = os.getenv("INDICE_MEMORIA", "0") == "1"
+    indice_memoria_ttl_s: float = float(os.getenv("INDICE_MEMORIA_TTL_S", "300"))
+    # versões do índice (blue/green): ponteiro da versão ativa relido a cada INDICE_VERSAO_TTL_S;
+    # uma versão nova só é ativada com cobertura e recall@k (HNSW vs. busca exata) mínimos
+    indice_versao_ttl_s: float = float(os.getenv("INDICE_VERSAO_TTL_S", "10"))
+    indice_cobertura_min: float = float(os.getenv("INDICE_COBERTURA_MIN", "0.99"))
+    indice_recall_min: float = float(os.getenv("INDICE_RECALL_MIN", "0.9"))
+    indice_recall_amostra: int = int(os.getenv("INDICE_RECALL_AMOSTRA", "20"))
+    indice_recall_k: int = int(os.getenv("INDICE_RECALL_K", "10"))
+    # limite de taxa por cliente (X-API-Key, usuário ou IP): memoria | postgres | desligado
+    limite_taxa_backend: str = os.getenv("LIMITE_TAXA_BACKEND", "memoria")
+    limite_taxa_rpm: float = float(os.getenv("LIMITE_TAXA_RPM", "60"))
+    chaves_api_ttl_s: float = float(os.getenv("CHAVES_API_TTL_S", "60"))
+    confiar_x_forwarded_for: bool = os.getenv("CONFIAR_X_FORWARDED_FOR", "0") == "1"
+    custo_precos_json: str = os.getenv("CUSTO_PRECOS_JSON", "")
+    # resultado do probe de embeddings reaproveitado por esse tempo
+    health_cache_ttl_s: float = float(os.getenv("HEALTH_CACHE_TTL_S", "60"))
+    # /health/ready: status da OpenAI atualizado em background; reltuples em cache
+    saude_upstream_intervalo_s: float = float(os.getenv("SAUDE_UPSTREAM_INTERVALO_S", "60"))
+    saude_stats_ttl_s: float = float(os.getenv("SAUDE_STATS_TTL_S", "300"))
+    saude_exigir_upstream: bool = os.getenv("SAUDE_EXIGIR_UPSTREAM", "0") == "1"
+    # catálogo usado quando a requisição não envia X-Tenant
+    tenant_padrao: str = os.getenv("TENANT_PADRAO", "suvinil")
+    tenant_cache_ttl_s: float = float(os.getenv("TENANT_CACHE_TTL_S", "60"))
+    migrar_no_startup: bool = os.getenv("MIGRAR_NO_STARTUP", "1") == "1"
+
+settings = Settings()
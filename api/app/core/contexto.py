@@ -0,0 +1,47 @@
+# app/core/contexto.py
+"""Identidade do cliente da requisição atual (para limite de taxa e custos).
+
+Um middleware ASGI puro resolve o cliente uma vez por requisição e guarda num
+``ContextVar``; rotas síncronas, dependências e o governador da OpenAI (que
+rodam no threadpool com o contexto copiado) leem de lá. Prioridade:
+``X-API-Key`` cadastrada (``chaves_api``) > usuário do JWT > IP.
+"""
+from contextvars import ContextVar
+from typing import Optional
+from app.core import chaves_api
+from app.core.config import settings
+
+cliente_atual: ContextVar[str] = ContextVar("cliente_atual", default="interno")
+
+def identificar(headers: dict, ip: Optional[str]) -> str:
+    chave = headers.get("x-api-key")
+    if chave:
+        # só chaves cadastradas; a desconhecida cai no JWT/IP (nunca guarda a chave em claro)
+        identidade = chaves_api.identificar(chave)
+        if identidade:
+            return identidade
+    autorizacao = headers.get("authorization", "")
+    if autorizacao.lower().startswith("bearer "):
+        from app.core.security import decodificar_token_cache
+        try:
+            return "usuario:" + str(decodificar_token_cache(autorizacao[7:].strip())["sub"])
+        except Exception:
+            pass  # token inválido: a rota responde 401 se exigir; aqui conta pelo IP
+    if settings.confiar_x_forwarded_for and headers.get("x-forwarded-for"):
+        ip = headers["x-forwarded-for"].split(",")[0].strip()
+    return f"ip:{ip or 'desconhecido'}"
+
+class MiddlewareCliente:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        cliente = scope.get("client")
+        token = cliente_atual.set(identificar(headers, cliente[0] if cliente else None))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            cliente_atual.reset(token)
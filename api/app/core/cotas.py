@@ -0,0 +1,45 @@
+# app/core/cotas.py
+"""Cotas por usuário em janelas fixas (minuto e dia), em memória.
+
+Usadas para limitar rotas caras (LLM) por usuário autenticado. Os contadores
+são por processo: com N workers o limite efetivo é até N vezes maior.
+"""
+import threading
+import time
+from typing import Dict, Tuple
+from app.core import metricas
+
+class CotaExcedida(Exception):
+    def __init__(self, janela: str, retry_after: int):
+        super().__init__(f"cota por {janela} excedida")
+        self.janela = janela
+        self.retry_after = retry_after
+
+class Cota:
+    def __init__(self, nome: str, por_minuto: int = 0, por_dia: int = 0):
+        self.nome = nome
+        self.limites = {"minuto": (60, por_minuto), "dia": (86400, por_dia)}
+        self._contagens: Dict[Tuple[str, str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def consumir(self, chave: str) -> None:
+        """Conta um uso de ``chave``; levanta ``CotaExcedida`` (sem contar) se passou do limite."""
+        agora = time.time()
+        with self._lock:
+            chaves = []
+            for janela, (duracao, limite) in self.limites.items():
+                if limite <= 0:
+                    continue
+                k = (chave, janela, int(agora // duracao))
+                if self._contagens.get(k, 0) >= limite:
+                    metricas.incrementar(f"cota.{self.nome}.excedida")
+                    raise CotaExcedida(janela, int(duracao - agora % duracao) + 1)
+                chaves.append(k)
+            for k in chaves:
+                self._contagens[k] = self._contagens.get(k, 0) + 1
+            if len(self._contagens) > 10000:
+                self._limpar(agora)
+
+    def _limpar(self, agora: float) -> None:
+        atuais = {janela: int(agora // duracao) for janela, (duracao, _) in self.limites.items()}
+        self._contagens = {k: v for k, v in self._contagens.items() if k[2] >= atuais[k[1]]}
@@ -0,0 +1,86 @@
+# app/core/custos.py
+"""Consumo de tokens e custo estimado (USD) por cliente, a partir do ``usage`` da OpenAI.
+
+O governador chama ``registrar`` a cada resposta bem-sucedida; o cliente vem
+de ``contexto.cliente_atual``. Preços em USD por 1M de tokens (entrada, saída),
+sobrescrevíveis com CUSTO_PRECOS_JSON='{"modelo": [entrada, saida]}'.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+from app.core import metricas
+from app.core.config import settings
+from app.core.contexto import cliente_atual
+
+PRECOS_USD_1M: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+@lru_cache(maxsize=1)
+def _precos() -> Dict[str, Tuple[float, float]]:
+    precos = dict(PRECOS_USD_1M)
+    if settings.custo_precos_json:
+        precos.update({k: tuple(v) for k, v in json.loads(settings.custo_precos_json).items()})
+    return precos
+
+def _preco(modelo: str) -> Tuple[float, float]:
+    precos = _precos()
+    if modelo in precos:
+        return precos[modelo]
+    # respostas trazem o modelo com data ("gpt-4o-mini-2024-07-18")
+    base = max((m for m in precos if modelo.startswith(m)), key=len, default=None)
+    return precos[base] if base else (0.0, 0.0)
+
+# LRU como os baldes de limite_taxa: IPs rotativos não crescem a memória sem fim; o consumo
+# de quem sai entra em "outros" (os totais continuam batendo)
+_MAX_CLIENTES = 10_000
+_lock = threading.Lock()
+_por_cliente: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+_outros: Dict[str, float] = defaultdict(float)
+
+def registrar(chamada: str, resposta: Any) -> None:
+    uso = getattr(resposta, "usage", None)
+    if uso is None:
+        return
+    entrada = getattr(uso, "prompt_tokens", 0) or 0
+    saida = getattr(uso, "completion_tokens", 0) or 0
+    preco_entrada, preco_saida = _preco(str(getattr(resposta, "model", "") or ""))
+    custo = (entrada * preco_entrada + saida * preco_saida) / 1_000_000
+    cliente = cliente_atual.get()
+    with _lock:
+        item = _por_cliente.get(cliente)
+        if item is None:
+            item = _por_cliente[cliente] = defaultdict(float)
+            if len(_por_cliente) > _MAX_CLIENTES:
+                for k, v in _por_cliente.popitem(last=False)[1].items():
+                    _outros[k] += v
+        else:
+            _por_cliente.move_to_end(cliente)
+        item["chamadas"] += 1
+        item[f"tokens_entrada.{chamada}"] += entrada
+        item[f"tokens_saida.{chamada}"] += saida
+        item["custo_usd"] += custo
+    metricas.incrementar(f"custo.{chamada}.usd", custo)
+
+def _exibir(cliente: str) -> str:
+    """IP não sai em claro: vira ``ip:<hash curto>`` (o mesmo IP dá sempre o mesmo hash)."""
+    if not cliente.startswith("ip:"):
+        return cliente
+    return "ip:" + hashlib.sha256((settings.jwt_secret + cliente).encode()).hexdigest()[:12]
+
+def snapshot(limite: int = 50) -> Dict[str, Dict[str, float]]:
+    """Clientes com maior custo primeiro (deste worker)."""
+    with _lock:
+        itens = [(c, dict(v)) for c, v in _por_cliente.items()]
+        outros = dict(_outros)
+    itens.sort(key=lambda kv: kv[1].get("custo_usd", 0.0), reverse=True)
+    saida = {_exibir(c): {k: round(v, 6) for k, v in d.items()} for c, d in itens[:limite]}
+    if outros:
+        saida["outros"] = {k: round(v, 6) for k, v in outros.items()}
+    return saida
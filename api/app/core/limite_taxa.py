@@ -0,0 +1,110 @@
+# app/core/limite_taxa.py
+"""Limite de taxa por cliente (token bucket) para as rotas que chamam a OpenAI.
+
+- ``memoria`` (padrão): um ``BaldeTokens`` por cliente e rota, neste processo;
+- ``postgres``: o mesmo balde numa linha de ``limites_taxa``, atualizada num
+  único UPSERT atômico — o limite vale para todos os workers juntos;
+- ``desligado``: sem limite.
+Capacidade de LIMITE_TAXA_RPM requisições, repostas continuamente ao longo
+de um minuto. Se o Postgres falhar, a requisição passa (fail-open).
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import text
+from app.core import metricas
+from app.core.config import settings
+from app.core.contexto import cliente_atual
+from app.db.session import SessionLocal
+from app.services.ia.governador import BaldeTokens
+
+_MAX_BALDES = 10_000
+
+class LimiteExcedido(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("limite de taxa excedido")
+        self.retry_after = retry_after
+
+class LimitadorMemoria:
+    def __init__(self, por_minuto: float):
+        self.por_minuto = por_minuto
+        self._baldes: "OrderedDict[str, BaldeTokens]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, chave: str, custo: float = 1) -> None:
+        with self._lock:
+            balde = self._baldes.get(chave)
+            if balde is None:
+                balde = self._baldes[chave] = BaldeTokens(self.por_minuto)
+                if len(self._baldes) > _MAX_BALDES:
+                    self._baldes.popitem(last=False)
+            else:
+                self._baldes.move_to_end(chave)
+        espera = balde.reservar(custo)
+        if espera > 0:
+            balde.ajustar(-custo)  # rejeitada: devolve o que foi reservado
+            raise LimiteExcedido(espera)
+
+class LimitadorPostgres:
+    """Balde compartilhado entre workers: reposição + débito numa única instrução."""
+
+    _sql = text("""
+        INSERT INTO limites_taxa AS b (chave, disponivel, permitido, atualizado_em)
+        VALUES (:chave, :capacidade - :custo, TRUE, clock_timestamp())
+        ON CONFLICT (chave) DO UPDATE SET
+            disponivel = LEAST(:capacidade, b.disponivel + EXTRACT(EPOCH FROM clock_timestamp() - b.atualizado_em) * :taxa)
+                         - CASE WHEN LEAST(:capacidade, b.disponivel + EXTRACT(EPOCH FROM clock_timestamp() - b.atualizado_em) * :taxa) >= :custo
+                                THEN :custo ELSE 0 END,
+            permitido = LEAST(:capacidade, b.disponivel + EXTRACT(EPOCH FROM clock_timestamp() - b.atualizado_em) * :taxa) >= :custo,
+            atualizado_em = clock_timestamp()
+        RETURNING disponivel, permitido
+    """)
+
+    def __init__(self, por_minuto: float):
+        self.capacidade = float(por_minuto)
+        self.taxa = self.capacidade / 60.0
+
+    def consumir(self, chave: str, custo: float = 1) -> None:
+        db = SessionLocal()
+        try:
+            linha = db.execute(self._sql, {
+                "chave": chave, "capacidade": self.capacidade, "taxa": self.taxa, "custo": float(custo),
+            }).one()
+            db.commit()
+        except Exception as e:
+            print(f"⚠️ Limite de taxa no Postgres indisponível, liberando requisição: {str(e)}")
+            metricas.incrementar("limite_taxa.falha_backend")
+            return
+        finally:
+            db.close()
+        if not linha.permitido:
+            raise LimiteExcedido((float(custo) - float(linha.disponivel)) / self.taxa)
+
+@lru_cache(maxsize=1)
+def limitador() -> Optional[object]:
+    backend = settings.limite_taxa_backend
+    if backend == "postgres":
+        return LimitadorPostgres(settings.limite_taxa_rpm)
+    if backend == "memoria":
+        return LimitadorMemoria(settings.limite_taxa_rpm)
+    return None
+
+def limitar(rota: str, custo: float = 1):
+    """Dependência FastAPI: aplica o balde de ``rota`` ao cliente da requisição (429 se esgotado)."""
+    def _verificar() -> None:
+        atual = limitador()
+        if atual is None:
+            return
+        cliente = cliente_atual.get()
+        try:
+            atual.consumir(f"{rota}:{cliente}", custo)
+        except LimiteExcedido as e:
+            metricas.incrementar(f"limite_taxa.{rota}.rejeitadas")
+            raise HTTPException(
+                status_code=429,
+                detail="Limite de requisições excedido; tente novamente em instantes",
+                headers={"Retry-After": str(max(1, int(e.retry_after + 0.999)))},
+            )
+    return _verificar
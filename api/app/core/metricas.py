@@ -0,0 +1,71 @@
+# app/core/metricas.py
+"""Métricas em processo (contadores, gauges e latências) expostas em ``/metricas``.
+
+Sem dependência externa: cada worker mantém seus próprios números, o que é
+suficiente para diagnóstico e para o scraper do orquestrador.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+_AMOSTRAS_MAX = 2048
+
+_lock = threading.Lock()
+_contadores: Dict[str, float] = defaultdict(float)
+_gauges: Dict[str, float] = {}
+_latencias: Dict[str, deque] = defaultdict(lambda: deque(maxlen=_AMOSTRAS_MAX))
+
+def incrementar(nome: str, valor: float = 1) -> None:
+    with _lock:
+        _contadores[nome] += valor
+
+def definir(nome: str, valor: float) -> None:
+    with _lock:
+        _gauges[nome] = valor
+
+def maximo(nome: str, valor: float) -> None:
+    """Gauge que guarda o maior valor já observado (ex.: pico de fila)."""
+    with _lock:
+        if valor > _gauges.get(nome, float("-inf")):
+            _gauges[nome] = valor
+
+def observar(nome: str, segundos: float) -> None:
+    with _lock:
+        _latencias[nome].append(segundos)
+
+@contextmanager
+def cronometro(nome: str) -> Iterator[None]:
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(nome, time.perf_counter() - inicio)
+
+def _percentil(ordenadas: list, p: float) -> float:
+    if not ordenadas:
+        return 0.0
+    k = min(len(ordenadas) - 1, max(0, round(p / 100 * (len(ordenadas) - 1))))
+    return ordenadas[k]
+
+def resumo_latencia(nome: str) -> Dict[str, float]:
+    with _lock:
+        amostras = sorted(_latencias.get(nome, ()))
+    return {
+        "n": len(amostras),
+        "p50_ms": round(_percentil(amostras, 50) * 1000, 2),
+        "p95_ms": round(_percentil(amostras, 95) * 1000, 2),
+        "p99_ms": round(_percentil(amostras, 99) * 1000, 2),
+    }
+
+def snapshot() -> dict:
+    with _lock:
+        contadores = dict(_contadores)
+        gauges = dict(_gauges)
+        nomes = list(_latencias)
+    return {
+        "contadores": contadores,
+        "gauges": gauges,
+        "latencias": {n: resumo_latencia(n) for n in nomes},
+    }
@@ -0,0 +1,58 @@
+# app/core/recarga.py
+"""Recarga dos índices em memória (autocompletar, vocabulário de consultas, cores).
+
+Quando o TTL de um índice vence, a requisição que percebeu só agenda a
+reconstrução numa thread e segue respondendo com o índice atual, que é trocado
+de uma vez no fim (``reconstruir``). Só o primeiro build de um tenant (nada para
+servir ainda) é feito na própria requisição. No máximo uma recarga por índice e
+tenant de cada vez; se falhar, tenta de novo só após o TTL.
+"""
+import threading
+import time
+from typing import Any, Callable, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.core import metricas
+
+_em_andamento: Set[Tuple[str, str]] = set()
+_lock = threading.Lock()
+
+def _falhou(nome: str, alvo: Any, e: Exception) -> None:
+    print(f"⚠️ Índice {nome} não recarregado: {str(e)}")
+    alvo.construido_em = time.monotonic()
+
+def _executar(nome: str, tenant: str, alvo: Any, carregar: Callable[[Session, Optional[str]], None]) -> None:
+    from app.db.session import SessionLeitura
+
+    db = SessionLeitura()
+    try:
+        with metricas.cronometro(f"{nome}.recarga"):
+            carregar(db, tenant)
+    except Exception as e:
+        _falhou(nome, alvo, e)
+    finally:
+        db.close()
+        with _lock:
+            _em_andamento.discard((nome, tenant))
+
+def se_expirado(
+    nome: str, alvo: Any, ttl_s: float, db: Session, tenant: str, carregar: Callable[[Session, Optional[str]], None]
+) -> None:
+    """Garante ``alvo`` (índice com ``construido_em``) carregado; expirado, recarrega em segundo plano."""
+    construido_em = alvo.construido_em
+    if construido_em is not None and time.monotonic() - construido_em <= ttl_s:
+        return
+    if construido_em is None:
+        try:
+            carregar(db, tenant)
+        except Exception as e:
+            db.rollback()
+            _falhou(nome, alvo, e)
+        return
+    with _lock:
+        if (nome, tenant) in _em_andamento:
+            return
+        _em_andamento.add((nome, tenant))
+    metricas.incrementar(f"{nome}.recarga.agendada")
+    threading.Thread(
+        target=_executar, args=(nome, tenant, alvo, carregar), name=f"recarga-{nome}-{tenant}", daemon=True
+    ).start()
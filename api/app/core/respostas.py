@@ -0,0 +1,39 @@
+# app/core/respostas.py
+"""Serialização JSON das rotas quentes (listagens grandes, NDJSON do lote).
+
+``RespostaJSON`` recebe linhas já no formato da saída (dicts vindos direto do
+banco) e serializa de uma vez: sem modelo Pydantic por linha e sem a
+validação do ``response_model``, que continua declarado só para o OpenAPI.
+Usa orjson quando instalado (extra ``rapido``); senão ``pydantic_core.to_json``,
+também em Rust e sempre presente com o pydantic 2.
+
+Rotas que devolvem poucos itens seguem retornando dicts com ``response_model``:
+o FastAPI (>= 0.130) já serializa esses direto para bytes via pydantic-core, e
+uma classe de resposta customizada desligaria esse caminho.
+"""
+from decimal import Decimal
+from typing import Any
+from fastapi import Response
+import pydantic_core
+
+try:
+    import orjson  # dependência opcional (extra "rapido")
+except ImportError:
+    orjson = None
+
+def _padrao(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return str(obj)
+
+def dumps(obj: Any) -> bytes:
+    """JSON em bytes (UTF-8, sem escapar acentos); UUID/datetime/enum nativos."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_padrao, option=orjson.OPT_NON_STR_KEYS)
+    return pydantic_core.to_json(obj, fallback=_padrao)
+
+class RespostaJSON(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,170 @@
+# app/core/saude.py
+"""Checagens de saúde baratas para o orquestrador (liveness/readiness).
+
+- live: só responde; não toca em banco nem em rede.
+- ready: ``SELECT 1`` pelo pool + estimativa de linhas via ``pg_class.reltuples``
+  (em cache por SAUDE_STATS_TTL_S) + último status da OpenAI.
+- O status da OpenAI é atualizado por uma thread a cada
+  SAUDE_UPSTREAM_INTERVALO_S com ``models.retrieve`` (não consome tokens);
+  o probe nunca dispara chamadas pagas.
+- O atraso das réplicas de leitura é medido por outra thread a cada
+  REPLICA_VERIFICACAO_S (``Replica.verificar``); a requisição só lê o valor.
+- ``diagnostico`` (sob demanda) faz as checagens completas: COUNT(*) exato e
+  um embedding real.
+"""
+import threading
+import time
+from typing import Any, Dict, List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core import metricas
+from app.core.config import settings
+
+TABELAS = ("tintas", "embeddings_tintas")
+
+# reltuples da árvore de partições (embeddings_tintas: tenant -> versão); -1 = nunca analisada
+_SQL_ESTIMATIVA = text("""
+    SELECT c.relname,
+           (SELECT SUM(GREATEST(p.reltuples, 0))::bigint
+            FROM pg_partition_tree(c.oid) pt JOIN pg_class p ON p.oid = pt.relid) AS linhas
+    FROM pg_class c
+    WHERE c.relnamespace = 'public'::regnamespace
+      AND c.relname = ANY(:tabelas)
+      AND c.relkind IN ('r', 'p')
+""")
+
+_lock = threading.Lock()
+_estatisticas: Dict[str, Any] = {}
+_upstream: Dict[str, Any] = {"status": "desconhecido"}
+_parar = threading.Event()
+_monitores: List[threading.Thread] = []
+
+def vivo() -> Dict[str, Any]:
+    return {"status": "ok"}
+
+def estimativa_tabelas(db: Session) -> Dict[str, Any]:
+    """Linhas estimadas por tabela (sem scan), em cache."""
+    with _lock:
+        if _estatisticas and time.monotonic() - _estatisticas["em"] < settings.saude_stats_ttl_s:
+            return _estatisticas["linhas"]
+    linhas = {r.relname: int(r.linhas) for r in db.execute(_SQL_ESTIMATIVA, {"tabelas": list(TABELAS)})}
+    with _lock:
+        _estatisticas.update(linhas=linhas, em=time.monotonic())
+    return linhas
+
+def verificar_upstream() -> Dict[str, Any]:
+    """Checagem gratuita da OpenAI (metadados do modelo de embedding)."""
+    from app.services.ia.clientes import get_openai_client
+
+    client = get_openai_client()
+    if client is None:
+        estado = {"status": "nao_configurado"}
+    else:
+        inicio = time.perf_counter()
+        try:
+            client.models.retrieve(settings.embedding_model, timeout=5.0)
+            estado = {"status": "ok", "latencia_ms": round((time.perf_counter() - inicio) * 1000, 1)}
+        except Exception as e:
+            estado = {"status": "erro", "erro": str(e)[:200]}
+    estado["verificado_em"] = time.time()
+    metricas.definir("saude.upstream_ok", 1 if estado["status"] == "ok" else 0)
+    with _lock:
+        _upstream.clear()
+        _upstream.update(estado)
+    return estado
+
+def _loop_monitor() -> None:
+    while not _parar.is_set():
+        try:
+            verificar_upstream()
+        except Exception as e:
+            print(f"⚠️ Monitor de saúde falhou: {str(e)}")
+        _parar.wait(settings.saude_upstream_intervalo_s)
+
+def _loop_replicas() -> None:
+    from app.db.session import replicas
+
+    while not _parar.is_set():
+        for r in replicas:
+            r.verificar()  # não levanta: erro vira réplica indisponível
+        _parar.wait(settings.replica_verificacao_s)
+
+def iniciar_monitor() -> None:
+    from app.db.session import replicas
+
+    if any(m.is_alive() for m in _monitores):
+        return
+    _parar.clear()
+    _monitores[:] = [threading.Thread(target=_loop_monitor, name="saude-upstream", daemon=True)]
+    if replicas:
+        _monitores.append(threading.Thread(target=_loop_replicas, name="saude-replicas", daemon=True))
+    for m in _monitores:
+        m.start()
+
+def parar_monitor() -> None:
+    _parar.set()
+
+def pronto(db: Session) -> Dict[str, Any]:
+    """Estado de prontidão; ``pronto`` False => o orquestrador tira o worker do balanceador."""
+    resultado: Dict[str, Any] = {}
+    inicio = time.perf_counter()
+    try:
+        db.execute(text("SELECT 1"))
+        resultado["banco"] = {"status": "ok", "latencia_ms": round((time.perf_counter() - inicio) * 1000, 1)}
+        resultado["tabelas_estimadas"] = estimativa_tabelas(db)
+    except Exception as e:
+        resultado["banco"] = {"status": "erro", "erro": str(e)[:200]}
+    with _lock:
+        upstream = dict(_upstream)
+    if "verificado_em" in upstream:
+        upstream["idade_s"] = round(time.time() - upstream.pop("verificado_em"), 1)
+    resultado["openai"] = upstream
+
+    from app.db.session import replicas
+    if replicas:
+        # informativo: réplica atrasada ou fora do ar só desvia as leituras para o primário
+        resultado["replicas"] = [r.estado() for r in replicas]
+
+    ok = resultado["banco"]["status"] == "ok"
+    if settings.saude_exigir_upstream:
+        ok = ok and upstream["status"] == "ok"
+    resultado["pronto"] = ok
+    return resultado
+
+def diagnostico(db: Session) -> Dict[str, Any]:
+    """Checagens completas e caras: COUNT(*) exato, embedding real, pool e migrações."""
+    from app.db.session import engine, replicas
+    from app.services.ia.provedores import get_provedor
+    from app.services.ia.vetores import embed_texto
+
+    resultado: Dict[str, Any] = {"contagens": {}}
+    for tabela in TABELAS:
+        try:
+            resultado["contagens"][tabela] = db.execute(text(f"SELECT COUNT(*) FROM {tabela}")).scalar()
+        except Exception as e:
+            db.rollback()
+            resultado["contagens"][tabela] = f"erro: {str(e)[:200]}"
+    try:
+        resultado["migracoes"] = list(db.execute(text("SELECT versao FROM schema_migracoes ORDER BY versao")).scalars())
+    except Exception:
+        db.rollback()
+        resultado["migracoes"] = []
+    try:
+        resultado["indices_ativos"] = dict(db.execute(text("SELECT tenant, versao FROM indice_ativo")).all())
+    except Exception:
+        db.rollback()
+        resultado["indices_ativos"] = {}
+    resultado["pool"] = engine.pool.status()
+    resultado["replicas"] = [r.estado() for r in replicas]
+
+    inicio = time.perf_counter()
+    try:
+        vetor = embed_texto("teste de conexão")
+        resultado["embedding"] = {
+            "status": "ok", "dimensoes": len(vetor), "modelo": get_provedor().modelo,
+            "latencia_ms": round((time.perf_counter() - inicio) * 1000, 1),
+        }
+    except Exception as e:
+        resultado["embedding"] = {"status": "erro", "erro": str(e)[:200]}
+    resultado["openai"] = verificar_upstream()
+    return resultado
@@ -1,10 +1,21 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
 import jwt
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from passlib.context import CryptContext
+from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.models.usuario import Papel, Usuario
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
 
 def gerar_hash_senha(senha: str) -> str:
     return pwd_context.hash(senha)
@@ -12,10 +23,115 @@ def gerar_hash_senha(senha: str) -> str:
 def verificar_senha(senha: str, hash_senha: str) -> bool:
     return pwd_context.verify(senha, hash_senha)
 
-def criar_token_jwt(sub: str, papel: str, exp_min: Optional[int] = None) -> str:
+# ---------- bcrypt fora do event loop ----------
+@lru_cache(maxsize=1)
+def _executor_senhas() -> ThreadPoolExecutor:
+    # pool próprio: rajadas de login não ocupam o threadpool das rotas síncronas
+    return ThreadPoolExecutor(max_workers=settings.bcrypt_workers, thread_name_prefix="bcrypt")
+
+@lru_cache(maxsize=1)
+def _hash_falso() -> str:
+    return gerar_hash_senha("usuario-inexistente")
+
+async def verificar_senha_async(senha: str, hash_senha: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """``(ok, novo_hash)``; ``novo_hash`` vem preenchido se o custo do hash mudou.
+
+    Sem usuário (``hash_senha=None``) verifica contra um hash falso, para o
+    tempo de resposta não revelar quais e-mails existem.
+    """
+    loop = asyncio.get_running_loop()
+    if hash_senha is None:
+        await loop.run_in_executor(_executor_senhas(), lambda: verificar_senha(senha, _hash_falso()))
+        return False, None
+    return await loop.run_in_executor(_executor_senhas(), pwd_context.verify_and_update, senha, hash_senha)
+
+# ---------- JWT ----------
+def criar_token_jwt(sub: str, papel: str, tenant: str, exp_min: Optional[int] = None) -> str:
     expira = datetime.now(timezone.utc) + timedelta(minutes=exp_min or settings.jwt_exp_min)
-    to_encode = {"sub": sub, "papel": papel, "exp": expira}
+    to_encode = {"sub": sub, "papel": papel, "tenant": tenant, "exp": expira}
     return jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_alg)
 
 def decodificar_token(token: str) -> dict:
-    return jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_alg])
\ No newline at end of file
+    return jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_alg])
+
+_claims_lock = threading.Lock()
+_claims: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()  # token -> (claims, válido até em time.time())
+
+def decodificar_token_cache(token: str) -> dict:
+    """``decodificar_token`` com cache LRU dos claims (assinatura verificada uma vez por token)."""
+    agora = time.time()
+    with _claims_lock:
+        item = _claims.get(token)
+        if item is not None:
+            if item[1] > agora:
+                _claims.move_to_end(token)
+                return item[0]
+            del _claims[token]
+    claims = decodificar_token(token)  # levanta jwt.PyJWTError se inválido/expirado
+    validade = min(float(claims.get("exp", agora)), agora + settings.jwt_cache_ttl_s)
+    with _claims_lock:
+        _claims[token] = (claims, validade)
+        while len(_claims) > settings.jwt_cache_tamanho:
+            _claims.popitem(last=False)
+    return claims
+
+# ---------- dependências ----------
+@dataclass(frozen=True)
+class UsuarioAutenticado:
+    id: str
+    papel: str
+    tenant: str
+
+bearer = HTTPBearer(auto_error=False)
+
+def get_usuario_atual(credenciais: Optional[HTTPAuthorizationCredentials] = Depends(bearer)) -> UsuarioAutenticado:
+    if credenciais is None:
+        raise HTTPException(status_code=401, detail="Token ausente", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        claims = decodificar_token_cache(credenciais.credentials)
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Token inválido ou expirado", headers={"WWW-Authenticate": "Bearer"})
+    return UsuarioAutenticado(
+        id=str(claims["sub"]),
+        papel=str(claims.get("papel", Papel.leitor.value)),
+        tenant=str(claims.get("tenant", settings.tenant_padrao)),  # tokens emitidos antes do claim
+    )
+
+def tenant_do_token(credenciais: Optional[HTTPAuthorizationCredentials]) -> Optional[str]:
+    """Tenant do usuário do token; None sem token ou com token inválido (a rota responde 401 se exigir)."""
+    if credenciais is None:
+        return None
+    try:
+        return str(decodificar_token_cache(credenciais.credentials).get("tenant", settings.tenant_padrao))
+    except jwt.PyJWTError:
+        return None
+
+def get_usuario_opcional(
+    credenciais: Optional[HTTPAuthorizationCredentials] = Depends(bearer),
+) -> Optional[UsuarioAutenticado]:
+    """Como ``get_usuario_atual``, mas sem token devolve None (rota pública que muda com o papel)."""
+    return get_usuario_atual(credenciais) if credenciais is not None else None
+
+def exigir_papel(*papeis: Papel):
+    """Dependência que só deixa passar usuários com um dos ``papeis``."""
+    permitidos = {p.value for p in papeis}
+
+    def _verificar(usuario: UsuarioAutenticado = Depends(get_usuario_atual)) -> UsuarioAutenticado:
+        if usuario.papel not in permitidos:
+            raise HTTPException(status_code=403, detail="Permissão insuficiente")
+        return usuario
+    return _verificar
+
+# ---------- admin inicial ----------
+def garantir_admin_inicial(db: Session) -> bool:
+    """Cria o admin de ADMIN_EMAIL/ADMIN_SENHA se ele ainda não existir; True se criou."""
+    if not settings.admin_email or not settings.admin_senha:
+        return False
+    if db.query(Usuario).filter(Usuario.email == settings.admin_email).first():
+        return False
+    db.add(Usuario(
+        nome="Admin", email=settings.admin_email, hash_senha=gerar_hash_senha(settings.admin_senha),
+        papel=Papel.admin, tenant=settings.tenant_padrao,
+    ))
+    db.commit()
+    return True
@@ -0,0 +1,112 @@
+# app/core/tenant.py
+"""Tenants (marcas/lojas) servidos pelo mesmo deploy.
+
+O tenant vem do header ``X-Tenant`` (sem header = o do token ou TENANT_PADRAO);
+com token, o header tem de ser o tenant do usuário (claim ``tenant``). A tabela
+``tenants`` é pequena e quase estática: fica em memória e é relida após
+TENANT_CACHE_TTL_S. Cada tenant tem sua partição em ``embeddings_tintas``
+(subparticionada por versão do índice, cada uma com HNSW próprio) e, opcionalmente, seu prompt de sistema.
+"""
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from fastapi import Depends, Header, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.security import bearer, tenant_do_token
+from app.db.session import SessionLocal
+
+_ID_VALIDO = re.compile(r"^[a-z0-9_]{1,40}$")
+
+@dataclass(frozen=True)
+class TenantConfig:
+    id: str
+    nome: str
+    marca: str
+    prompt_sistema: Optional[str] = None
+
+class TenantDesconhecido(LookupError):
+    pass
+
+_lock = threading.Lock()
+_tenants: Dict[str, TenantConfig] = {}
+_carregado_em: Optional[float] = None
+
+def padrao() -> TenantConfig:
+    """Tenant padrão sem ida ao banco (CLI, testes, chamadas internas)."""
+    return _tenants.get(settings.tenant_padrao) or TenantConfig(settings.tenant_padrao, "Suvinil", "Suvinil")
+
+def carregar(db: Session) -> Dict[str, TenantConfig]:
+    global _tenants, _carregado_em
+    linhas = db.execute(text("SELECT id, nome, marca, prompt_sistema FROM tenants WHERE ativo")).mappings().all()
+    with _lock:
+        _tenants = {l["id"]: TenantConfig(**l) for l in linhas}
+        _carregado_em = time.monotonic()
+    return _tenants
+
+def obter(db: Session, tenant_id: str) -> TenantConfig:
+    if _carregado_em is None or time.monotonic() - _carregado_em > settings.tenant_cache_ttl_s:
+        carregar(db)
+    tenant = _tenants.get(tenant_id)
+    if tenant is None:
+        raise TenantDesconhecido(tenant_id)
+    return tenant
+
+def criar(db: Session, tenant_id: str, nome: str, marca: str, prompt_sistema: Optional[str] = None) -> TenantConfig:
+    """Cadastra o tenant e cria sua partição de embeddings (subparticionada por versão do índice)."""
+    if not _ID_VALIDO.match(tenant_id):
+        raise ValueError("id do tenant deve ter só [a-z0-9_] (até 40 caracteres)")
+    db.execute(text("""
+        INSERT INTO tenants (id, nome, marca, prompt_sistema) VALUES (:id, :nome, :marca, :prompt)
+        ON CONFLICT (id) DO UPDATE SET nome = EXCLUDED.nome, marca = EXCLUDED.marca,
+                                       prompt_sistema = EXCLUDED.prompt_sistema, ativo = TRUE
+    """), {"id": tenant_id, "nome": nome, "marca": marca, "prompt": prompt_sistema})
+    # id validado acima: seguro interpolar no DDL
+    db.execute(text(
+        f"CREATE TABLE IF NOT EXISTS embeddings_tintas_{tenant_id} "
+        f"PARTITION OF embeddings_tintas FOR VALUES IN ('{tenant_id}') PARTITION BY LIST (versao)"
+    ))
+    db.commit()
+    carregar(db)
+    return _tenants[tenant_id]
+
+def get_tenant(
+    x_tenant: Optional[str] = Header(default=None),
+    credenciais: Optional[HTTPAuthorizationCredentials] = Depends(bearer),
+) -> TenantConfig:
+    """Dependência FastAPI: resolve o header ``X-Tenant``; com token, só o tenant do usuário."""
+    do_token = tenant_do_token(credenciais)
+    tenant_id = (x_tenant or do_token or settings.tenant_padrao).strip().lower()
+    if not _ID_VALIDO.match(tenant_id):
+        raise HTTPException(status_code=400, detail="X-Tenant inválido")
+    if do_token is not None and tenant_id != do_token:
+        # editor do tenant A não escreve no catálogo do tenant B trocando o header
+        raise HTTPException(status_code=403, detail="Token não pertence a este tenant")
+    db = SessionLocal()  # só abre conexão se o cache expirou
+    try:
+        return obter(db, tenant_id)
+    except TenantDesconhecido:
+        raise HTTPException(status_code=404, detail=f"Tenant '{tenant_id}' não encontrado")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Cadastra um tenant e cria sua partição de embeddings")
+    ap.add_argument("id")
+    ap.add_argument("--nome", required=True)
+    ap.add_argument("--marca", required=True)
+    ap.add_argument("--prompt", help="arquivo com o prompt de sistema do tenant")
+    args = ap.parse_args()
+
+    prompt = open(args.prompt, encoding="utf-8").read() if args.prompt else None
+    sessao = SessionLocal()
+    try:
+        print(criar(sessao, args.id, args.nome, args.marca, prompt))
+    finally:
+        sessao.close()
@@ -0,0 +1,40 @@
+# app/db/migracoes.py
+"""Aplica os scripts SQL de ``app/db/migracoes/`` em ordem, uma única vez cada.
+
+Roda no startup da API (ver ``app.main``) e também pode ser chamado à mão:
+    python -m app.db.migracoes
+Um advisory lock evita que vários workers apliquem a mesma migração juntos.
+"""
+from pathlib import Path
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+PASTA = Path(__file__).with_name("migracoes")
+_LOCK_ID = 7_410_001
+
+def _scripts() -> list[Path]:
+    return sorted(PASTA.glob("*.sql"))
+
+def aplicar_migracoes(engine: Engine) -> list[str]:
+    aplicadas: list[str] = []
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _LOCK_ID})
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migracoes (
+                versao TEXT PRIMARY KEY,
+                aplicada_em TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """))
+        feitas = set(conn.execute(text("SELECT versao FROM schema_migracoes")).scalars())
+        for script in _scripts():
+            if script.stem in feitas:
+                continue
+            # driver psycopg aceita vários comandos num único execute
+            conn.exec_driver_sql(script.read_text(encoding="utf-8"))
+            conn.execute(text("INSERT INTO schema_migracoes (versao) VALUES (:v)"), {"v": script.stem})
+            aplicadas.append(script.stem)
+    return aplicadas
+
+if __name__ == "__main__":
+    from app.db.session import engine
+    print(aplicar_migracoes(engine) or "Nenhuma migração pendente")
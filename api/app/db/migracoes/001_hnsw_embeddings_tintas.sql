@@ -0,0 +1,5 @@
+-- Índice ANN (HNSW, distância de cosseno) para a busca semântica.
+-- Sem ele o ORDER BY embedding <=> :v faz scan sequencial da tabela inteira.
+CREATE INDEX IF NOT EXISTS ix_embeddings_tintas_hnsw
+    ON embeddings_tintas USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
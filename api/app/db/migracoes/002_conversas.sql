@@ -0,0 +1,21 @@
+-- Memória de conversa do chat: resumo compacto + turnos.
+CREATE TABLE IF NOT EXISTS conversas (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    resumo TEXT NOT NULL DEFAULT '',
+    ultima_consulta TEXT NOT NULL DEFAULT '',
+    produtos_ids JSONB NOT NULL DEFAULT '[]'::jsonb,
+    total_turnos INTEGER NOT NULL DEFAULT 0,
+    criado_em TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    atualizado_em TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS conversa_turnos (
+    id BIGSERIAL PRIMARY KEY,
+    conversa_id UUID NOT NULL REFERENCES conversas(id) ON DELETE CASCADE,
+    papel VARCHAR(20) NOT NULL CHECK (papel IN ('usuario', 'assistente')),
+    conteudo TEXT NOT NULL,
+    produtos_ids JSONB NOT NULL DEFAULT '[]'::jsonb,
+    criado_em TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_conversa_turnos_conversa ON conversa_turnos (conversa_id, id DESC);
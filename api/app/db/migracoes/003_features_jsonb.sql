@@ -0,0 +1,17 @@
+-- features como jsonb indexado (GIN): filtros "features @> '{"sem_odor": true}'" usam o índice
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = 'tintas' AND column_name = 'features') <> 'jsonb' THEN
+        ALTER TABLE public.tintas ALTER COLUMN features TYPE jsonb USING features::jsonb;
+    END IF;
+END $$;
+
+UPDATE public.tintas SET features = '{}'::jsonb
+WHERE features IS NULL OR jsonb_typeof(features) <> 'object';
+
+ALTER TABLE public.tintas ALTER COLUMN features SET DEFAULT '{}'::jsonb;
+ALTER TABLE public.tintas ALTER COLUMN features SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_tintas_features_gin
+    ON public.tintas USING gin (features jsonb_path_ops);
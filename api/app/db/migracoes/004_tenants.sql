@@ -0,0 +1,56 @@
+-- Catálogos por tenant (marca/loja) num único deploy.
+-- tintas e conversas ganham a coluna tenant; embeddings_tintas passa a ser
+-- particionada por LIST (tenant), com um índice HNSW por partição: a busca de
+-- um tenant só varre a própria partição.
+CREATE TABLE IF NOT EXISTS tenants (
+    id VARCHAR(40) PRIMARY KEY CHECK (id ~ '^[a-z0-9_]+$'),
+    nome VARCHAR(255) NOT NULL,
+    marca VARCHAR(255) NOT NULL,
+    prompt_sistema TEXT,
+    ativo BOOLEAN NOT NULL DEFAULT TRUE,
+    criado_em TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+INSERT INTO tenants (id, nome, marca) VALUES ('suvinil', 'Suvinil', 'Suvinil')
+ON CONFLICT (id) DO NOTHING;
+
+ALTER TABLE tintas ADD COLUMN IF NOT EXISTS tenant VARCHAR(40) NOT NULL DEFAULT 'suvinil' REFERENCES tenants(id);
+CREATE INDEX IF NOT EXISTS ix_tintas_tenant ON tintas (tenant);
+
+ALTER TABLE conversas ADD COLUMN IF NOT EXISTS tenant VARCHAR(40) NOT NULL DEFAULT 'suvinil' REFERENCES tenants(id);
+
+-- embeddings_tintas -> tabela particionada (mesmas colunas + tenant)
+ALTER TABLE embeddings_tintas RENAME TO embeddings_tintas_legado;
+DROP INDEX IF EXISTS ix_embeddings_tintas_hnsw;
+-- o PK continua embeddings_tintas_pkey após o RENAME; liberado para a tabela nova
+DO $$
+DECLARE
+    pk text;
+BEGIN
+    SELECT conname INTO pk FROM pg_constraint
+    WHERE conrelid = 'embeddings_tintas_legado'::regclass AND contype = 'p';
+    IF pk IS NOT NULL THEN
+        EXECUTE 'ALTER TABLE embeddings_tintas_legado RENAME CONSTRAINT ' || quote_ident(pk)
+             || ' TO embeddings_tintas_legado_pkey';
+    END IF;
+END $$;
+
+CREATE TABLE embeddings_tintas (
+    tenant VARCHAR(40) NOT NULL,
+    LIKE embeddings_tintas_legado INCLUDING DEFAULTS,
+    CONSTRAINT embeddings_tintas_pkey PRIMARY KEY (tenant, tinta_id),
+    FOREIGN KEY (tinta_id) REFERENCES tintas(id) ON DELETE CASCADE
+) PARTITION BY LIST (tenant);
+
+CREATE TABLE embeddings_tintas_suvinil PARTITION OF embeddings_tintas FOR VALUES IN ('suvinil');
+
+INSERT INTO embeddings_tintas (tenant, tinta_id, embedding, conteudo, atualizado_em)
+SELECT t.tenant, l.tinta_id, l.embedding, l.conteudo, l.atualizado_em
+FROM embeddings_tintas_legado l
+JOIN tintas t ON t.id = l.tinta_id;
+
+DROP TABLE embeddings_tintas_legado;
+
+-- índice particionado: cada partição (atual e futuras) ganha seu próprio HNSW
+CREATE INDEX IF NOT EXISTS ix_embeddings_tintas_hnsw
+    ON embeddings_tintas USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
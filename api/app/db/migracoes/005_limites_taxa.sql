@@ -0,0 +1,8 @@
+-- Baldes do limite de taxa compartilhado entre workers (LIMITE_TAXA_BACKEND=postgres).
+-- UNLOGGED: estado descartável, sem custo de WAL a cada requisição.
+CREATE UNLOGGED TABLE IF NOT EXISTS limites_taxa (
+    chave TEXT PRIMARY KEY,
+    disponivel DOUBLE PRECISION NOT NULL,
+    permitido BOOLEAN NOT NULL DEFAULT TRUE,
+    atualizado_em TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
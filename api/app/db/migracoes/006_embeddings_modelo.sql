@@ -0,0 +1,32 @@
+-- Cada vetor guarda o modelo e a dimensão que o geraram (EMBEDDING_PROVEDOR
+-- openai ou local). A coluna embedding perde a dimensão fixa; cada dimensão
+-- ganha um HNSW parcial sobre embedding::vector(dim), e a busca filtra pelo
+-- modelo atual: vetores de provedores diferentes nunca são comparados.
+-- Vetores existentes vieram do modelo padrão até aqui (text-embedding-3-small).
+ALTER TABLE embeddings_tintas ADD COLUMN IF NOT EXISTS modelo VARCHAR(100);
+ALTER TABLE embeddings_tintas ADD COLUMN IF NOT EXISTS dim INTEGER;
+UPDATE embeddings_tintas SET modelo = 'text-embedding-3-small', dim = vector_dims(embedding) WHERE modelo IS NULL;
+ALTER TABLE embeddings_tintas ALTER COLUMN modelo SET NOT NULL, ALTER COLUMN dim SET NOT NULL;
+
+DROP INDEX IF EXISTS ix_embeddings_tintas_hnsw;
+ALTER TABLE embeddings_tintas ALTER COLUMN embedding TYPE vector;
+ALTER TABLE embeddings_tintas ADD CONSTRAINT ck_embeddings_tintas_dim CHECK (vector_dims(embedding) = dim);
+
+-- o mesmo produto pode ter vetores de vários modelos (troca de provedor sem apagar o índice atual)
+-- PK procurado pelo nome real (bancos migrados antes do nome explícito em 004 têm embeddings_tintas_pkey1)
+DO $$
+DECLARE
+    pk text;
+BEGIN
+    SELECT conname INTO pk FROM pg_constraint
+    WHERE conrelid = 'embeddings_tintas'::regclass AND contype = 'p';
+    IF pk IS NOT NULL THEN
+        EXECUTE 'ALTER TABLE embeddings_tintas DROP CONSTRAINT ' || quote_ident(pk);
+    END IF;
+END $$;
+ALTER TABLE embeddings_tintas ADD CONSTRAINT embeddings_tintas_pkey PRIMARY KEY (tenant, tinta_id, modelo);
+
+CREATE INDEX IF NOT EXISTS ix_embeddings_tintas_hnsw_1536
+    ON embeddings_tintas USING hnsw ((embedding::vector(1536)) vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64)
+    WHERE dim = 1536;
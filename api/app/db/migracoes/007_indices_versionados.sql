@@ -0,0 +1,95 @@
+-- Índice de embeddings versionado (blue/green) por tenant.
+-- embeddings_tintas passa a ser particionada por tenant e, dentro de cada
+-- tenant, por versão (emb_<tenant>_v<N>), cada versão com seus próprios HNSW.
+-- indice_ativo aponta a versão lida pela busca: reindexar = gravar numa versão
+-- nova, validar e trocar o ponteiro (UPDATE de uma linha).
+CREATE TABLE IF NOT EXISTS indices_embeddings (
+    versao SERIAL PRIMARY KEY,
+    tenant VARCHAR(40) NOT NULL REFERENCES tenants(id),
+    provedor VARCHAR(20) NOT NULL,
+    modelo VARCHAR(100) NOT NULL,
+    dim INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'construindo'
+        CHECK (status IN ('construindo', 'pronto', 'falhou')),
+    linhas INTEGER,
+    recall DOUBLE PRECISION,
+    criado_em TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    ativado_em TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS ix_indices_embeddings_tenant ON indices_embeddings (tenant);
+
+CREATE TABLE IF NOT EXISTS indice_ativo (
+    tenant VARCHAR(40) PRIMARY KEY REFERENCES tenants(id),
+    versao INTEGER NOT NULL REFERENCES indices_embeddings(versao),
+    ativado_em TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- vetores atuais viram a primeira versão de cada (tenant, modelo); a maior fica ativa
+INSERT INTO indices_embeddings (tenant, provedor, modelo, dim, status, linhas, ativado_em)
+SELECT tenant,
+       CASE WHEN starts_with(modelo, 'text-embedding-') THEN 'openai' ELSE 'local' END,
+       modelo, MIN(dim), 'pronto', COUNT(*), NOW()
+FROM embeddings_tintas
+GROUP BY tenant, modelo;
+
+INSERT INTO indice_ativo (tenant, versao)
+SELECT DISTINCT ON (tenant) tenant, versao
+FROM indices_embeddings
+ORDER BY tenant, linhas DESC
+ON CONFLICT (tenant) DO NOTHING;
+
+-- reconstrói embeddings_tintas com a subpartição por versão
+CREATE TEMP TABLE embeddings_tintas_copia ON COMMIT DROP AS SELECT * FROM embeddings_tintas;
+DROP TABLE embeddings_tintas;
+
+CREATE TABLE embeddings_tintas (
+    LIKE embeddings_tintas_copia,
+    versao INTEGER NOT NULL REFERENCES indices_embeddings(versao),
+    PRIMARY KEY (tenant, versao, tinta_id),
+    FOREIGN KEY (tinta_id) REFERENCES tintas(id) ON DELETE CASCADE,
+    CONSTRAINT ck_embeddings_tintas_dim CHECK (vector_dims(embedding) = dim)
+) PARTITION BY LIST (tenant);
+ALTER TABLE embeddings_tintas
+    ALTER COLUMN modelo SET NOT NULL,
+    ALTER COLUMN dim SET NOT NULL,
+    ALTER COLUMN embedding SET NOT NULL,
+    ALTER COLUMN atualizado_em SET DEFAULT NOW();
+
+DO $$
+DECLARE
+    t record;
+    v record;
+BEGIN
+    FOR t IN SELECT id FROM tenants LOOP
+        EXECUTE 'CREATE TABLE ' || quote_ident('embeddings_tintas_' || t.id)
+             || ' PARTITION OF embeddings_tintas FOR VALUES IN (' || quote_literal(t.id) || ')'
+             || ' PARTITION BY LIST (versao)';
+    END LOOP;
+    FOR v IN SELECT versao, tenant FROM indices_embeddings LOOP
+        EXECUTE 'CREATE TABLE ' || quote_ident('emb_' || v.tenant || '_v' || v.versao)
+             || ' PARTITION OF ' || quote_ident('embeddings_tintas_' || v.tenant)
+             || ' FOR VALUES IN (' || v.versao || ')';
+    END LOOP;
+END $$;
+
+INSERT INTO embeddings_tintas (tenant, versao, tinta_id, modelo, dim, embedding, conteudo, atualizado_em)
+SELECT c.tenant, i.versao, c.tinta_id, c.modelo, c.dim, c.embedding, c.conteudo, c.atualizado_em
+FROM embeddings_tintas_copia c
+JOIN indices_embeddings i ON i.tenant = c.tenant AND i.modelo = c.modelo;
+
+-- HNSW parcial por dimensão (criado depois da carga: build em lote)
+CREATE INDEX IF NOT EXISTS ix_embeddings_tintas_hnsw_1536
+    ON embeddings_tintas USING hnsw ((embedding::vector(1536)) vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64)
+    WHERE dim = 1536;
+
+DO $$
+DECLARE
+    d record;
+BEGIN
+    FOR d IN SELECT DISTINCT dim FROM indices_embeddings WHERE dim <> 1536 LOOP
+        EXECUTE 'CREATE INDEX IF NOT EXISTS ix_embeddings_tintas_hnsw_' || d.dim
+             || ' ON embeddings_tintas USING hnsw ((embedding::vector(' || d.dim || ')) vector_cosine_ops)'
+             || ' WITH (m = 16, ef_construction = 64) WHERE dim = ' || d.dim;
+    END LOOP;
+END $$;
@@ -0,0 +1,18 @@
+-- Trecho de prompt e payload de exibição pré-calculados por tinta
+-- (app/services/catalogo/apresentacao.py). Linhas antigas ficam NULL e são
+-- preenchidas no startup. atualizado_em passa a ser renovado por trigger,
+-- porque é a chave do cache em memória desses valores.
+ALTER TABLE tintas ADD COLUMN IF NOT EXISTS contexto_prompt TEXT;
+ALTER TABLE tintas ADD COLUMN IF NOT EXISTS exibicao JSONB;
+
+CREATE OR REPLACE FUNCTION tintas_renovar_atualizado_em() RETURNS trigger AS $$
+BEGIN
+    NEW.atualizado_em = clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tg_tintas_atualizado_em ON tintas;
+CREATE TRIGGER tg_tintas_atualizado_em
+    BEFORE UPDATE ON tintas
+    FOR EACH ROW EXECUTE FUNCTION tintas_renovar_atualizado_em();
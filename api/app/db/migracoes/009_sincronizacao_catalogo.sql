@@ -0,0 +1,24 @@
+-- Sincronização incremental do catálogo (app/services/ingestao/sincronizacao.py).
+-- catalogo_snapshot guarda, por tenant, a chave natural (nome|cor|linha) e o
+-- hash de cada linha do último arquivo importado: o próximo arquivo é
+-- comparado com ele e só inserções, alterações e ausências são aplicadas.
+CREATE TABLE IF NOT EXISTS catalogo_snapshot (
+    tenant VARCHAR(40) NOT NULL REFERENCES tenants(id),
+    chave TEXT NOT NULL,
+    hash CHAR(64) NOT NULL,
+    tinta_id UUID NOT NULL REFERENCES tintas(id) ON DELETE CASCADE,
+    importado_em TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (tenant, chave)
+);
+
+-- tintas cujo texto embedado mudou; consumida para a versão ativa do índice
+CREATE TABLE IF NOT EXISTS fila_embeddings (
+    tenant VARCHAR(40) NOT NULL REFERENCES tenants(id),
+    tinta_id UUID NOT NULL REFERENCES tintas(id) ON DELETE CASCADE,
+    enfileirado_em TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant, tinta_id)
+);
+
+-- produto que saiu do feed (política "marcar"): fica no cadastro, sai do índice
+ALTER TABLE tintas ADD COLUMN IF NOT EXISTS descontinuada_em TIMESTAMPTZ;
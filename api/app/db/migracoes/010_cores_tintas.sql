@@ -0,0 +1,6 @@
+-- Cor de cada tinta no espaço CIELAB (app/services/catalogo/cores.py).
+-- cor_hex: valor informado pelo feed ou pelo CRUD (hex ou RGB, normalizado
+-- para #rrggbb); cor_lab: [L, a, b] calculado na escrita a partir de cor_hex
+-- ou, sem ele, do nome da cor pelo dicionário local. NULL = nome desconhecido.
+ALTER TABLE tintas ADD COLUMN IF NOT EXISTS cor_hex VARCHAR(7);
+ALTER TABLE tintas ADD COLUMN IF NOT EXISTS cor_lab REAL[];
@@ -0,0 +1,6 @@
+-- Cada usuário pertence a um tenant (vai no claim "tenant" do JWT; X-Tenant de
+-- outro tenant é recusado) e cada conversa ao usuário que a começou (só ele lê
+-- ou continua). Conversas anteriores ficam sem dono e deixam de ser acessíveis.
+ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS tenant VARCHAR(40) NOT NULL DEFAULT 'suvinil' REFERENCES tenants(id);
+ALTER TABLE conversas ADD COLUMN IF NOT EXISTS usuario_id UUID REFERENCES usuarios(id) ON DELETE CASCADE;
+CREATE INDEX IF NOT EXISTS ix_conversas_usuario ON conversas (usuario_id);
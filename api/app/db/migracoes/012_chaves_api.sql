@@ -0,0 +1,8 @@
+-- Chaves de API de integração (X-API-Key). Só o SHA-256 da chave é guardado;
+-- chave desconhecida ou revogada não identifica o cliente (conta pelo JWT/IP).
+CREATE TABLE IF NOT EXISTS chaves_api (
+    hash CHAR(64) PRIMARY KEY,
+    nome VARCHAR(100) NOT NULL,
+    ativa BOOLEAN NOT NULL DEFAULT TRUE,
+    criada_em TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,9 @@
+#!/bin/bash
+# Roda uma vez, na criação do volume do primário (docker-entrypoint-initdb.d):
+# usuário de replicação e liberação no pg_hba para a réplica do compose.
+set -e
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" \
+     -v senha="$REPLICACAO_SENHA" <<'EOSQL'
+CREATE ROLE replicador WITH REPLICATION LOGIN PASSWORD :'senha';
+EOSQL
+echo "host replication replicador all scram-sha-256" >> "$PGDATA/pg_hba.conf"
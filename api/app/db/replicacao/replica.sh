@@ -0,0 +1,15 @@
+#!/bin/bash
+# Réplica física (streaming) do serviço db: no primeiro start copia o primário
+# com pg_basebackup -R (gera standby.signal e primary_conninfo) e depois sobe
+# em hot standby, só leitura. Tabelas, índices HNSW e migrações vêm do primário.
+set -e
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    export PGPASSWORD="$REPLICACAO_SENHA"
+    until pg_basebackup -h db -U replicador -D "$PGDATA" -R -X stream; do
+        echo "⚠️ Primário ainda não aceita replicação; tentando de novo em 2s"
+        rm -rf "${PGDATA:?}"/*
+        sleep 2
+    done
+    chmod 0700 "$PGDATA"
+fi
+exec postgres -c hot_standby=on
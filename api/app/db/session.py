@@ -1,6 +1,74 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+"""Sessões do banco: primário (escrita, indexação, migrações) e réplicas de leitura.
+
+``SessionLocal`` abre sempre no primário. ``SessionLeitura`` escolhe uma das
+réplicas de DATABASE_REPLICA_URLS em rodízio, desde que o atraso de replay
+medido seja no máximo REPLICA_LAG_MAX_S; sem réplica configurada, todas
+atrasadas ou fora do ar, cai no primário. O atraso de cada réplica é medido a
+cada REPLICA_VERIFICACAO_S pela thread de monitoramento (``app/core/saude.py``);
+as requisições só leem a última medida e, se ela estiver velha (monitor
+parado), tratam a réplica como indisponível.
+"""
+import itertools
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+from app.core import metricas
 from app.core.config import settings
 
 engine = create_engine(settings.database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# 0 quando tudo que chegou já foi aplicado (primário ocioso não conta como atraso)
+_SQL_LAG = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM clock_timestamp() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class Replica:
+    def __init__(self, url: str):
+        self.nome = make_url(url).host or url
+        self.engine = create_engine(url, pool_pre_ping=True, connect_args={"connect_timeout": 2})
+        self.fabrica = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.lag_s: Optional[float] = None
+        self.erro: Optional[str] = None
+        self.verificado_em = 0.0
+
+    def verificar(self) -> None:
+        try:
+            with self.engine.connect() as conn:
+                self.lag_s, self.erro = float(conn.execute(_SQL_LAG).scalar()), None
+            metricas.definir(f"db.replica.{self.nome}.lag_s", self.lag_s)
+        except Exception as e:
+            self.lag_s, self.erro = None, str(e).splitlines()[0][:200]
+            print(f"⚠️ Réplica {self.nome} indisponível: {self.erro}")
+        self.verificado_em = time.monotonic()
+
+    def disponivel(self) -> bool:
+        """Só a última medida (nunca consulta a réplica na requisição)."""
+        recente = time.monotonic() - self.verificado_em <= 3 * settings.replica_verificacao_s
+        return recente and self.lag_s is not None and self.lag_s <= settings.replica_lag_max_s
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "replica": self.nome, "disponivel": self.disponivel(), "lag_s": self.lag_s, "erro": self.erro,
+            "pool": self.engine.pool.status(),
+        }
+
+replicas: List[Replica] = [Replica(u.strip()) for u in settings.database_replica_urls.split(",") if u.strip()]
+_rodizio = itertools.count()
+
+def SessionLeitura() -> Session:
+    """Sessão para consultas que toleram até REPLICA_LAG_MAX_S de atraso (busca, chat, listagens)."""
+    if replicas:
+        inicio = next(_rodizio)
+        for i in range(len(replicas)):
+            replica = replicas[(inicio + i) % len(replicas)]
+            if replica.disponivel():
+                metricas.incrementar("db.leitura.replica")
+                return replica.fabrica()
+    metricas.incrementar("db.leitura.primario")
+    return SessionLocal()
@@ -1,12 +1,100 @@
-from fastapi import FastAPI
+import math
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from app.routers import auth, usuarios, tintas, busca
 from app.routers import chat  # ← IMPORT SEPARADO PARA EVITAR CONFLITO
+from app.routers import metricas, health
+from app.core.config import settings
+from app.core import chaves_api, saude, tenant
+from app.core.security import garantir_admin_inicial
+from app.core.contexto import MiddlewareCliente
+from app.db.migracoes import aplicar_migracoes
+from app.db.session import SessionLocal, engine
+from app.services.catalogo import apresentacao, autocompletar, cores
+from app.services.ia import normalizacao
+from app.services.ia.clientes import fechar_clientes
+from app.services.ia.governador import ErroUpstream, GovernadorSaturado
+from app.services.ia.provedores import aquecer, fechar_provedor
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.migrar_no_startup:
+        try:
+            aplicadas = aplicar_migracoes(engine)
+            if aplicadas:
+                print(f"🗄️ Migrações aplicadas: {', '.join(aplicadas)}")
+        except Exception as e:
+            # as migrações rodam numa transação só (nada fica pela metade), mas o código novo
+            # contra o schema antigo quebraria em SQL: melhor o orquestrador ver o worker cair
+            print(f"⚠️ Falha ao aplicar migrações: {str(e)}")
+            raise RuntimeError("Migrações não aplicadas; API não iniciada") from e
+    db = SessionLocal()
+    try:
+        if garantir_admin_inicial(db):
+            print(f"👤 Admin inicial criado: {settings.admin_email}")
+    except Exception as e:
+        print(f"⚠️ Admin inicial não criado: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+    db = SessionLocal()
+    try:
+        tenant.carregar(db)
+        chaves_api.carregar(db)
+        autocompletar.carregar(db)
+        normalizacao.carregar(db)
+    except Exception as e:
+        print(f"⚠️ Índice de autocompletar não carregado: {str(e)}")
+    finally:
+        db.close()
+    db = SessionLocal()
+    try:
+        preenchidas = apresentacao.preencher_faltantes(db)
+        if preenchidas:
+            print(f"🗂️ Apresentação pré-calculada para {preenchidas} tintas")
+    except Exception as e:
+        print(f"⚠️ Apresentação das tintas não pré-calculada: {str(e)}")
+    finally:
+        db.close()
+    db = SessionLocal()
+    try:
+        preenchidas = cores.preencher_faltantes(db)
+        if preenchidas:
+            print(f"🎨 Cor Lab calculada para {preenchidas} tintas")
+        cores.carregar(db)
+    except Exception as e:
+        print(f"⚠️ Índice de cores não carregado: {str(e)}")
+    finally:
+        db.close()
+    aquecer()
+    saude.iniciar_monitor()
+    yield
+    saude.parar_monitor()
+    # libera o pool keep-alive dos clientes OpenAI (criados sob demanda) e os workers do provedor local
+    fechar_clientes()
+    fechar_provedor()
 
 app = FastAPI(
     title="Assistente de Tintas API", 
     version="0.1.0",
-    description="API com IA para recomendação de tintas usando busca semântica"
+    description="API com IA para recomendação de tintas usando busca semântica",
+    lifespan=lifespan,
 )
+# identifica o cliente (X-API-Key cadastrada, usuário ou IP) para limite de taxa e custos
+app.add_middleware(MiddlewareCliente)
+
+# OpenAI fora do ar ou governador descartando carga: 503 (com Retry-After), não 500
+@app.exception_handler(GovernadorSaturado)
+async def governador_saturado(request: Request, e: GovernadorSaturado):
+    return JSONResponse(
+        status_code=503, content={"detail": str(e)},
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+    )
+
+@app.exception_handler(ErroUpstream)
+async def erro_upstream(request: Request, e: ErroUpstream):
+    return JSONResponse(status_code=503, content={"detail": str(e)})
 
 # Routers existentes
 app.include_router(auth.router)
@@ -16,6 +104,8 @@ app.include_router(busca.router)
 
 # 🤖 NOVO: Router do chat com IA
 app.include_router(chat.router)
+app.include_router(metricas.router)
+app.include_router(health.router)
 
 @app.get("/")
 def root():
@@ -25,6 +115,9 @@ def root():
             "docs": "/docs",
             "chat": "/chat/recomendar",
             "health": "/chat/health",
-            "busca": "/busca/recomendar"
+            "live": "/health/live",
+            "ready": "/health/ready",
+            "busca": "/busca/recomendar",
+            "metricas": "/metricas"
         }
     }
\ No newline at end of file
@@ -0,0 +1,26 @@
+import uuid
+from sqlalchemy import String, Text, Integer, BigInteger, ForeignKey, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class Conversa(Base):
+    __tablename__ = "conversas"
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    tenant: Mapped[str] = mapped_column(String(40), ForeignKey("tenants.id"))
+    usuario_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=True)
+    resumo: Mapped[str] = mapped_column(Text, default="")
+    ultima_consulta: Mapped[str] = mapped_column(Text, default="")
+    produtos_ids: Mapped[list] = mapped_column(JSONB, default=list)
+    total_turnos: Mapped[int] = mapped_column(Integer, default=0)
+    criado_em: Mapped[str] = mapped_column(server_default=text("NOW()"))
+    atualizado_em: Mapped[str] = mapped_column(server_default=text("NOW()"))
+
+class ConversaTurno(Base):
+    __tablename__ = "conversa_turnos"
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    conversa_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("conversas.id", ondelete="CASCADE"), index=True)
+    papel: Mapped[str] = mapped_column(String(20))
+    conteudo: Mapped[str] = mapped_column(Text)
+    produtos_ids: Mapped[list] = mapped_column(JSONB, default=list)
+    criado_em: Mapped[str] = mapped_column(server_default=text("NOW()"))
@@ -1,11 +1,17 @@
-from sqlalchemy import ForeignKey, text
+from sqlalchemy import String, ForeignKey, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
 
 class TintaEmbedding(Base):
     __tablename__ = "embeddings_tintas"
+    # particionada por LIST (tenant) e, em cada tenant, por LIST (versao); PK = (tenant, versao, tinta_id)
+    tenant: Mapped[str] = mapped_column(String(40), primary_key=True)
+    versao: Mapped[int] = mapped_column(primary_key=True)  # indices_embeddings.versao (007_indices_versionados.sql)
     tinta_id: Mapped[str] = mapped_column(UUID(as_uuid=True), ForeignKey("tintas.id"), primary_key=True)
-    embedding: Mapped[list[float]] = mapped_column("embedding", type_="vector(1536)")
+    modelo: Mapped[str] = mapped_column(String(100))
+    dim: Mapped[int] = mapped_column()
+    # sem dimensão fixa: HNSW parcial por dimensão (006_embeddings_modelo.sql)
+    embedding: Mapped[list[float]] = mapped_column("embedding", type_="vector")
     conteudo: Mapped[str] = mapped_column()
-    atualizado_em: Mapped[str] = mapped_column(server_default=text("NOW()"))
\ No newline at end of file
+    atualizado_em: Mapped[str] = mapped_column(server_default=text("NOW()"))
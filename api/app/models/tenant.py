@@ -0,0 +1,12 @@
+from sqlalchemy import String, Text, Boolean, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class Tenant(Base):
+    __tablename__ = "tenants"
+    id: Mapped[str] = mapped_column(String(40), primary_key=True)
+    nome: Mapped[str] = mapped_column(String(255))
+    marca: Mapped[str] = mapped_column(String(255))
+    prompt_sistema: Mapped[str | None] = mapped_column(Text, nullable=True)
+    ativo: Mapped[bool] = mapped_column(Boolean, default=True)
+    criado_em: Mapped[str] = mapped_column(server_default=text("NOW()"))
@@ -1,5 +1,6 @@
 import uuid
-from sqlalchemy import String, JSON, Enum, Boolean, Numeric, text
+from sqlalchemy import String, Enum, Boolean, Numeric, ForeignKey, Float, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 import enum
@@ -9,7 +10,7 @@ class Ambiente(str, enum.Enum):
     externo = "externo"
 
 class Acabamento(str, enum.Enum):
-    fosco = "fosco",0
+    fosco = "fosco"
     acetinado = "acetinado"
     semibrilho = "semibrilho"
     brilho = "brilho"
@@ -17,16 +18,24 @@ class Acabamento(str, enum.Enum):
 class Tinta(Base):
     __tablename__ = "tintas"
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    tenant: Mapped[str] = mapped_column(String(40), ForeignKey("tenants.id"), index=True)
     nome: Mapped[str] = mapped_column(String(255), index=True)
     cor: Mapped[str] = mapped_column(String(255), index=True)
     superficie_indicada: Mapped[str] = mapped_column(String(255), index=True)
     ambiente: Mapped[Ambiente] = mapped_column(Enum(Ambiente))
     acabamento: Mapped[Acabamento] = mapped_column(Enum(Acabamento))
-    features: Mapped[dict] = mapped_column(JSON, default=dict)
+    features: Mapped[dict] = mapped_column(JSONB, default=dict)  # GIN em 003_features_jsonb.sql
     linha: Mapped[str] = mapped_column(String(100), index=True)
     descricao: Mapped[str] = mapped_column(String, default="")
     rendimento_m2_litro: Mapped[float | None] = mapped_column(Numeric(10,2), nullable=True)
     resistencia_uv: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
     voc_baixo: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    # pré-calculados na escrita (008_apresentacao_tintas.sql, services/catalogo/apresentacao.py)
+    contexto_prompt: Mapped[str | None] = mapped_column(String, nullable=True)
+    exibicao: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # cor informada (#rrggbb) e [L, a, b] calculado na escrita (010_cores_tintas.sql, services/catalogo/cores.py)
+    cor_hex: Mapped[str | None] = mapped_column(String(7), nullable=True)
+    cor_lab: Mapped[list | None] = mapped_column(ARRAY(Float), nullable=True)
+    descontinuada_em: Mapped[str | None] = mapped_column(nullable=True)  # saiu do feed (009_sincronizacao_catalogo.sql)
     criado_em: Mapped[str] = mapped_column(server_default=text("NOW()"))
     atualizado_em: Mapped[str] = mapped_column(server_default=text("NOW()"))
\ No newline at end of file
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import String, Enum, text
+from sqlalchemy import String, Enum, ForeignKey, text
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 import enum
@@ -16,4 +16,5 @@ class Usuario(Base):
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     hash_senha: Mapped[str] = mapped_column(String(255))
     papel: Mapped[Papel] = mapped_column(Enum(Papel), default=Papel.leitor)
+    tenant: Mapped[str] = mapped_column(String(40), ForeignKey("tenants.id"))
     criado_em: Mapped[str] = mapped_column(server_default=text("NOW()"))
\ No newline at end of file
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.schemas.auth import LoginEntrada, TokenSaida
-from app.core.security import criar_token_jwt, verificar_senha
+from app.core.security import criar_token_jwt, verificar_senha_async
 from app.db.session import SessionLocal
 from app.models.usuario import Usuario
 
@@ -15,9 +16,15 @@ def get_db():
         db.close()
 
 @router.post("/login", response_model=TokenSaida)
-def login(dados: LoginEntrada, db: Session = Depends(get_db)):
-    user = db.query(Usuario).filter(Usuario.email == dados.email).first()
-    if not user or not verificar_senha(dados.senha, user.hash_senha):
+async def login(dados: LoginEntrada, db: Session = Depends(get_db)):
+    # rota async: consulta no threadpool e bcrypt no executor próprio, nada bloqueia o event loop
+    user = await run_in_threadpool(lambda: db.query(Usuario).filter(Usuario.email == dados.email).first())
+    ok, novo_hash = await verificar_senha_async(dados.senha, user.hash_senha if user else None)
+    if not ok:
         raise HTTPException(status_code=401, detail="Credenciais inválidas")
-    token = criar_token_jwt(str(user.id), user.papel.value)
-    return TokenSaida(access_token=token)
\ No newline at end of file
+    token = criar_token_jwt(str(user.id), user.papel.value, user.tenant)
+    if novo_hash:
+        # BCRYPT_ROUNDS mudou: regrava o hash com o custo atual
+        user.hash_senha = novo_hash
+        await run_in_threadpool(db.commit)
+    return TokenSaida(access_token=token)
@@ -1,33 +1,196 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import text
+import json
+import time
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
-from app.services.ia.embeddings import embed_texto
+from app.core import metricas
+from app.core.config import settings
+from app.core.limite_taxa import limitar
+from app.core.security import exigir_papel
+from app.core.tenant import TenantConfig, get_tenant
+from app.models.usuario import Papel
+from app.db.session import SessionLeitura
+from app.schemas.busca import BuscaCorSaida, BuscaSaida, LoteEntrada, SugestaoSaida
+from app.services.catalogo import autocompletar, cores
+from app.schemas.tinta import Acabamento, Ambiente
+from app.services.ia import normalizacao, versoes
+from app.services.ia.lote import para_ndjson, recomendar_lote
+from app.services.ia.recuperacao import Filtros, buscar
+from app.services.ia.singleflight import SingleFlight, chave_consulta
+from app.services.ia.texto import canonizar_features
 
 router = APIRouter(prefix="/busca", tags=["busca"])
+_voos = SingleFlight("busca")
 
-def get_db():
-    db = SessionLocal()
+def get_db_leitura():
+    db = SessionLeitura()  # réplica (ou primário, se atrasada): a busca só lê
     try:
         yield db
     finally:
         db.close()
 
-@router.get("/recomendar")
-def recomendar(q: str, limite: int = 5, db: Session = Depends(get_db)):
-    # Gera embedding do texto da consulta
-    v = embed_texto(q)
-    # Busca por similaridade (pgvector)
-    sql = text(
-        """
-        SELECT t.id, t.nome, t.cor, t.ambiente, t.acabamento, t.features, t.linha,
-               te.conteudo,
-               (1 - (te.embedding <=> :v)) AS score
-        FROM tintas t
-        JOIN tintas_embeddings te ON t.id = te.tinta_id
-        ORDER BY te.embedding <=> :v
-        LIMIT :limite
-        """
+def _produto(item: dict) -> dict:
+    """Item no formato de ProdutoBusca; o response_model valida e serializa a resposta inteira de uma vez."""
+    feats = item.get("features") or {}
+    if isinstance(feats, str):
+        feats = json.loads(feats)
+    return {
+        "id": str(item["id"]),
+        "nome": item["nome"],
+        "cor": item["cor"],
+        "ambiente": str(item["ambiente"]),
+        "acabamento": str(item["acabamento"]),
+        "linha": item.get("linha"),
+        "superficie_indicada": item.get("superficie_indicada"),
+        "features": feats,
+        "score": float(item["score"]),
+        "score_semantico": item.get("score_semantico"),
+        "outras_cores": item.get("outras_cores", []),
+        "delta_e": item.get("delta_e"),
+    }
+
+@router.get("/recomendar", response_model=BuscaSaida, dependencies=[Depends(limitar("busca"))])
+def recomendar(
+    response: Response,
+    q: str = Query(min_length=1, max_length=500),
+    limite: int = Query(5, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    ambiente: Optional[Ambiente] = None,
+    acabamento: Optional[Acabamento] = None,
+    linha: Optional[str] = None,
+    features: List[str] = Query(default=[]),
+    rerank: bool = True,
+    diversificar: Optional[bool] = None,
+    agrupar_cores: Optional[bool] = None,
+    db: Session = Depends(get_db_leitura),
+    tenant: TenantConfig = Depends(get_tenant),
+):
+    """Busca semântica sem LLM: embedding (com cache) + HNSW + filtros + re-ranking + diversidade.
+
+    ``diversificar`` (MMR) e ``agrupar_cores`` seguem BUSCA_MMR/BUSCA_AGRUPAR_CORES se omitidos;
+    ``agrupar_cores=false`` devolve cada cor como um item. Uma cor na consulta
+    ("azul mais claro", "#8fb3d9") aproxima os resultados dela (BUSCA_COR_PESO).
+    """
+    q = q.strip()
+    if not q:
+        # só espaços viraria consulta canônica vazia, e a OpenAI recusa embedding de texto vazio
+        raise HTTPException(status_code=422, detail="Consulta vazia")
+    if offset + limite > settings.busca_max_janela:
+        raise HTTPException(status_code=400, detail=f"offset + limite não pode passar de {settings.busca_max_janela}")
+    versao = versoes.ativa(db, tenant.id)
+    if versao is not None and not versao.get_provedor().disponivel():
+        raise HTTPException(status_code=503, detail="Provedor de embeddings indisponível")
+
+    inicio = time.perf_counter()
+    filtros = Filtros(
+        ambiente=ambiente.value if ambiente else None,
+        acabamento=acabamento.value if acabamento else None,
+        linha=linha,
+        features=sorted(canonizar_features(dict.fromkeys(features, True))),
     )
-    res = db.execute(sql, {"v": v, "limite": limite}).mappings().all()
-    return [{**r, "score": float(r["score"])} for r in res]
\ No newline at end of file
+    tempos: dict = {}
+    # forma canônica (grafia, abreviações, sinônimos): consultas equivalentes compartilham caches
+    canonica = normalizacao.canonizar_consulta(db, q, tenant.id)
+    # extraída do texto original: a forma canônica perde "#" e parênteses de hex/RGB
+    cor = (cores.extrair_cor(q) or cores.extrair_cor(canonica)) if settings.busca_cor_peso > 0 else None
+    # Consultas equivalentes simultâneas (do mesmo tenant) compartilham embedding + busca
+    chave = chave_consulta(
+        canonica, tenant=tenant.id, limite=limite, offset=offset, rerank=rerank, ambiente=filtros.ambiente,
+        acabamento=filtros.acabamento, linha=filtros.linha, features=tuple(filtros.features),
+        diversificar=diversificar, agrupar_cores=agrupar_cores, cor=cor.hex if cor else None,
+    )
+    itens = _voos.executar(chave, lambda: buscar(
+        db, canonica, limite, offset, filtros, rerank, tempos, tenant.id, diversificar, agrupar_cores, cor
+    ))
+
+    latencia = time.perf_counter() - inicio
+    metricas.observar("busca.recomendar", latencia)
+    if latencia * 1000 > settings.busca_slo_ms:
+        metricas.incrementar("busca.recomendar.acima_slo")
+    tempos["total"] = latencia * 1000
+    response.headers["Server-Timing"] = ", ".join(f"{k};dur={v:.1f}" for k, v in tempos.items())
+    return {
+        "consulta": q,
+        "consulta_canonica": canonica,
+        "cor_detectada": cor.hex if cor else None,
+        "limite": limite,
+        "offset": offset,
+        "itens": [_produto(i) for i in itens],
+        "latencia_ms": round(latencia * 1000, 2),
+    }
+
+@router.get("/cores", response_model=BuscaCorSaida)
+def tintas_por_cor(
+    cor: Optional[str] = Query(None, max_length=100),
+    tinta_id: Optional[str] = None,
+    limite: int = Query(10, ge=1, le=50),
+    ambiente: Optional[Ambiente] = None,
+    acabamento: Optional[Acabamento] = None,
+    linha: Optional[str] = None,
+    db: Session = Depends(get_db_leitura),
+    tenant: TenantConfig = Depends(get_tenant),
+):
+    """Tintas de cor mais próxima (ΔE no espaço Lab) sem embeddings nem LLM.
+
+    ``cor`` aceita hex ("#8fb3d9"), RGB ("143,179,217") ou nome ("azul claro");
+    ``tinta_id`` usa a cor dessa tinta ("outras cores parecidas com esta").
+    """
+    inicio = time.perf_counter()
+    idx = cores.indice_atual(db, tenant.id)
+    if tinta_id:
+        lab = idx.lab(tinta_id)
+        if lab is None:
+            raise HTTPException(status_code=404, detail="Tinta não encontrada ou sem cor reconhecida")
+        alvo = cores.Cor(lab=lab, hex=cores.lab_para_hex(lab), origem="tinta")
+    elif cor:
+        alvo = cores.interpretar(cor)
+        if alvo is None:
+            raise HTTPException(status_code=400, detail="Cor não reconhecida (use hex, RGB ou um nome de cor)")
+    else:
+        raise HTTPException(status_code=400, detail="Informe cor ou tinta_id")
+
+    with metricas.cronometro("busca.cores"):
+        filtros = {
+            "ambiente": ambiente.value if ambiente else None,
+            "acabamento": acabamento.value if acabamento else None,
+            "linha": linha,
+        }
+        vizinhas = idx.vizinhos(alvo.lab, limite, filtros, excluir=[tinta_id] if tinta_id else ())
+    return {
+        "consulta": cor or tinta_id,
+        "cor_hex": alvo.hex,
+        "lab": [round(c, 2) for c in alvo.lab],
+        "itens": vizinhas,
+        "latencia_ms": round((time.perf_counter() - inicio) * 1000, 2),
+    }
+
+@router.get("/autocompletar", response_model=List[SugestaoSaida])
+def sugerir(
+    q: str = Query(min_length=1, max_length=100),
+    limite: int = Query(8, ge=1, le=25),
+    campos: List[str] = Query(default=list(autocompletar.CAMPOS)),
+    db: Session = Depends(get_db_leitura),
+    tenant: TenantConfig = Depends(get_tenant),
+):
+    """Sugestões por prefixo (nome, cor, linha) sem chamar embeddings; alvo < 5 ms."""
+    idx = autocompletar.indice_atual(db, tenant.id)
+    with metricas.cronometro("busca.autocompletar"):
+        return idx.sugerir(q, limite, campos)
+
+@router.post("/lote", dependencies=[Depends(exigir_papel(Papel.admin, Papel.editor)), Depends(limitar("lote"))])
+def recomendar_em_lote(payload: LoteEntrada, tenant: TenantConfig = Depends(get_tenant)):
+    """Recomendação para muitas consultas de uma vez; resposta em NDJSON (uma linha por consulta)."""
+    consultas = [c.strip() for c in payload.consultas]
+    if len(consultas) > settings.lote_max_consultas:
+        raise HTTPException(status_code=413, detail=f"Máximo de {settings.lote_max_consultas} consultas por lote")
+
+    def gerar():
+        # sessão própria: a resposta é transmitida depois que as dependências já fecharam
+        db = SessionLeitura()
+        try:
+            yield from para_ndjson(recomendar_lote(db, consultas, payload.limite, payload.rerank, tenant=tenant.id))
+        finally:
+            db.close()
+
+    return StreamingResponse(gerar(), media_type="application/x-ndjson")
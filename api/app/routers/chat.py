@@ -1,12 +1,27 @@
 # app/routers/chat.py
+import threading
+import time
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
-from app.db.session import SessionLocal
+from typing import Optional, List, Dict, Any, Literal
+from app.core.config import settings
+from app.core.cotas import Cota, CotaExcedida
+from app.core.limite_taxa import limitar
+from app.core.security import UsuarioAutenticado, get_usuario_atual
+from app.core.tenant import TenantConfig, get_tenant
+from app.models.usuario import Papel
+from app.db.session import SessionLeitura, SessionLocal, replicas
+from app.schemas.busca import VarianteCor
 from app.services.ia.embeddings import recomendar_com_explicacao
+from app.services.ia.governador import ErroUpstream
+from app.services.ia.singleflight import SingleFlight, chave_consulta
+from app.services.catalogo import apresentacao
+from app.services.ia import conversas, normalizacao
 
 router = APIRouter(prefix="/chat", tags=["chat"])
+_voos = SingleFlight("chat")
+_cota = Cota("chat", por_minuto=settings.chat_cota_minuto, por_dia=settings.chat_cota_dia)
 
 def get_db():
     db = SessionLocal()
@@ -15,10 +30,25 @@ def get_db():
     finally:
         db.close()
 
+def get_db_leitura(db: Session = Depends(get_db)):
+    """Sessão para a recuperação de produtos; sem réplicas, reaproveita a do primário (uma conexão só)."""
+    if not replicas:
+        yield db
+        return
+    leitura = SessionLeitura()
+    try:
+        yield leitura
+    finally:
+        leitura.close()
+
 # Schemas
 class ChatRequest(BaseModel):
     mensagem: str
     limite_produtos: int = 3
+    # None = RESPOSTA_MODO; "template"/"llm" forçam o caminho
+    modo: Optional[Literal["auto", "template", "llm"]] = None
+    # id devolvido na resposta anterior; omitido = nova conversa
+    conversa_id: Optional[str] = None
 
 class ProdutoRecomendado(BaseModel):
     id: str
@@ -29,17 +59,33 @@ class ProdutoRecomendado(BaseModel):
     linha: Optional[str] = None
     score: Optional[float] = None
     superficie_indicada: Optional[str] = None
+    outras_cores: List[VarianteCor] = []
 
 class ChatResponse(BaseModel):
     resposta: str
     produtos_encontrados: List[ProdutoRecomendado]
+    conversa_id: Optional[str] = None
     debug_info: Optional[Dict[str, Any]] = None
 
-@router.post("/recomendar", response_model=ChatResponse)
+class TurnoConversa(BaseModel):
+    papel: str
+    conteudo: str
+    produtos_ids: List[str] = []
+
+class ConversaResponse(BaseModel):
+    id: str
+    resumo: str
+    produtos_ids: List[str]
+    turnos: List[TurnoConversa]
+
+@router.post("/recomendar", response_model=ChatResponse, dependencies=[Depends(limitar("chat"))])
 def chat_recomendacao(
     request: ChatRequest, 
     debug: bool = False,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    db_leitura: Session = Depends(get_db_leitura),
+    tenant: TenantConfig = Depends(get_tenant),
+    usuario: UsuarioAutenticado = Depends(get_usuario_atual)
 ):
     """🤖 Conselheiro Suvinil com IA
     
@@ -48,31 +94,79 @@ def chat_recomendacao(
         "mensagem": "preciso pintar meu quarto sem cheiro",
         "limite_produtos": 3
     }
+    Para continuar a conversa, envie o ``conversa_id`` devolvido na resposta.
+    O catálogo e o prompt vêm do header ``X-Tenant`` (padrão: TENANT_PADRAO).
+    Exige token (``Authorization: Bearer``); cada usuário tem cota por minuto/dia.
     """
     
     if not request.mensagem.strip():
         raise HTTPException(status_code=400, detail="Mensagem não pode estar vazia")
     
+    if usuario.papel != Papel.admin.value:
+        try:
+            _cota.consumir(usuario.id)
+        except CotaExcedida as e:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Cota de mensagens por {e.janela} excedida",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+    
+    # a conversa (histórico e novo turno) fica no primário; a recuperação de produtos vai para a réplica
+    conversa = None
+    if request.conversa_id:
+        try:
+            conversa = conversas.obter(db, request.conversa_id, tenant.id, usuario.id)
+        except conversas.ConversaNaoEncontrada:
+            raise HTTPException(status_code=404, detail="Conversa não encontrada")
+    
     try:
-        resultado = recomendar_com_explicacao(
-            db=db, 
-            consulta=request.mensagem.strip(), 
-            limite=request.limite_produtos
-        )
+        consulta = request.mensagem.strip()
+        if conversas.eh_follow_up(conversa, consulta):
+            # Follow-up: reaproveita produtos anteriores ou busca com a consulta contextualizada
+            consulta_busca = conversas.consulta_contextualizada(conversa, consulta)
+            resultado = recomendar_com_explicacao(
+                db=db_leitura,
+                consulta=consulta,
+                limite=request.limite_produtos,
+                modo=request.modo,
+                historico=conversas.montar_historico(db, conversa),
+                consulta_busca=consulta_busca,
+                produtos_previos=conversas.reaproveitar_produtos(db_leitura, conversa, consulta, request.limite_produtos),
+                tenant=tenant
+            )
+        elif conversa is not None:
+            consulta_busca = consulta
+            resultado = recomendar_com_explicacao(
+                db=db_leitura,
+                consulta=consulta,
+                limite=request.limite_produtos,
+                modo=request.modo,
+                historico=conversas.montar_historico(db, conversa),
+                tenant=tenant
+            )
+        else:
+            consulta_busca = consulta
+            # Mensagens equivalentes (mesma forma canônica) simultâneas compartilham embedding, busca e LLM
+            canonica = normalizacao.canonizar_consulta(db_leitura, consulta, tenant.id)
+            resultado = _voos.executar(
+                chave_consulta(canonica, tenant=tenant.id, limite=request.limite_produtos, modo=request.modo),
+                lambda: recomendar_com_explicacao(
+                    db=db_leitura,
+                    consulta=consulta, 
+                    consulta_busca=canonica,
+                    limite=request.limite_produtos,
+                    modo=request.modo,
+                    tenant=tenant
+                )
+            )
+        conversa = conversas.registrar_turno(db, conversa, consulta, consulta_busca, resultado, tenant.id, usuario.id)
         
-        # Converte produtos para schema
-        produtos_formatados = []
-        for produto in resultado["produtos_encontrados"]:
-            produtos_formatados.append(ProdutoRecomendado(
-                id=str(produto["id"]),
-                nome=produto["nome"],
-                cor=produto["cor"],
-                ambiente=produto["ambiente"],
-                acabamento=produto["acabamento"],
-                linha=produto.get("linha"),
-                score=produto.get("score"),
-                superficie_indicada=produto.get("superficie_indicada")
-            ))
+        # Payload pré-calculado (catalogo/apresentacao.py); o response_model valida e serializa de uma vez
+        produtos_formatados = [
+            {**apresentacao.exibicao(produto, produto.get("score")), "outras_cores": produto.get("outras_cores", [])}
+            for produto in resultado["produtos_encontrados"]
+        ]
         
         # Debug info
         debug_info = None
@@ -83,41 +177,81 @@ def chat_recomendacao(
                 "total_produtos": len(resultado["produtos_encontrados"]),
                 "modelo_embedding": resultado.get("modelo_embedding", "N/A"),
                 "modelo_llm": resultado.get("modelo_llm", "N/A"),
+                "modo_resposta": resultado.get("modo_resposta", "N/A"),
                 "status": resultado.get("status", "ok")
             }
         
-        return ChatResponse(
-            resposta=resultado["resposta"],
-            produtos_encontrados=produtos_formatados,
-            debug_info=debug_info
-        )
+        return {
+            "resposta": resultado["resposta"],
+            "produtos_encontrados": produtos_formatados,
+            "conversa_id": str(conversa.id),
+            "debug_info": debug_info,
+        }
         
+    except ErroUpstream:
+        raise  # 503 pelo handler do app (main.py)
     except Exception as e:
         print(f"❌ ERRO no chat: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro no recomendador: {str(e)}")
 
+@router.get("/conversas/{conversa_id}", response_model=ConversaResponse)
+def obter_conversa(
+    conversa_id: str,
+    db: Session = Depends(get_db),
+    tenant: TenantConfig = Depends(get_tenant),
+    usuario: UsuarioAutenticado = Depends(get_usuario_atual),
+):
+    """Resumo compacto e turnos de uma conversa (só do próprio usuário)"""
+    try:
+        conversa = conversas.obter(db, conversa_id, tenant.id, usuario.id)
+    except conversas.ConversaNaoEncontrada:
+        raise HTTPException(status_code=404, detail="Conversa não encontrada")
+    return ConversaResponse(
+        id=str(conversa.id),
+        resumo=conversa.resumo,
+        produtos_ids=list(conversa.produtos_ids or []),
+        turnos=[
+            TurnoConversa(papel=t.papel, conteudo=t.conteudo, produtos_ids=list(t.produtos_ids or []))
+            for t in conversas.listar_turnos(db, conversa)
+        ]
+    )
+
 @router.get("/health")
 def health_check():
     """Verifica se o serviço está funcionando"""
     return {"status": "ok", "service": "chat-recomendador-ia"}
 
-@router.get("/test-embeddings")
+_probe_lock = threading.Lock()
+_probe: Dict[str, Any] = {}
+
+@router.get("/test-embeddings", dependencies=[Depends(limitar("probe"))])
 def test_embeddings_connection():
-    """Testa se consegue gerar embeddings"""
+    """Testa se consegue gerar embeddings (resultado reaproveitado por HEALTH_CACHE_TTL_S)"""
+    # lock: probes simultâneos esperam o que está em andamento em vez de chamar a OpenAI de novo
+    with _probe_lock:
+        idade = time.monotonic() - _probe.get("em", float("-inf"))
+        if idade >= settings.health_cache_ttl_s:
+            _probe.update(resultado=_testar_embeddings(), em=time.monotonic())
+            idade = 0.0
+        return {**_probe["resultado"], "cache_idade_s": round(idade, 1)}
+
+def _testar_embeddings() -> Dict[str, Any]:
     try:
         from app.services.ia.embeddings import embed_texto
-        from app.core.config import settings
+        from app.services.ia.provedores import get_provedor
         
-        if not settings.openai_api_key:
-            return {"status": "error", "message": "OPENAI_API_KEY não configurada"}
+        provedor = get_provedor()
+        if not provedor.disponivel():
+            return {"status": "error", "message": f"Provedor de embeddings '{provedor.nome}' indisponível"}
         
         teste_embedding = embed_texto("teste de conexão")
         
         return {
             "status": "ok",
-            "openai_configurado": True,
+            "openai_configurado": bool(settings.openai_api_key),
+            "embedding_provedor": provedor.nome,
             "embedding_dimensoes": len(teste_embedding),
-            "embedding_modelo": settings.embedding_model
+            "embedding_modelo": provedor.modelo
         }
         
     except Exception as e:
@@ -125,7 +259,7 @@ def test_embeddings_connection():
 
 @router.get("/test-db")
 def test_database_connection(db: Session = Depends(get_db)):
-    """Testa conexão com banco e conta embeddings"""
+    """Testa conexão com banco e conta embeddings (COUNT(*): diagnóstico, não use como probe; ver /health/ready)"""
     try:
         from sqlalchemy import text
         
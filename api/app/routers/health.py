@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.orm import Session
+from app.core import saude
+from app.core.limite_taxa import limitar
+from app.core.security import exigir_papel
+from app.db.session import SessionLocal
+from app.models.usuario import Papel
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@router.get("/live")
+def live():
+    """Liveness: o processo responde (sem banco, sem rede)."""
+    return saude.vivo()
+
+@router.get("/ready")
+def ready(response: Response, db: Session = Depends(get_db)):
+    """Readiness: SELECT 1, linhas estimadas (pg_class) e último status da OpenAI; 503 se não pronto."""
+    resultado = saude.pronto(db)
+    if not resultado["pronto"]:
+        response.status_code = 503
+    return resultado
+
+@router.get(
+    "/diagnostico",
+    dependencies=[Depends(exigir_papel(Papel.admin)), Depends(limitar("diagnostico"))],
+)
+def diagnostico(db: Session = Depends(get_db)):
+    """Checagens completas sob demanda (COUNT(*) exato e embedding real); só admin."""
+    return saude.diagnostico(db)
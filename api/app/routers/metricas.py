@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from app.core import custos, metricas
+from app.core.security import exigir_papel
+from app.models.usuario import Papel
+
+# consumo por cliente e contadores internos: só admin
+router = APIRouter(prefix="/metricas", tags=["metricas"], dependencies=[Depends(exigir_papel(Papel.admin))])
+
+@router.get("/")
+def obter_metricas():
+    """Contadores, gauges e latências (p50/p95/p99) deste worker."""
+    return metricas.snapshot()
+
+@router.get("/custos")
+def obter_custos(limite: int = 50):
+    """Tokens e custo estimado (USD) por cliente deste worker, maiores primeiro (IPs pseudonimizados)."""
+    return custos.snapshot(limite)
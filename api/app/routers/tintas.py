@@ -1,10 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+import uuid
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from app.core.respostas import RespostaJSON
+from app.core.security import exigir_papel
+from app.core.tenant import TenantConfig, get_tenant
+from app.db.session import SessionLeitura, SessionLocal
 from app.schemas.tinta import TintaCriar, TintaEditar, TintaSaida
 from app.models.tinta import Tinta
+from app.models.usuario import Papel
+from app.services.catalogo import apresentacao, autocompletar, cores
+from app.services.ia import normalizacao, versoes
+from app.services.ia.texto import canonizar_features
+from app.services.ingestao.sincronizacao import processar_fila
 
 router = APIRouter(prefix="/tintas", tags=["tintas"])
+# escrita no catálogo: só admin/editor (leitura continua pública)
+_escrita = [Depends(exigir_papel(Papel.admin, Papel.editor))]
 
 def get_db():
     db = SessionLocal()
@@ -13,43 +25,135 @@ def get_db():
     finally:
         db.close()
 
-@router.post("/", response_model=TintaSaida)
-def criar_tinta(payload: TintaCriar, db: Session = Depends(get_db)):
-    tinta = Tinta(**payload.model_dump())
+def get_db_leitura():
+    # só a listagem: GET /{id} fica no primário para o editor ver o que acabou de gravar
+    db = SessionLeitura()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# listagem direto das linhas (sem hidratar ORM nem montar TintaSaida por linha), já no formato da saída
+_COLUNAS_SAIDA = """
+    t.id::text AS id, t.nome, t.cor, t.superficie_indicada, t.ambiente::text AS ambiente,
+    t.acabamento::text AS acabamento, t.features, t.linha, t.descricao,
+    t.rendimento_m2_litro::float8 AS rendimento_m2_litro, t.resistencia_uv, t.voc_baixo, t.cor_hex
+"""
+_SQL_LISTAR = text(f"SELECT {_COLUNAS_SAIDA} FROM tintas t WHERE t.tenant = :tenant AND t.descontinuada_em IS NULL")
+# mesmo produto (nome + linha) em todas as cores: expande um item agrupado da busca (services/ia/diversidade.py)
+_SQL_CORES = text(f"""
+    SELECT {_COLUNAS_SAIDA}
+    FROM tintas base
+    JOIN tintas t ON t.tenant = base.tenant AND lower(t.nome) = lower(base.nome)
+                 AND lower(COALESCE(t.linha, '')) = lower(COALESCE(base.linha, ''))
+    WHERE base.id = CAST(:tinta_id AS uuid) AND base.tenant = :tenant AND t.descontinuada_em IS NULL
+    ORDER BY t.cor
+""")
+
+def _saida(t: Tinta) -> dict:
+    """Dict no formato de TintaSaida; o response_model valida e serializa de uma vez."""
+    return {**{k: getattr(t, k) for k in TintaSaida.model_fields if k != 'id'}, "id": str(t.id)}
+
+def _cor(t: Tinta) -> None:
+    """cor_hex/cor_lab pré-calculados; hex inválido é erro do cliente."""
+    try:
+        cores.atualizar_tinta(t)
+    except ValueError as e:
+        raise HTTPException(422, f"cor_hex inválido: {e}")
+
+def _embedar_fila(tenant_id: str) -> None:
+    """Depois da resposta: embeda o que o CRUD enfileirou (falha fica na fila para ``--fila``)."""
+    db = SessionLocal()
+    try:
+        processar_fila(db, tenant_id)
+    except Exception as e:
+        print(f"⚠️ Fila de embeddings não processada: {str(e)}")
+    finally:
+        db.close()
+
+def _tinta_do_tenant(db: Session, tinta_id: str, tenant: TenantConfig):
+    """Tinta de outro tenant conta como inexistente (404)."""
+    t = db.get(Tinta, tinta_id)
+    return t if t is not None and t.tenant == tenant.id else None
+
+@router.post("/", response_model=TintaSaida, dependencies=_escrita)
+def criar_tinta(
+    payload: TintaCriar, tarefas: BackgroundTasks, db: Session = Depends(get_db),
+    tenant: TenantConfig = Depends(get_tenant),
+):
+    payload.features = canonizar_features(payload.features)
+    tinta = Tinta(tenant=tenant.id, **payload.model_dump())
+    apresentacao.atualizar_tinta(tinta)
+    _cor(tinta)
     db.add(tinta)
+    db.flush()
+    versoes.enfileirar(db, tenant.id, [tinta.id])  # sem isso só um reindex completo a levaria para a busca
     db.commit()
+    tarefas.add_task(_embedar_fila, tenant.id)
     db.refresh(tinta)
-    return TintaSaida(id=str(tinta.id), **payload.model_dump())
+    autocompletar.indice(tenant.id).atualizar(tinta.id, nome=tinta.nome, cor=tinta.cor, linha=tinta.linha)
+    normalizacao.vocabulario(tenant.id).adicionar(normalizacao.textos_tinta(tinta))
+    cores.indice(tenant.id).atualizar(tinta.id, tinta.cor_lab, cores.meta_tinta(tinta))
+    return _saida(tinta)
 
 @router.get("/", response_model=list[TintaSaida])
-def listar_tintas(db: Session = Depends(get_db)):
-    itens = db.query(Tinta).all()
-    return [TintaSaida(id=str(t.id), **{k: getattr(t, k) for k in TintaSaida.model_fields if k != 'id'}) for t in itens]
+def listar_tintas(db: Session = Depends(get_db_leitura), tenant: TenantConfig = Depends(get_tenant)):
+    linhas = db.execute(_SQL_LISTAR, {"tenant": tenant.id}).mappings()
+    return RespostaJSON([dict(l) for l in linhas])
 
 @router.get("/{tinta_id}", response_model=TintaSaida)
-def obter_tinta(tinta_id: str, db: Session = Depends(get_db)):
-    t = db.get(Tinta, tinta_id)
+def obter_tinta(tinta_id: str, db: Session = Depends(get_db), tenant: TenantConfig = Depends(get_tenant)):
+    t = _tinta_do_tenant(db, tinta_id, tenant)
     if not t:
         raise HTTPException(404, "Tinta não encontrada")
-    return TintaSaida(id=str(t.id), **{k: getattr(t, k) for k in TintaSaida.model_fields if k != 'id'})
+    return _saida(t)
 
-@router.patch("/{tinta_id}", response_model=TintaSaida)
-def editar_tinta(tinta_id: str, payload: TintaEditar, db: Session = Depends(get_db)):
-    t = db.get(Tinta, tinta_id)
+@router.get("/{tinta_id}/cores", response_model=list[TintaSaida])
+def listar_cores(tinta_id: str, db: Session = Depends(get_db_leitura), tenant: TenantConfig = Depends(get_tenant)):
+    try:
+        uuid.UUID(tinta_id)
+    except ValueError:
+        raise HTTPException(404, "Tinta não encontrada")
+    linhas = db.execute(_SQL_CORES, {"tinta_id": tinta_id, "tenant": tenant.id}).mappings().all()
+    if not linhas:
+        raise HTTPException(404, "Tinta não encontrada")
+    return RespostaJSON([dict(l) for l in linhas])
+
+@router.patch("/{tinta_id}", response_model=TintaSaida, dependencies=_escrita)
+def editar_tinta(
+    tinta_id: str, payload: TintaEditar, tarefas: BackgroundTasks, db: Session = Depends(get_db),
+    tenant: TenantConfig = Depends(get_tenant),
+):
+    t = _tinta_do_tenant(db, tinta_id, tenant)
     if not t:
         raise HTTPException(404, "Tinta não encontrada")
+    if payload.features is not None:
+        payload.features = canonizar_features(payload.features)
+    embedado = {c: getattr(t, c) for c in versoes.CAMPOS_EMBEDADOS}
     for k, v in payload.model_dump(exclude_unset=True).items():
         setattr(t, k, v)
+    apresentacao.atualizar_tinta(t)
+    _cor(t)
     db.add(t)
+    reembedar = any(getattr(t, c) != v for c, v in embedado.items())
+    if reembedar:
+        versoes.enfileirar(db, tenant.id, [t.id])
     db.commit()
+    if reembedar:
+        tarefas.add_task(_embedar_fila, tenant.id)
     db.refresh(t)
-    return TintaSaida(id=str(t.id), **{k: getattr(t, k) for k in TintaSaida.model_fields if k != 'id'})
+    autocompletar.indice(tenant.id).atualizar(t.id, nome=t.nome, cor=t.cor, linha=t.linha)
+    normalizacao.vocabulario(tenant.id).adicionar(normalizacao.textos_tinta(t))
+    cores.indice(tenant.id).atualizar(t.id, t.cor_lab, cores.meta_tinta(t))
+    return _saida(t)
 
-@router.delete("/{tinta_id}")
-def deletar_tinta(tinta_id: str, db: Session = Depends(get_db)):
-    t = db.get(Tinta, tinta_id)
+@router.delete("/{tinta_id}", dependencies=_escrita)
+def deletar_tinta(tinta_id: str, db: Session = Depends(get_db), tenant: TenantConfig = Depends(get_tenant)):
+    t = _tinta_do_tenant(db, tinta_id, tenant)
     if not t:
         raise HTTPException(404, "Tinta não encontrada")
     db.delete(t)
     db.commit()
+    autocompletar.indice(tenant.id).remover(tinta_id)
+    cores.indice(tenant.id).remover(tinta_id)
     return {"ok": True}
\ No newline at end of file
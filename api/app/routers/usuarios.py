@@ -1,9 +1,11 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app.schemas.usuario import UsuarioCriar, UsuarioSaida
 from app.models.usuario import Usuario, Papel
-from app.core.security import gerar_hash_senha
+from app.core.security import UsuarioAutenticado, gerar_hash_senha, get_usuario_opcional
+from app.core.tenant import TenantConfig, get_tenant
 
 router = APIRouter(prefix="/usuarios", tags=["usuarios"])
 
@@ -15,7 +17,18 @@ def get_db():
         db.close()
 
 @router.post("/", response_model=UsuarioSaida)
-def criar_usuario(payload: UsuarioCriar, db: Session = Depends(get_db)):
+def criar_usuario(
+    payload: UsuarioCriar,
+    db: Session = Depends(get_db),
+    autor: Optional[UsuarioAutenticado] = Depends(get_usuario_opcional),
+    tenant: TenantConfig = Depends(get_tenant),
+):
+    """Cadastro público cria leitores; editor/admin só com token de admin (do mesmo tenant).
+
+    O usuário pertence ao tenant do ``X-Tenant`` e só acessa esse catálogo com o token dele.
+    """
+    if payload.papel.value != Papel.leitor.value and (autor is None or autor.papel != Papel.admin.value):
+        raise HTTPException(status_code=403, detail="Só um admin pode conceder o papel editor ou admin")
     if db.query(Usuario).filter(Usuario.email == payload.email).first():
         raise HTTPException(status_code=400, detail="E-mail já cadastrado")
     usuario = Usuario(
@@ -23,6 +36,7 @@ def criar_usuario(payload: UsuarioCriar, db: Session = Depends(get_db)):
         email=payload.email,
         hash_senha=gerar_hash_senha(payload.senha),
         papel=payload.papel.value,
+        tenant=tenant.id,
     )
     db.add(usuario)
     db.commit()
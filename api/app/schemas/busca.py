@@ -0,0 +1,61 @@
+from pydantic import BaseModel, Field, StringConstraints
+from typing import Annotated, Any, Dict, List, Optional
+
+# consulta vazia ou só espaços custaria um embedding + uma busca ANN sem sentido
+Consulta = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=500)]
+
+class LoteEntrada(BaseModel):
+    consultas: List[Consulta] = Field(min_length=1)
+    limite: int = Field(default=5, ge=1, le=50)
+    rerank: bool = False
+
+class VarianteCor(BaseModel):
+    id: str
+    cor: str
+    score: Optional[float] = None
+
+class ProdutoBusca(BaseModel):
+    id: str
+    nome: str
+    cor: str
+    ambiente: str
+    acabamento: str
+    linha: Optional[str] = None
+    superficie_indicada: Optional[str] = None
+    features: Dict[str, Any] = {}
+    score: float
+    score_semantico: Optional[float] = None
+    # mesmo nome + linha em outras cores, agrupadas neste item (services/ia/diversidade.py)
+    outras_cores: List[VarianteCor] = []
+    delta_e: Optional[float] = None  # distância (CIE76) até a cor pedida na consulta, se houver
+
+class BuscaSaida(BaseModel):
+    consulta: str
+    consulta_canonica: Optional[str] = None  # texto efetivamente embedado (services/ia/normalizacao.py)
+    cor_detectada: Optional[str] = None  # "#rrggbb" da cor pedida (services/catalogo/cores.py)
+    limite: int
+    offset: int
+    itens: List[ProdutoBusca]
+    latencia_ms: float
+
+class CorProxima(BaseModel):
+    id: str
+    nome: str
+    cor: str
+    linha: Optional[str] = None
+    ambiente: str
+    acabamento: str
+    cor_hex: Optional[str] = None
+    delta_e: float
+
+class BuscaCorSaida(BaseModel):
+    consulta: str
+    cor_hex: str
+    lab: List[float]
+    itens: List[CorProxima]
+    latencia_ms: float
+
+class SugestaoSaida(BaseModel):
+    texto: str
+    campo: str
+    total_tintas: int
@@ -24,6 +24,7 @@ class TintaBase(BaseModel):
     rendimento_m2_litro: Optional[float] = None
     resistencia_uv: Optional[bool] = None
     voc_baixo: Optional[bool] = None
+    cor_hex: Optional[str] = None  # "#rrggbb" ou "r,g,b"; sem ele, a cor vem do nome pelo dicionário
 
 class TintaCriar(TintaBase):
     pass
@@ -40,6 +41,7 @@ class TintaEditar(BaseModel):
     rendimento_m2_litro: Optional[float] = None
     resistencia_uv: Optional[bool] = None
     voc_baixo: Optional[bool] = None
+    cor_hex: Optional[str] = None
 
 class TintaSaida(TintaBase):
     id: str
\ No newline at end of file
@@ -0,0 +1,117 @@
+# app/services/catalogo/apresentacao.py
+"""Trecho de prompt e payload de exibição de cada tinta, pré-calculados.
+
+Gerados na ingestão e no CRUD e gravados em ``tintas.contexto_prompt`` /
+``tintas.exibicao``; na leitura ficam num LRU em memória por
+(id, atualizado_em) — um trigger renova ``atualizado_em`` a cada UPDATE, então
+a chave muda sempre que a tinta muda. Na requisição, o contexto do LLM é só
+concatenação de strings e a resposta reaproveita o payload pronto, sem
+parse de ``features`` nem formatação por produto.
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core import metricas
+from app.core.config import settings
+from app.services.ia.rerank import _features_ativas
+
+CAMPOS_EXIBICAO = ("nome", "cor", "ambiente", "acabamento", "linha", "superficie_indicada")
+# sem esses campos o dicionário é parcial (ex.: fallback) e não pode alimentar o cache
+_CAMPOS_CONTEXTO = {"nome", "cor", "linha", "superficie_indicada", "ambiente", "acabamento", "features", "descricao"}
+
+def _valor(v: Any) -> Any:
+    return getattr(v, "value", v)  # enums do ORM -> str
+
+def calcular_contexto(t: Mapping[str, Any]) -> str:
+    """Bloco do produto no prompt (sem o número e o score, que dependem da consulta)."""
+    features = [k.replace('_', ' ').title() for k in sorted(_features_ativas(dict(t)))]
+    return f"""{t['nome']}
+- Cor: {t['cor']}
+- Linha: {t.get('linha', 'N/A')}
+- Superfície: {t.get('superficie_indicada', 'N/A')}
+- Ambiente: {_valor(t['ambiente'])}
+- Acabamento: {_valor(t['acabamento'])}
+- Features: {", ".join(features) if features else "N/A"}
+- Descrição: {t.get('descricao', 'N/A')}"""
+
+def calcular_exibicao(t: Mapping[str, Any]) -> Dict[str, Any]:
+    """Campos do produto na resposta da API (o id e o score entram na leitura)."""
+    return {c: _valor(t.get(c)) for c in CAMPOS_EXIBICAO}
+
+def precalcular(t: Mapping[str, Any]) -> Dict[str, Any]:
+    """Valores das colunas pré-calculadas, para INSERT/UPDATE."""
+    return {"contexto_prompt": calcular_contexto(t), "exibicao": calcular_exibicao(t)}
+
+def atualizar_tinta(tinta: Any) -> None:
+    """Recalcula as colunas de uma ``Tinta`` do ORM (CRUD), antes do commit."""
+    valores = precalcular({c: getattr(tinta, c) for c in _CAMPOS_CONTEXTO})
+    tinta.contexto_prompt = valores["contexto_prompt"]
+    tinta.exibicao = valores["exibicao"]
+
+# ---------- cache de leitura ----------
+_lock = threading.Lock()
+_cache: "OrderedDict[Tuple[str, str], Tuple[str, Dict[str, Any]]]" = OrderedDict()
+
+def obter(produto: Mapping[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """(contexto, exibição) do produto: cache -> colunas lidas junto -> cálculo."""
+    tinta_id = str(produto["id"])
+    versao = produto.get("atualizado_em")
+    chave = (tinta_id, str(versao))
+    if versao is not None:
+        with _lock:
+            item = _cache.get(chave)
+            if item is not None:
+                _cache.move_to_end(chave)
+        if item is not None:
+            metricas.incrementar("apresentacao.cache.hits")
+            return item
+    metricas.incrementar("apresentacao.cache.misses")
+
+    contexto = produto.get("contexto_prompt")
+    exibicao = produto.get("exibicao")
+    if isinstance(exibicao, str):
+        exibicao = json.loads(exibicao)
+    if contexto is None or exibicao is None:
+        contexto, exibicao = calcular_contexto(produto), calcular_exibicao(produto)
+        if not _CAMPOS_CONTEXTO.issubset(produto.keys()):
+            versao = None  # dicionário parcial (ex.: fallback): calcula, mas não guarda
+    item = (contexto, {"id": tinta_id, **exibicao})
+    if versao is not None:
+        with _lock:
+            _cache[chave] = item
+            while len(_cache) > settings.apresentacao_cache_tamanho:
+                _cache.popitem(last=False)
+    return item
+
+def contexto(produto: Mapping[str, Any]) -> str:
+    return obter(produto)[0]
+
+def exibicao(produto: Mapping[str, Any], score: Optional[float] = None) -> Dict[str, Any]:
+    return {**obter(produto)[1], "score": score}
+
+def preencher_faltantes(db: Session, tamanho_bloco: int = 500) -> int:
+    """Calcula as colunas das tintas que ainda não as têm (linhas anteriores à migração)."""
+    total = 0
+    while True:
+        linhas = db.execute(text("""
+            SELECT id::text AS id, nome, cor, linha, superficie_indicada, ambiente::text AS ambiente,
+                   acabamento::text AS acabamento, features, descricao
+            FROM tintas WHERE contexto_prompt IS NULL LIMIT :n
+        """), {"n": tamanho_bloco}).mappings().all()
+        if not linhas:
+            return total
+        db.execute(text("""
+            UPDATE tintas SET contexto_prompt = :contexto_prompt, exibicao = CAST(:exibicao AS jsonb)
+            WHERE id = CAST(:id AS uuid)
+        """), [{"id": l["id"], **parametros_sql(l)} for l in linhas])
+        db.commit()
+        total += len(linhas)
+
+def parametros_sql(t: Mapping[str, Any]) -> Dict[str, Any]:
+    """``precalcular`` com a exibição serializada, para ``CAST(:exibicao AS jsonb)``."""
+    valores = precalcular(t)
+    return {"contexto_prompt": valores["contexto_prompt"],
+            "exibicao": json.dumps(valores["exibicao"], ensure_ascii=False)}
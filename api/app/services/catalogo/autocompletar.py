@@ -0,0 +1,147 @@
+# app/services/catalogo/autocompletar.py
+"""Índice de prefixos em memória para o autocompletar (nome, cor e linha).
+
+Cada termo é indexado a partir de cada palavra ("Suvinil Toque de Seda" casa
+com "sto", "toq" e "sed"), normalizado com ``_ascii`` (sem acento/caixa).
+As chaves ficam num array ordenado: a consulta é um ``bisect`` + varredura
+contígua, sem embedding. O índice é montado no startup, atualizado pelo CRUD
+de tintas e reconstruído em segundo plano após AUTOCOMPLETAR_TTL_S (outros
+workers/ingestão; ver ``core/recarga.py``). Cada tenant tem seu próprio índice.
+"""
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core import recarga
+from app.core.config import settings
+from app.services.ia.texto import _ascii
+
+CAMPOS = ("nome", "cor", "linha")
+_PRIORIDADE = {c: i for i, c in enumerate(CAMPOS)}
+
+Termo = Tuple[str, str]  # (campo, texto exibido)
+
+def _normalizar(v: str) -> str:
+    return " ".join(_ascii(v).split())
+
+def _chaves(termo: str) -> List[str]:
+    palavras = _normalizar(termo).split(" ")
+    return [" ".join(palavras[i:]) for i in range(len(palavras)) if palavras[i]]
+
+class IndicePrefixos:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas: List[Tuple[str, str, str]] = []  # (chave, campo, texto) ordenado
+        self._tintas: Dict[Termo, Set[str]] = {}
+        self._por_tinta: Dict[str, List[Termo]] = {}
+        self.construido_em: Optional[float] = None
+
+    # ---------- escrita ----------
+    def _adicionar_termo(self, termo: Termo, tinta_id: str) -> None:
+        ids = self._tintas.setdefault(termo, set())
+        if not ids:
+            campo, texto = termo
+            for chave in _chaves(texto):
+                bisect.insort(self._entradas, (chave, campo, texto))
+        ids.add(tinta_id)
+
+    def _remover_termo(self, termo: Termo, tinta_id: str) -> None:
+        ids = self._tintas.get(termo)
+        if not ids:
+            return
+        ids.discard(tinta_id)
+        if ids:
+            return
+        del self._tintas[termo]
+        campo, texto = termo
+        for chave in _chaves(texto):
+            i = bisect.bisect_left(self._entradas, (chave, campo, texto))
+            if i < len(self._entradas) and self._entradas[i] == (chave, campo, texto):
+                del self._entradas[i]
+
+    def atualizar(self, tinta_id: str, **valores: Optional[str]) -> None:
+        """Insere ou substitui os termos de uma tinta (CRUD incremental)."""
+        tinta_id = str(tinta_id)
+        novos = [(c, valores[c].strip()) for c in CAMPOS if valores.get(c) and valores[c].strip()]
+        with self._lock:
+            for termo in self._por_tinta.pop(tinta_id, []):
+                self._remover_termo(termo, tinta_id)
+            for termo in novos:
+                self._adicionar_termo(termo, tinta_id)
+            self._por_tinta[tinta_id] = novos
+
+    def remover(self, tinta_id: str) -> None:
+        tinta_id = str(tinta_id)
+        with self._lock:
+            for termo in self._por_tinta.pop(tinta_id, []):
+                self._remover_termo(termo, tinta_id)
+
+    def reconstruir(self, linhas: Iterable[dict]) -> None:
+        tintas: Dict[Termo, Set[str]] = {}
+        por_tinta: Dict[str, List[Termo]] = {}
+        for l in linhas:
+            tinta_id = str(l["id"])
+            termos = [(c, str(l[c]).strip()) for c in CAMPOS if l.get(c) and str(l[c]).strip()]
+            por_tinta[tinta_id] = termos
+            for termo in termos:
+                tintas.setdefault(termo, set()).add(tinta_id)
+        entradas = sorted((chave, campo, texto) for (campo, texto) in tintas for chave in _chaves(texto))
+        with self._lock:
+            self._entradas, self._tintas, self._por_tinta = entradas, tintas, por_tinta
+            self.construido_em = time.monotonic()
+
+    # ---------- leitura ----------
+    def sugerir(self, prefixo: str, limite: int = 8, campos: Iterable[str] = CAMPOS) -> List[dict]:
+        p = _normalizar(prefixo)
+        if not p:
+            return []
+        campos = set(campos)
+        achados: Dict[Termo, bool] = {}
+        with self._lock:
+            i = bisect.bisect_left(self._entradas, (p,))
+            while i < len(self._entradas) and len(achados) < limite * 4:
+                chave, campo, texto = self._entradas[i]
+                if not chave.startswith(p):
+                    break
+                if campo in campos:
+                    # True = casou no começo do termo (ranqueia antes)
+                    inicio = chave == _normalizar(texto)
+                    achados[(campo, texto)] = achados.get((campo, texto), False) or inicio
+                i += 1
+            ranqueados = sorted(
+                achados.items(),
+                key=lambda kv: (not kv[1], _PRIORIDADE[kv[0][0]], -len(self._tintas.get(kv[0], ())), kv[0][1]),
+            )
+            return [
+                {"texto": texto, "campo": campo, "total_tintas": len(self._tintas.get((campo, texto), ()))}
+                for (campo, texto), _ in ranqueados[:limite]
+            ]
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+_indices: Dict[str, IndicePrefixos] = {}
+_indices_lock = threading.Lock()
+
+def indice(tenant: str) -> IndicePrefixos:
+    """Índice do catálogo do tenant (um por tenant: sugestões nunca se misturam)."""
+    with _indices_lock:
+        return _indices.setdefault(tenant, IndicePrefixos())
+
+def carregar(db: Session, tenant: Optional[str] = None) -> None:
+    """Reconstrói o índice de um tenant ou, sem ``tenant``, de todos (startup)."""
+    sql = "SELECT tenant, id::text AS id, nome, cor, linha FROM tintas WHERE descontinuada_em IS NULL"
+    linhas = db.execute(text(sql + (" AND tenant = :tenant" if tenant else "")), {"tenant": tenant}).mappings().all()
+    por_tenant: Dict[str, List[dict]] = {tenant: []} if tenant else {}
+    for l in linhas:
+        por_tenant.setdefault(l["tenant"], []).append(l)
+    for t, itens in por_tenant.items():
+        indice(t).reconstruir(itens)
+
+def indice_atual(db: Session, tenant: str) -> IndicePrefixos:
+    """Índice do tenant; após AUTOCOMPLETAR_TTL_S é relido em segundo plano (a requisição não espera)."""
+    idx = indice(tenant)
+    recarga.se_expirado("autocompletar", idx, settings.autocompletar_ttl_s, db, tenant, carregar)
+    return idx
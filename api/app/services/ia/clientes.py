@@ -0,0 +1,51 @@
+# app/services/ia/clientes.py
+"""Fábricas preguiçosas dos clientes HTTP/OpenAI.
+
+O SDK da OpenAI custa ~0,3s só para importar; por isso nada aqui é criado
+no import do módulo. O primeiro uso constrói o cliente e os seguintes
+reaproveitam a mesma instância (e o mesmo pool de conexões keep-alive).
+"""
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import OpenAI
+
+@lru_cache(maxsize=1)
+def get_http_client() -> "httpx.Client":
+    """Pool httpx compartilhado (keep-alive) usado por todos os clientes OpenAI."""
+    import httpx
+
+    limites = httpx.Limits(
+        max_connections=settings.openai_max_conexoes,
+        max_keepalive_connections=settings.openai_max_keepalive,
+        keepalive_expiry=settings.openai_keepalive_s,
+    )
+    return httpx.Client(
+        limits=limites,
+        timeout=httpx.Timeout(settings.openai_timeout_s, connect=5.0),
+    )
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> Optional["OpenAI"]:
+    """Cliente OpenAI compartilhado; ``None`` quando OPENAI_API_KEY não está definida."""
+    if not settings.openai_api_key:
+        return None
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=settings.openai_api_key,
+        http_client=get_http_client(),
+        timeout=settings.openai_timeout_s,
+        # retentativas ficam com o governador (respeita Retry-After e prazos)
+        max_retries=0,
+    )
+
+def fechar_clientes() -> None:
+    """Fecha o pool HTTP (chamado no shutdown da aplicação)."""
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+    get_openai_client.cache_clear()
+    get_http_client.cache_clear()
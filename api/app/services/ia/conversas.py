@@ -0,0 +1,197 @@
+# app/services/ia/conversas.py
+"""Memória de conversa do chat (multi-turno) guardada no Postgres.
+
+Cada conversa mantém um resumo compacto (sem LLM: consultas e produtos
+indicados, truncado em CONVERSA_RESUMO_MAX_CHARS), os ids dos últimos
+produtos recuperados e os turnos completos. O prompt usa só o resumo e os
+últimos CONVERSA_TURNOS_PROMPT turnos, então o tamanho fica limitado não
+importa quantos turnos a conversa tenha.
+"""
+import uuid
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.conversa import Conversa, ConversaTurno
+from app.services.catalogo.cores import PALAVRAS as PALAVRAS_COR
+from app.services.ia.rerank import STOPWORDS, extrair_intencao
+from app.services.ia.texto import ACABAMENTOS, AMBIENTES, FEATURES
+from app.services.ia import versoes
+
+# palavras que indicam referência ao que já foi falado ("e na cor azul?", "essa serve?")
+_REFERENCIAS = {"essa", "esse", "dessa", "desse", "nessa", "nesse", "ela", "ele", "mesma", "mesmo",
+                "outra", "outro", "tambem", "cor", "tom", "tons", "e"}
+# retomam os produtos anteriores em qualquer posição ("alguma delas é lavável?")
+_ANAFORAS = {"delas", "deles", "dessas", "desses", "nelas", "neles", "anterior", "anteriores", "primeira",
+             "primeiro", "segunda", "segundo", "ultima", "ultimo", "opcao", "opcoes", "indicada", "indicadas"}
+# comparativos no início ("mais barata?", "melhor pra fora?")
+_COMPARATIVOS = {"mais", "menos", "melhor", "pior"}
+# termos que não identificam cor quando o follow-up pede variante
+_NAO_COR = STOPWORDS | _REFERENCIAS | {"na", "no", "em", "tem", "existe", "ha", "mais", "clara", "escura", "claro", "escuro"}
+# só refinam a busca anterior (cor, ambiente, acabamento, feature); "piscina", "esmalte", "ferro" não
+_ATRIBUTOS = _NAO_COR | PALAVRAS_COR | {
+    w for tabela in (AMBIENTES, ACABAMENTOS, FEATURES) for c, ss in tabela.items()
+    for s in (*ss, c.replace("_", " ")) for w in s.split()
+}
+
+_COLUNAS = """
+    t.id::text as id, t.nome, t.cor, t.ambiente, t.acabamento,
+    t.features, t.linha, t.descricao, t.superficie_indicada,
+    t.atualizado_em, t.contexto_prompt, t.exibicao::text AS exibicao,
+    te.conteudo
+"""
+
+class ConversaNaoEncontrada(LookupError):
+    pass
+
+def obter(db: Session, conversa_id: str, tenant: str, usuario_id: str) -> Conversa:
+    """Conversa do usuário no tenant (de outro usuário ou tenant conta como inexistente)."""
+    try:
+        conversa = db.get(Conversa, uuid.UUID(str(conversa_id)))
+    except ValueError:
+        conversa = None
+    if not conversa or conversa.tenant != tenant or str(conversa.usuario_id) != str(usuario_id):
+        raise ConversaNaoEncontrada(conversa_id)
+    return conversa
+
+def eh_follow_up(conversa: Optional[Conversa], mensagem: str) -> bool:
+    """Mensagem que se refere à rodada anterior numa conversa que já recuperou produtos.
+
+    Precisa de uma referência ("e na cor azul?", "essa serve?"), anáfora ("alguma delas")
+    ou comparativo ("mais barata?"); sem pista, só conta mensagem curta feita apenas de
+    atributos ("azul?", "fosco"). "tinta para piscina" é assunto novo.
+    """
+    if not conversa or not conversa.produtos_ids:
+        return False
+    intencao = extrair_intencao(mensagem)
+    termos = intencao["slug"].split("_")
+    if _REFERENCIAS & set(termos[:2]) or _COMPARATIVOS & set(termos[:1]) or _ANAFORAS & set(termos):
+        return True
+    return 0 < len(intencao["termos"]) <= 3 and all(t in _ATRIBUTOS for t in intencao["termos"])
+
+def consulta_contextualizada(conversa: Conversa, mensagem: str) -> str:
+    """Texto usado para embedding em follow-ups: última consulta + mensagem nova."""
+    base = (conversa.ultima_consulta or "")[-300:]
+    return f"{base} {mensagem}".strip()
+
+def _carregar_produtos(
+    db: Session, tenant: str, ids: List[str], extra_sql: str = "", params: Optional[dict] = None,
+    ordem_sql: str = "",
+) -> List[Dict]:
+    """Tintas ``ids`` na ordem de ``ids``; com ``extra_sql``, as linhas que ele seleciona, na ordem de ``ordem_sql``."""
+    if not ids:
+        return []
+    sql = text(f"""
+        SELECT {_COLUNAS}
+        FROM tintas t
+        LEFT JOIN embeddings_tintas te ON te.tenant = t.tenant AND t.id = te.tinta_id AND te.versao = :versao
+        WHERE t.tenant = :tenant AND t.descontinuada_em IS NULL
+          AND {extra_sql or "t.id = ANY(CAST(:ids AS uuid[]))"}
+        {f"ORDER BY {ordem_sql}" if ordem_sql else ""}
+    """)
+    versao = versoes.ativa(db, tenant)
+    params = {"ids": ids, "tenant": tenant, "versao": versao.versao if versao else None, **(params or {})}
+    linhas = [dict(l) for l in db.execute(sql, params).mappings()]
+    if extra_sql:
+        return linhas
+    por_id = {str(l["id"]): l for l in linhas}
+    return [por_id[i] for i in ids if i in por_id]
+
+def reaproveitar_produtos(db: Session, conversa: Conversa, mensagem: str, limite: int) -> Optional[List[Dict]]:
+    """Produtos da rodada anterior que ainda atendem o follow-up (sem novo embedding).
+
+    - ambiente/acabamento citados filtram os produtos anteriores;
+    - termos restantes (ex.: "azul") buscam variantes de cor dos mesmos produtos.
+    Devolve ``None`` quando nada anterior se aplica e é preciso buscar de novo.
+    """
+    anteriores = _carregar_produtos(db, conversa.tenant, list(conversa.produtos_ids or []))
+    if not anteriores:
+        return None
+    intencao = extrair_intencao(mensagem)
+    for campo in ("ambiente", "acabamento"):
+        if intencao[campo]:
+            anteriores = [p for p in anteriores if str(p.get(campo)) == intencao[campo]]
+    if not anteriores:
+        return None
+
+    cores = [t for t in intencao["termos"] if t not in _NAO_COR and len(t) > 2]
+    if cores:
+        variantes = _carregar_produtos(
+            db, conversa.tenant, [p["id"] for p in anteriores],
+            extra_sql="""lower(t.nome) IN (SELECT lower(nome) FROM tintas WHERE tenant = :tenant AND id = ANY(CAST(:ids AS uuid[])))
+                         AND translate(lower(t.cor), 'áàâãéêíóôõúç', 'aaaaeeiooouc') LIKE ANY(:cores)""",
+            params={"cores": [f"%{c}%" for c in cores]},
+            # variantes na ordem em que o produto de origem foi recomendado
+            ordem_sql="""(SELECT MIN(array_position(CAST(:ids AS uuid[]), o.id)) FROM tintas o
+                          WHERE o.tenant = :tenant AND lower(o.nome) = lower(t.nome)
+                            AND o.id = ANY(CAST(:ids AS uuid[]))), t.cor""",
+        )
+        return variantes[:limite] or None
+    return anteriores[:limite]
+
+def montar_historico(db: Session, conversa: Optional[Conversa]) -> str:
+    """Resumo + últimos turnos, ambos truncados (tamanho de prompt limitado)."""
+    if not conversa or not conversa.total_turnos:
+        return ""
+    turnos = (
+        db.query(ConversaTurno)
+        .filter(ConversaTurno.conversa_id == conversa.id)
+        .order_by(ConversaTurno.id.desc())
+        .limit(settings.conversa_turnos_prompt)
+        .all()
+    )
+    max_turno = settings.conversa_turno_max_chars
+    linhas = [
+        f"{'Cliente' if t.papel == 'usuario' else 'Conselheiro'}: {t.conteudo[:max_turno]}"
+        for t in reversed(turnos)
+    ]
+    partes = []
+    if conversa.resumo:
+        partes.append(f"RESUMO: {conversa.resumo}")
+    partes.append("\n".join(linhas))
+    return "\n".join(partes)
+
+def _atualizar_resumo(resumo: str, mensagem: str, produtos: List[Dict]) -> str:
+    indicado = produtos[0]["nome"] if produtos else "nenhum produto"
+    novo = f"{resumo} | pediu: {mensagem[:120]} -> {indicado}".strip(" |")
+    # rolling: descarta o começo quando passa do limite
+    limite = settings.conversa_resumo_max_chars
+    return novo if len(novo) <= limite else "…" + novo[-(limite - 1):]
+
+def registrar_turno(
+    db: Session,
+    conversa: Optional[Conversa],
+    mensagem: str,
+    consulta_busca: str,
+    resultado: Dict[str, Any],
+    tenant: Optional[str] = None,
+    usuario_id: Optional[str] = None,
+) -> Conversa:
+    """Grava pergunta + resposta e atualiza resumo/produtos da conversa (nova: do ``usuario_id``)."""
+    if conversa is None:
+        conversa = Conversa(
+            tenant=tenant or settings.tenant_padrao, usuario_id=uuid.UUID(usuario_id) if usuario_id else None,
+            resumo="", ultima_consulta="", produtos_ids=[], total_turnos=0,
+        )
+        db.add(conversa)
+        db.flush()
+    produtos = resultado.get("produtos_encontrados") or []
+    ids = [str(p["id"]) for p in produtos]
+    db.add(ConversaTurno(conversa_id=conversa.id, papel="usuario", conteudo=mensagem, produtos_ids=[]))
+    db.add(ConversaTurno(conversa_id=conversa.id, papel="assistente", conteudo=resultado.get("resposta", ""), produtos_ids=ids))
+    conversa.resumo = _atualizar_resumo(conversa.resumo or "", mensagem, produtos)
+    conversa.ultima_consulta = consulta_busca
+    if ids:
+        conversa.produtos_ids = ids
+    conversa.total_turnos = (conversa.total_turnos or 0) + 2
+    conversa.atualizado_em = func.now()
+    db.commit()
+    return conversa
+
+def listar_turnos(db: Session, conversa: Conversa) -> List[ConversaTurno]:
+    return (
+        db.query(ConversaTurno)
+        .filter(ConversaTurno.conversa_id == conversa.id)
+        .order_by(ConversaTurno.id)
+        .all()
+    )
@@ -0,0 +1,75 @@
+# app/services/ia/diversidade.py
+"""Diversidade dos resultados: variantes de cor agrupadas + MMR.
+
+O catálogo tem o mesmo produto (nome + linha) em várias cores, todas com
+embeddings quase iguais; sem esta etapa o top-3 costuma ser "o mesmo produto
+três vezes". Sobre os candidatos já re-ranqueados:
+
+1. ``agrupar``: cada nome + linha vira um item (a variante mais bem colocada),
+   com as demais em ``outras_cores`` (id, cor, score); a lista completa de
+   cores de um produto sai em ``GET /tintas/{id}/cores``;
+2. ``mmr``: Maximal Marginal Relevance sobre os embeddings gravados —
+   escolhe, a cada passo, o item que maximiza
+   ``λ·relevância − (1−λ)·max(cosseno com os já escolhidos)`` (BUSCA_MMR_LAMBDA).
+
+A matriz de similaridade dos candidatos é calculada de uma vez (numpy); cada
+passo guloso é só um ``argmax`` e um ``maximum`` vetoriais.
+numpy é importado só aqui, como em ``indice_memoria``.
+"""
+from typing import Any, Dict, List, Optional
+from app.core import metricas
+from app.core.config import settings
+from app.services.ia.indice_memoria import _parse_vetor
+
+def chave_produto(item: Dict[str, Any]) -> tuple:
+    return ((item.get("nome") or "").strip().lower(), (item.get("linha") or "").strip().lower())
+
+def agrupar(itens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Um item por nome + linha (a primeira ocorrência, na ordem de ``itens``); demais cores em ``outras_cores``."""
+    grupos: Dict[tuple, Dict[str, Any]] = {}
+    for item in itens:
+        chave = chave_produto(item)
+        if chave not in grupos:
+            grupos[chave] = {**item, "outras_cores": []}
+        else:
+            grupos[chave]["outras_cores"].append(
+                {"id": str(item["id"]), "cor": item["cor"], "score": float(item.get("score") or 0.0)}
+            )
+    metricas.incrementar("busca.diversidade.agrupadas", len(itens) - len(grupos))
+    return list(grupos.values())
+
+def mmr(itens: List[Dict[str, Any]], vetores: List[Any], limite: int, lambda_: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Reordena ``itens`` (com ``score`` de relevância) por MMR e devolve os ``limite`` primeiros."""
+    import numpy as np
+
+    if len(itens) <= 1 or limite <= 1:
+        return itens[:limite]
+    lambda_ = settings.busca_mmr_lambda if lambda_ is None else lambda_
+    v = np.vstack([_parse_vetor(x) for x in vetores])
+    v /= np.linalg.norm(v, axis=1, keepdims=True) + 1e-12
+    similaridade = v @ v.T
+    relevancia = np.array([float(i.get("score") or 0.0) for i in itens], dtype=np.float32)
+
+    escolhidos = [int(np.argmax(relevancia))]
+    redundancia = similaridade[escolhidos[0]].copy()
+    livres = np.ones(len(itens), dtype=bool)
+    livres[escolhidos[0]] = False
+    while len(escolhidos) < min(limite, len(itens)):
+        valores = np.where(livres, lambda_ * relevancia - (1 - lambda_) * redundancia, -np.inf)
+        proximo = int(np.argmax(valores))
+        escolhidos.append(proximo)
+        livres[proximo] = False
+        np.maximum(redundancia, similaridade[proximo], out=redundancia)
+    return [itens[i] for i in escolhidos]
+
+def diversificar(
+    itens: List[Dict[str, Any]], limite: int, agrupar_cores: bool = True, usar_mmr: bool = True,
+    lambda_: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Agrupa variantes e/ou aplica MMR (precisa da chave ``vetor``, que é removida da saída)."""
+    with metricas.cronometro("busca.diversidade"):
+        if agrupar_cores:
+            itens = agrupar(itens)
+        if usar_mmr and all(i.get("vetor") is not None for i in itens):
+            itens = mmr(itens, [i["vetor"] for i in itens], limite, lambda_)
+        return [{k: v for k, v in i.items() if k != "vetor"} for i in itens[:limite]]
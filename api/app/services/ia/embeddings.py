@@ -1,95 +1,52 @@
 # app/services/ia/embeddings.py
-import os, csv, json, unicodedata
-from typing import Dict, Any, Iterable, Optional, List
+import json
+from typing import Dict, Any, Optional, List
 from sqlalchemy import text
 from sqlalchemy.orm import Session
-from openai import OpenAI
 from app.core.config import settings
+from app.services.catalogo import apresentacao, cores
 from app.db.session import SessionLocal
-
-MODEL = settings.embedding_model or "text-embedding-3-small"
-DIM = int(os.getenv("EMBEDDING_DIM", "1536"))
-_client: Optional[OpenAI] = OpenAI(api_key=settings.openai_api_key) if settings.openai_api_key else None
-
-# ---------- utils ----------
-def _norm(v: Any) -> str:
-    return (str(v or "").strip())
-
-def _slug(s: str) -> str:
-    s = s.replace("\ufeff", "").replace("\xa0", " ")
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    s = s.strip().lower().replace("\n", " ").replace("\r", " ")
-    for ch in ("  ", "   "): s = s.replace(ch, " ")
-    for ch in (" ", "-", "/", "\\", "(", ")", "."): s = s.replace(ch, "_")
-    while "__" in s: s = s.replace("__", "_")
-    return s.strip("_")
-
-def _ascii(v: str) -> str:
-    v = str(v or "").strip().lower()
-    v = unicodedata.normalize("NFKD", v)
-    return "".join(ch for ch in v if not unicodedata.combining(ch))
-
-def map_ambiente(v: str) -> str:
-    x = _ascii(v).replace("-", " ")
-    if x in {"interno","interior","dentro","area interna","área interna"}: return "interno"
-    if x in {"externo","exterior","fora","area externa","área externa","fachada"}: return "externo"
-    return "interno"
-
-def map_acabamento(v: str) -> str:
-    x = _ascii(v).replace("-", " ").replace("_", " ")
-    if x in {"fosco","mate","matte","fosco completo"}: return "fosco"
-    if x in {"acetinado","satin","seda"}: return "acetinado"
-    if x in {"semibrilho","semi brilho","eggshell","egg shell","casca de ovo"}: return "semibrilho"
-    if x in {"brilho","brilhante","alto brilho","gloss"}: return "brilho"
-    return "fosco"
-
-def _bool_from_any(v: Any) -> Optional[bool]:
-    if v is None: return None
-    s = str(v).strip().lower()
-    if s in {"1","true","t","yes","y","sim","verdadeiro"}: return True
-    if s in {"0","false","f","no","n","nao","não","falso"}: return False
-    return None
-
-def _float_or_none(v: Any) -> Optional[float]:
-    try:
-        return float(v) if v not in (None, "", "null", "None") else None
-    except Exception:
-        return None
-
-def _to_vec_literal(vec: Iterable[float]) -> str:
-    return "[" + ",".join(f"{float(x):.6f}" for x in vec) + "]"
-
-def embed_texto(txt: str) -> list[float]:
-    if not _client:
-        raise RuntimeError("OPENAI_API_KEY não definido no .env")
-    r = _client.embeddings.create(model=MODEL, input=txt)
-    return r.data[0].embedding
+from app.services.ia.clientes import get_openai_client
+from app.services.ia.governador import ErroUpstream, estimar_tokens, get_governador
+from app.services.ia.recuperacao import buscar as buscar_recuperacao
+from app.services.ia.provedores import get_provedor
+from app.services.ia.vetores import embed_texto, embed_textos
+from app.services.ia import versoes
+from app.services.ia.normalizacao import canonizar_consulta
+from app.services.ia.template import escolher_modo, renderizar_resposta
+from app.core import metricas
+from app.core.tenant import TenantConfig, padrao as tenant_padrao
+from app.services.ia.texto import _norm, _slug, _ascii, map_ambiente, map_acabamento
+from app.services.ingestao.leitores import (  # reexportados para compatibilidade
+    ALIASES, FEATURES_TEXT_HEADERS, LeitorCatalogo, _bool_from_any, _build_map, _float_or_none, normalizar_bloco,
+)
 
 # ---------- DB ----------
-def _find_tinta_id(db: Session, nome: str, cor: str, linha: Optional[str]) -> Optional[str]:
+def _find_tinta_id(db: Session, nome: str, cor: str, linha: Optional[str], tenant: str) -> Optional[str]:
     sql = text("""
         SELECT id::text FROM public.tintas
-        WHERE lower(nome)=lower(:nome) AND lower(cor)=lower(:cor)
+        WHERE tenant = :tenant AND lower(nome)=lower(:nome) AND lower(cor)=lower(:cor)
           AND COALESCE(linha,'') = COALESCE(:linha,'')
         LIMIT 1;
     """)
-    return db.execute(sql, {"nome": nome, "cor": cor, "linha": linha}).scalar()
+    return db.execute(sql, {"nome": nome, "cor": cor, "linha": linha, "tenant": tenant}).scalar()
 
 def _insert_tinta(db: Session, d: Dict[str, Any]) -> str:
     sql = text("""
         INSERT INTO public.tintas
-            (nome, cor, superficie_indicada, ambiente, acabamento, features, linha, descricao,
-             rendimento_m2_litro, resistencia_uv, voc_baixo, criado_em, atualizado_em)
+            (tenant, nome, cor, superficie_indicada, ambiente, acabamento, features, linha, descricao,
+             rendimento_m2_litro, resistencia_uv, voc_baixo, contexto_prompt, exibicao, cor_hex, cor_lab,
+             criado_em, atualizado_em)
         VALUES
-            (:nome, :cor, :superficie_indicada,
+            (:tenant, :nome, :cor, :superficie_indicada,
              CAST(:ambiente AS public.ambiente_tinta),
              CAST(:acabamento AS public.acabamento_tinta),
              COALESCE(:features, '{}'::jsonb), :linha, :descricao,
-             :rendimento_m2_litro, :resistencia_uv, :voc_baixo, NOW(), NOW())
+             :rendimento_m2_litro, :resistencia_uv, :voc_baixo,
+             :contexto_prompt, CAST(:exibicao AS jsonb), :cor_hex, CAST(:cor_lab AS real[]), NOW(), NOW())
         RETURNING id::text;
     """)
-    return db.execute(sql, d).scalar()
+    return db.execute(sql, {**d, **apresentacao.parametros_sql(d), **cores.parametros_sql(d)}).scalar()
 
 def _update_tinta(db: Session, tinta_id: str, d: Dict[str, Any]) -> None:
     sql = text("""
@@ -103,119 +60,78 @@ def _update_tinta(db: Session, tinta_id: str, d: Dict[str, Any]) -> None:
             rendimento_m2_litro = :rendimento_m2_litro,
             resistencia_uv = :resistencia_uv,
             voc_baixo = :voc_baixo,
+            contexto_prompt = :contexto_prompt,
+            exibicao = CAST(:exibicao AS jsonb),
+            cor_hex = :cor_hex,
+            cor_lab = CAST(:cor_lab AS real[]),
+            descontinuada_em = NULL,
             atualizado_em = NOW()
         WHERE id = CAST(:tinta_id AS uuid);
     """)
-    db.execute(sql, {**d, "tinta_id": tinta_id})
-
-def _upsert_embedding(db: Session, tinta_id: str, conteudo: str, emb: list[float]) -> None:
-    sql = text("""
-        INSERT INTO public.embeddings_tintas (tinta_id, embedding, conteudo, atualizado_em)
-        VALUES (CAST(:tinta_id AS uuid), (:vec)::vector, :conteudo, NOW())
-        ON CONFLICT (tinta_id) DO UPDATE
-        SET embedding = EXCLUDED.embedding,
-            conteudo  = EXCLUDED.conteudo,
-            atualizado_em = NOW();
-    """)
-    db.execute(sql, {"tinta_id": tinta_id, "conteudo": conteudo, "vec": _to_vec_literal(emb)})
-
-# ---------- CSV mapeamento ----------
-ALIASES = {
-    "nome": {"nome","nome_da_tinta","produto","nome_tinta","Nome da tinta"},
-    "cor": {"cor","tom","cor_nome","cor_tinta","Cor"},
-    "superficie_indicada": {"superficie_indicada","superficie","tipo_de_superficie","superficie_recomendada","superfície_indicada","Tipo de superfície indicada"},
-    "ambiente": {"ambiente","ambiente_indicado","ambiente_(interno/externo)","uso","Ambiente"},
-    "acabamento": {"acabamento","tipo_de_acabamento","Tipo de acabamento"},
-    "linha": {"linha","linha_produto","segmento","Linha"},
-    "descricao": {"descricao","descrição","observacoes","observações","detalhes"},
-    "rendimento_m2_litro": {"rendimento","rendimento_m2_litro","rendimento_(m2/litro)","rendimento_m2_l"},
-    "resistencia_uv": {"resistencia_uv","resistente_uv","resistência_uv","resistencia_ao_sol"},
-    "voc_baixo": {"voc_baixo","baixo_voc","voc"},
-}
-FEATURES_TEXT_HEADERS = {"Features relevantes"}
-
-def _build_map(fieldnames: list[str]) -> Dict[str, str]:
-    slugs = {fn: _slug(fn) for fn in fieldnames}
-    inv = {v: k for k, v in slugs.items()}
-
-    def pick(keys:set[str]) -> Optional[str]:
-        for k in keys:
-            if k in inv: return inv[k]
-        return None
-
-    mapping: Dict[str, str] = {}
-    for target, keys in ALIASES.items():
-        mapping[target] = pick({ _slug(k) for k in keys }) or ""
-
-    for fn in fieldnames:
-        if fn in FEATURES_TEXT_HEADERS:
-            mapping["_features_text_col"] = fn
-            break
-    return mapping
-
-def sniff_csv_columns(caminho_csv: str) -> Dict[str, Any]:
-    with open(caminho_csv, "r", encoding="utf-8", errors="ignore") as f:
-        reader = csv.DictReader(f); fns = reader.fieldnames or []
-    return {"fieldnames": fns, "mapping": _build_map(fns)}
+    db.execute(sql, {**d, **apresentacao.parametros_sql(d), **cores.parametros_sql(d), "tinta_id": tinta_id})
 
 # ---------- Pipeline ----------
-def indexar_csv_tintas(caminho_csv: str) -> dict:
+def sniff_csv_columns(caminho_csv: str) -> Dict[str, Any]:
+    leitor = LeitorCatalogo(caminho_csv)
+    return {
+        "fieldnames": leitor.colunas, "mapping": _build_map(leitor.colunas),
+        "formato": leitor.formato, "encoding": leitor.relatorio.encoding,
+        "delimitador": leitor.relatorio.delimitador,
+    }
+
+def indexar_csv_tintas(
+    caminho_csv: str, tamanho_bloco: int = 500, tenant: Optional[str] = None, ativar: bool = True
+) -> dict:
+    """Indexa CSV/XLSX/Parquet numa versão nova do índice (blue/green).
+
+    Tintas são gravadas e embedadas por bloco, em transações curtas; a busca
+    segue na versão ativa. No fim a versão é completada com as tintas do tenant
+    fora do arquivo, validada e, se passar (e ``ativar``), vira a ativa.
+    """
+    tenant = tenant or tenant_padrao().id
     db: Session = SessionLocal()
-    lidas = ok = ignoradas = 0
+    leitor = LeitorCatalogo(caminho_csv, tamanho_bloco)
+    relatorio = leitor.relatorio
+    mapping = _build_map(leitor.colunas)
+    ok = 0
+    versao = None
     try:
-        with open(caminho_csv, "r", encoding="utf-8", errors="ignore") as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames or []
-            mapping = _build_map(fieldnames)
-
-            for row in reader:
-                lidas += 1
-                def get_mapped(key: str, default: str = "") -> str:
-                    src = mapping.get(key) or ""
-                    return _norm(row.get(src)) if src else default
-
-                nome = get_mapped("nome")
-                cor = get_mapped("cor")
-                if not nome or not cor:
-                    ignoradas += 1
-                    continue
-
-                superficie = get_mapped("superficie_indicada", "alvenaria")
-                ambiente = map_ambiente(get_mapped("ambiente", "interno"))
-                acabamento = map_acabamento(get_mapped("acabamento", "fosco"))
-                linha = get_mapped("linha") or None
-                descricao = get_mapped("descricao")
-                rendimento = _float_or_none(get_mapped("rendimento_m2_litro"))
-                res_uv = _bool_from_any(get_mapped("resistencia_uv"))
-                voc_baixo = _bool_from_any(get_mapped("voc_baixo"))
-
-                feats = {}
-                ft_col = mapping.get("_features_text_col")
-                if ft_col:
-                    raw = _norm(row.get(ft_col))
-                    if raw:
-                        for tok in [t.strip() for t in raw.replace(";", ",").split(",") if t.strip()]:
-                            feats[_slug(tok)] = True
-                features_json = json.dumps(feats) if feats else None
-
-                dados = {
-                    "nome": nome, "cor": cor, "superficie_indicada": superficie,
-                    "ambiente": ambiente, "acabamento": acabamento,
-                    "features": features_json, "linha": linha, "descricao": descricao,
-                    "rendimento_m2_litro": rendimento, "resistencia_uv": res_uv, "voc_baixo": voc_baixo,
-                }
-
-                tinta_id = _find_tinta_id(db, nome, cor, linha)
+        versao = versoes.criar(db, tenant)
+        provedor = versao.get_provedor()
+        proxima_linha = 2  # linha 1 = cabeçalho
+        for bloco in leitor.blocos():
+            registros = normalizar_bloco(bloco, mapping, relatorio, proxima_linha)
+            proxima_linha += len(bloco)
+            if not registros:
+                continue
+
+            ids, conteudos = [], []
+            for dados in registros:
+                dados["tenant"] = tenant
+                tinta_id = _find_tinta_id(db, dados["nome"], dados["cor"], dados["linha"], tenant)
                 if tinta_id: _update_tinta(db, tinta_id, dados)
                 else: tinta_id = _insert_tinta(db, dados)
+                ids.append(tinta_id)
+                conteudos.append(versoes.conteudo_tinta(dados))
 
-                conteudo = " ".join(s for s in [nome, cor, superficie, ambiente, acabamento, (linha or ""), descricao] if s).strip()
-                emb = embed_texto(conteudo)
-                _upsert_embedding(db, tinta_id, conteudo, emb)
-                ok += 1
+            versoes.inserir(db, versao, ids, conteudos, embed_textos(conteudos, provedor=provedor))
+            db.commit()
+            ok += len(registros)
 
-        db.commit()
-        return {"linhas_lidas": lidas, "linhas_indexadas": ok, "linhas_ignoradas": ignoradas, "modelo": MODEL, "dim": DIM, "mapping": mapping}
+        completadas = versoes.completar(db, versao, tamanho_bloco)
+        validacao = versoes.validar(db, versao)
+        if ativar and validacao["ok"]:
+            versoes.ativar(db, versao.versao)
+        return {
+            **relatorio.como_dict(),
+            "linhas_indexadas": ok, "tenant": tenant, "modelo": versao.modelo, "dim": versao.dim,
+            "mapping": mapping, "versao": versao.versao, "completadas": completadas,
+            "validacao": validacao, "ativada": ativar and validacao["ok"],
+        }
+    except Exception:
+        if versao is not None:
+            versoes.marcar_falha(db, versao)
+        raise
     finally:
         db.close()
 
@@ -223,37 +139,19 @@ def indexar_csv_tintas(caminho_csv: str) -> dict:
 # 🤖 NOVAS FUNÇÕES DE RECOMENDAÇÃO COM IA
 # ==========================================
 
-def buscar_produtos_similares(db: Session, consulta: str, limite: int = 3) -> List[Dict]:
-    """Busca produtos similares usando embeddings + pgvector - VERSÃO CORRIGIDA"""
-    if not _client:
-        raise RuntimeError("OPENAI_API_KEY não configurada")
-    
-    embedding_consulta = embed_texto(consulta)
-    
-    # VERSÃO CORRIGIDA - usando o formato correto para pgvector
-    sql = text("""
-        SELECT 
-            t.id::text as id, t.nome, t.cor, t.ambiente, t.acabamento, 
-            t.features, t.linha, t.descricao, t.superficie_indicada,
-            te.conteudo,
-            (1 - (te.embedding <=> :embedding_vec)) as score
-        FROM tintas t 
-        JOIN embeddings_tintas te ON t.id = te.tinta_id
-        ORDER BY te.embedding <=> :embedding_vec
-        LIMIT :limite
-    """)
-    
-    # Formato correto: string com vetor literal
-    embedding_str = _to_vec_literal(embedding_consulta)
+def buscar_produtos_similares(
+    db: Session, consulta: str, limite: int = 3, tenant: Optional[str] = None, cor: Optional[cores.Cor] = None
+) -> List[Dict]:
+    """Busca produtos similares: candidatos via índice ANN (pgvector) + re-ranking local
+
+    ``cor``: cor pedida (``cores.extrair_cor`` sobre a mensagem original); aproxima os resultados dela.
+    """
+    versao = versoes.ativa(db, tenant or tenant_padrao().id)
+    if versao is None or not versao.get_provedor().disponivel():
+        raise RuntimeError("Provedor de embeddings da versão ativa indisponível")
     
     try:
-        resultados = db.execute(sql, {
-            "embedding_vec": embedding_str,
-            "limite": limite
-        }).mappings().all()
-        
-        return [dict(item) for item in resultados]
-        
+        return buscar_recuperacao(db, consulta, limite, tenant=tenant, cor=cor)
     except Exception as e:
         # Se der erro na busca por embeddings, usa fallback
         print(f"⚠️ Erro na busca por embeddings: {str(e)}")
@@ -261,41 +159,19 @@ def buscar_produtos_similares(db: Session, consulta: str, limite: int = 3) -> Li
         raise Exception(f"Erro embeddings: {str(e)}")
 
 def montar_contexto_produtos(produtos: List[Dict]) -> str:
-    """Formata produtos para o LLM"""
+    """Formata produtos para o LLM (blocos pré-calculados, ver catalogo/apresentacao.py)"""
     if not produtos:
         return "Nenhum produto encontrado."
-    
-    contexto_produtos = []
-    for i, produto in enumerate(produtos, 1):
-        features_str = ""
-        if produto.get('features'):
-            try:
-                features = json.loads(produto['features']) if isinstance(produto['features'], str) else produto['features']
-                if isinstance(features, dict):
-                    features_list = [k.replace('_', ' ').title() for k, v in features.items() if v]
-                    features_str = ", ".join(features_list) if features_list else "N/A"
-                else:
-                    features_str = str(features)
-            except:
-                features_str = str(produto.get('features', 'N/A'))
-        
-        score = produto.get('score', 0)
-        produto_info = f"""PRODUTO {i}: {produto['nome']}
-- Cor: {produto['cor']}
-- Linha: {produto.get('linha', 'N/A')}
-- Superfície: {produto.get('superficie_indicada', 'N/A')}
-- Ambiente: {produto['ambiente']}
-- Acabamento: {produto['acabamento']}
-- Features: {features_str}
-- Descrição: {produto.get('descricao', 'N/A')}
-- Score: {score:.3f}"""
-        contexto_produtos.append(produto_info)
-    
-    return "\n\n".join(contexto_produtos)
+    return "\n\n".join(
+        f"PRODUTO {i}: {apresentacao.contexto(p)}\n- Score: {p.get('score', 0):.3f}"
+        # variantes agrupadas (diversidade.py): uma linha em vez de um bloco por cor
+        + (f"\n- Outras cores: {', '.join(v['cor'] for v in p['outras_cores'])}" if p.get("outras_cores") else "")
+        for i, p in enumerate(produtos, 1)
+    )
 
-def criar_prompt_suvinil() -> str:
-    """Prompt do Conselheiro Suvinil"""
-    return """Você é o Conselheiro Suvinil, especialista em tintas que ajuda clientes via chat com respostas DIRETAS e ÚTEIS.
+def criar_prompt_suvinil(marca: str = "Suvinil") -> str:
+    """Prompt do Conselheiro da marca (padrão: Suvinil)"""
+    return f"""Você é o Conselheiro {marca}, especialista em tintas que ajuda clientes via chat com respostas DIRETAS e ÚTEIS.
 
 REGRAS:
 ✅ Responda em até 6 linhas + bullets (máximo)
@@ -324,66 +200,90 @@ Tem tecnologia sem odor e é perfeita para ambientes internos.
 
 💡 Já escolheu a cor ou quer sugestões?\""""
 
-def chamar_llm_para_recomendacao(consulta_usuario: str, contexto_produtos: str) -> str:
-    """Chama OpenAI para gerar resposta"""
-    if not _client:
-        return "Erro: OpenAI não configurado. Configure OPENAI_API_KEY no .env"
+def criar_prompt_sistema(tenant: TenantConfig) -> str:
+    """Prompt próprio do tenant ou o padrão com a marca dele"""
+    return tenant.prompt_sistema or criar_prompt_suvinil(tenant.marca)
+
+def chamar_llm_para_recomendacao(
+    consulta_usuario: str, contexto_produtos: str, historico: str = "", tenant: Optional[TenantConfig] = None
+) -> str:
+    """Chama OpenAI para gerar resposta (levanta ErroUpstream se a OpenAI falhar)"""
+    client = get_openai_client()
+    if not client:
+        raise ErroUpstream("OpenAI não configurado. Configure OPENAI_API_KEY no .env")
     
-    prompt_sistema = criar_prompt_suvinil()
-    prompt_usuario = f"""CONSULTA DO CLIENTE: "{consulta_usuario}"
+    tenant = tenant or tenant_padrao()
+    prompt_sistema = criar_prompt_sistema(tenant)
+    bloco_historico = f"HISTÓRICO DA CONVERSA:\n{historico}\n\n" if historico else ""
+    prompt_usuario = f"""{bloco_historico}CONSULTA DO CLIENTE: "{consulta_usuario}"
 
-PRODUTOS ENCONTRADOS NA BASE SUVINIL:
+PRODUTOS ENCONTRADOS NA BASE {tenant.marca.upper()}:
 {contexto_produtos}
 
-Como Conselheiro Suvinil, recomende o melhor produto seguindo EXATAMENTE o formato especificado."""
+Como Conselheiro {tenant.marca}, recomende o melhor produto seguindo EXATAMENTE o formato especificado."""
     
-    try:
-        response = _client.chat.completions.create(
+    max_tokens = 400
+    response = get_governador("chat").executar(
+        lambda: client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": prompt_sistema},
                 {"role": "user", "content": prompt_usuario}
             ],
-            max_tokens=400,
+            max_tokens=max_tokens,
             temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"Erro ao gerar recomendação: {str(e)}"
-
-def recomendar_com_explicacao(db: Session, consulta: str, limite: int = 3) -> Dict[str, Any]:
-    """FUNÇÃO PRINCIPAL de recomendação - VERSÃO SEGURA"""
+        ),
+        tokens_estimados=estimar_tokens(prompt_sistema, prompt_usuario) + max_tokens,
+    )
+    return response.choices[0].message.content.strip()
+
+def recomendar_com_explicacao(
+    db: Session,
+    consulta: str,
+    limite: int = 3,
+    modo: Optional[str] = None,
+    historico: str = "",
+    consulta_busca: Optional[str] = None,
+    produtos_previos: Optional[List[Dict]] = None,
+    tenant: Optional[TenantConfig] = None,
+) -> Dict[str, Any]:
+    """FUNÇÃO PRINCIPAL de recomendação - VERSÃO SEGURA
+
+    ``modo``: ``auto`` (template se o match for de alta confiança, senão LLM),
+    ``template`` ou ``llm``. Sem valor, usa RESPOSTA_MODO.
+    Em conversas: ``historico`` vai para o prompt, ``consulta_busca`` é o texto
+    embedado e ``produtos_previos`` (se houver) dispensa uma nova busca.
+    ``tenant`` define o catálogo buscado e o prompt (padrão: TENANT_PADRAO).
+    """
+    tenant = tenant or tenant_padrao()
+    # texto embedado na forma canônica (grafia, abreviações, sinônimos); o LLM recebe a mensagem original
+    consulta_busca = canonizar_consulta(db, consulta_busca or consulta, tenant.id)
+    if produtos_previos:
+        # follow-up que ainda se aplica aos produtos já recuperados: sem embedding
+        metricas.incrementar("chat.conversa.reuso_produtos")
+        return _gerar_resposta(consulta, produtos_previos[:limite], modo or "llm", historico, tenant)
     
-    # PRIMEIRO: Verificar se existem embeddings
+    # PRIMEIRO: Verificar se o tenant tem versão do índice ativa
     try:
-        count_embeddings = db.execute(text("SELECT COUNT(*) FROM embeddings_tintas")).scalar()
-        if count_embeddings == 0:
-            print("⚠️ Nenhum embedding encontrado, usando busca simples")
-            return busca_simples_fallback(db, consulta, limite)
+        versao = versoes.ativa(db, tenant.id)
+        if versao is None:
+            print("⚠️ Nenhuma versão do índice ativa, usando busca simples")
+            return busca_simples_fallback(db, consulta, limite, tenant.id)
     except Exception as e:
         print(f"⚠️ Tabela embeddings_tintas não existe: {str(e)}")
-        return busca_simples_fallback(db, consulta, limite)
+        return busca_simples_fallback(db, consulta, limite, tenant.id)
     
     # SEGUNDO: Tentar busca por embeddings
     try:
-        produtos = buscar_produtos_similares(db, consulta, limite)
+        # a cor vem da mensagem original: a forma canônica perde "#" e parênteses de hex/RGB
+        cor = cores.extrair_cor(consulta) or cores.extrair_cor(consulta_busca)
+        produtos = buscar_produtos_similares(db, consulta_busca, limite, tenant.id, cor)
         
         if not produtos:
             print("⚠️ Busca por embeddings não retornou resultados, usando fallback")
-            return busca_simples_fallback(db, consulta, limite)
+            return busca_simples_fallback(db, consulta, limite, tenant.id)
         
-        contexto = montar_contexto_produtos(produtos)
-        resposta_llm = chamar_llm_para_recomendacao(consulta, contexto)
-        
-        return {
-            "resposta": resposta_llm,
-            "produtos_encontrados": produtos,
-            "contexto_usado": contexto,
-            "consulta_original": consulta,
-            "modelo_embedding": MODEL,
-            "modelo_llm": "gpt-4o-mini",
-            "metodo": "embeddings"
-        }
+        return _gerar_resposta(consulta, produtos, modo, historico, tenant, versao.modelo)
         
     except Exception as e:
         print(f"⚠️ Erro em embeddings, usando fallback: {str(e)}")
@@ -392,35 +292,97 @@ def recomendar_com_explicacao(db: Session, consulta: str, limite: int = 3) -> Di
             db.rollback()
         except:
             pass
-        return busca_simples_fallback(db, consulta, limite)
-
-def busca_simples_fallback(db: Session, consulta: str, limite: int) -> Dict[str, Any]:
+        return busca_simples_fallback(db, consulta, limite, tenant.id)
+
+def _gerar_resposta(
+    consulta: str,
+    produtos: List[Dict],
+    modo: Optional[str],
+    historico: str = "",
+    tenant: Optional[TenantConfig] = None,
+    modelo_embedding: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Resposta para produtos já recuperados: template (alta confiança) ou LLM"""
+    modelo_embedding = modelo_embedding or get_provedor().modelo
+    modo_resposta = escolher_modo(consulta, produtos, modo)
+    if modo_resposta == "template":
+        # Match de alta confiança: resposta montada sem LLM
+        metricas.incrementar("chat.modo.template")
+        with metricas.cronometro("chat.resposta.template"):
+            resposta = renderizar_resposta(consulta, produtos)
+        return {
+            "resposta": resposta,
+            "produtos_encontrados": produtos,
+            "contexto_usado": "",
+            "consulta_original": consulta,
+            "modelo_embedding": modelo_embedding,
+            "metodo": "embeddings",
+            "modo_resposta": "template"
+        }
+    
+    contexto = montar_contexto_produtos(produtos)
+    try:
+        metricas.incrementar("chat.modo.llm")
+        with metricas.cronometro("chat.resposta.llm"):
+            resposta_llm = chamar_llm_para_recomendacao(consulta, contexto, historico, tenant)
+    except ErroUpstream as e:
+        # Produtos já foram encontrados: responde pelo template em vez de devolver o erro
+        print(f"⚠️ LLM indisponível, resposta por template: {str(e)}")
+        metricas.incrementar("chat.modo.template_fallback")
+        return {
+            "resposta": renderizar_resposta(consulta, produtos),
+            "produtos_encontrados": produtos,
+            "contexto_usado": contexto,
+            "consulta_original": consulta,
+            "modelo_embedding": modelo_embedding,
+            "metodo": "embeddings",
+            "modo_resposta": "template",
+            "status": "fallback_llm_indisponivel"
+        }
+    
+    return {
+        "resposta": resposta_llm,
+        "produtos_encontrados": produtos,
+        "contexto_usado": contexto,
+        "consulta_original": consulta,
+        "modelo_embedding": modelo_embedding,
+        "modelo_llm": "gpt-4o-mini",
+        "metodo": "embeddings",
+        "modo_resposta": "llm"
+    }
+
+def _resposta_simples(consulta: str, produtos: List[Dict]) -> str:
+    """Resposta em template (sem LLM) a partir dos produtos encontrados"""
+    if not produtos:
+        return f"Não encontrei produtos específicos para '{consulta}'. Pode ser mais específico?"
+    primeiro = produtos[0]
+    resposta = f"Encontrei {len(produtos)} produto(s) para '{consulta}'\n\n"
+    resposta += f"Recomendo: **{primeiro['nome']}** - {primeiro['cor']}\n"
+    resposta += f"• Ambiente: {primeiro['ambiente']}\n"
+    resposta += f"• Acabamento: {primeiro['acabamento']}"
+    return resposta
+
+def busca_simples_fallback(db: Session, consulta: str, limite: int, tenant: Optional[str] = None) -> Dict[str, Any]:
     """Fallback caso embeddings falhem"""
     try:
         sql = text("""
-            SELECT id, nome, cor, ambiente, acabamento, linha, descricao
+            SELECT id, nome, cor, ambiente, acabamento, linha, descricao, superficie_indicada, features,
+                   atualizado_em, contexto_prompt, exibicao::text AS exibicao
             FROM tintas 
-            WHERE LOWER(nome) LIKE :busca 
-               OR LOWER(cor) LIKE :busca
-               OR LOWER(descricao) LIKE :busca
+            WHERE tenant = :tenant AND descontinuada_em IS NULL
+              AND (LOWER(nome) LIKE :busca 
+                   OR LOWER(cor) LIKE :busca
+                   OR LOWER(descricao) LIKE :busca)
             LIMIT :limite
         """)
         
         busca_termo = f"%{consulta.lower()}%"
-        resultados = db.execute(sql, {"busca": busca_termo, "limite": limite}).mappings().all()
+        params = {"busca": busca_termo, "limite": limite, "tenant": tenant or tenant_padrao().id}
+        resultados = db.execute(sql, params).mappings().all()
         produtos = [dict(item) for item in resultados]
         
-        if produtos:
-            primeiro = produtos[0]
-            resposta = f"Encontrei {len(produtos)} produto(s) para '{consulta}'\n\n"
-            resposta += f"Recomendo: **{primeiro['nome']}** - {primeiro['cor']}\n"
-            resposta += f"• Ambiente: {primeiro['ambiente']}\n"
-            resposta += f"• Acabamento: {primeiro['acabamento']}"
-        else:
-            resposta = f"Não encontrei produtos específicos para '{consulta}'. Pode ser mais específico?"
-        
         return {
-            "resposta": resposta,
+            "resposta": _resposta_simples(consulta, produtos),
             "produtos_encontrados": produtos,
             "contexto_usado": f"Busca simples por: {consulta}",
             "consulta_original": consulta,
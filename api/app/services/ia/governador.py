@@ -0,0 +1,208 @@
+# app/services/ia/governador.py
+"""Governador das chamadas de saída para a OpenAI.
+
+Toda chamada (embeddings e chat) passa por aqui:
+1. Fila limitada + semáforo de concorrência (com prazo por requisição).
+2. Baldes de tokens para requisições/min e tokens/min.
+3. Retentativas com backoff exponencial + jitter, respeitando ``Retry-After``.
+
+Os números alimentam ``app.core.metricas`` com o prefixo ``openai.<nome>.``.
+"""
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Optional
+from app.core import custos, metricas
+from app.core.config import settings
+
+class ErroUpstream(RuntimeError):
+    """A chamada à OpenAI falhou após esgotar as retentativas."""
+
+class GovernadorSaturado(ErroUpstream):
+    """Fila cheia ou prazo estourado antes de conseguir enviar a chamada."""
+
+    def __init__(self, mensagem: str, retry_after: float = 1.0):
+        super().__init__(mensagem)
+        self.retry_after = retry_after  # segundos até valer a pena tentar de novo (header Retry-After)
+
+class BaldeTokens:
+    """Token bucket com capacidade de 1 minuto e reposição contínua."""
+
+    def __init__(self, por_minuto: float):
+        self.capacidade = float(por_minuto)
+        self.taxa = self.capacidade / 60.0
+        self.disponivel = self.capacidade
+        self.atualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _repor(self, agora: float) -> None:
+        self.disponivel = min(self.capacidade, self.disponivel + (agora - self.atualizado) * self.taxa)
+        self.atualizado = agora
+
+    def reservar(self, custo: float) -> float:
+        """Debita ``custo`` e devolve quantos segundos esperar até ele estar coberto."""
+        if self.capacidade <= 0:
+            return 0.0
+        custo = min(custo, self.capacidade)
+        with self._lock:
+            self._repor(time.monotonic())
+            self.disponivel -= custo
+            return 0.0 if self.disponivel >= 0 else -self.disponivel / self.taxa
+
+    def ajustar(self, delta: float) -> None:
+        """Corrige a reserva quando o consumo real difere do estimado."""
+        with self._lock:
+            self.disponivel = min(self.capacidade, self.disponivel - delta)
+
+def _status_code(e: Exception) -> Optional[int]:
+    return getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+
+def _retry_after(e: Exception) -> Optional[float]:
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    for chave in ("retry-after-ms", "retry-after"):
+        valor = headers.get(chave)
+        if valor is None:
+            continue
+        try:
+            segundos = float(valor)
+        except ValueError:
+            continue
+        return segundos / 1000 if chave.endswith("-ms") else segundos
+    return None
+
+def _retentavel(e: Exception) -> bool:
+    status = _status_code(e)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    from openai import APIConnectionError  # já importado se houve chamada
+    return isinstance(e, APIConnectionError)
+
+class Governador:
+    def __init__(
+        self,
+        nome: str,
+        rpm: float,
+        tpm: float,
+        max_concorrencia: int,
+        max_fila: int,
+        prazo_s: float,
+        max_tentativas: int,
+    ):
+        self.nome = nome
+        self.requisicoes = BaldeTokens(rpm)
+        self.tokens = BaldeTokens(tpm)
+        self.prazo_s = prazo_s
+        self.max_fila = max_fila
+        self.max_tentativas = max(1, max_tentativas)
+        self._slots = threading.BoundedSemaphore(max_concorrencia)
+        self._lock = threading.Lock()
+        self._fila = 0
+        self._em_voo = 0
+
+    def _metrica(self, sufixo: str) -> str:
+        return f"openai.{self.nome}.{sufixo}"
+
+    def _entrar_fila(self) -> None:
+        with self._lock:
+            if self._fila >= self.max_fila:
+                metricas.incrementar(self._metrica("rejeitadas_fila"))
+                raise GovernadorSaturado(f"Fila de chamadas OpenAI ({self.nome}) cheia")
+            self._fila += 1
+            metricas.definir(self._metrica("fila"), self._fila)
+            metricas.maximo(self._metrica("fila_pico"), self._fila)
+
+    def _sair_fila(self) -> None:
+        with self._lock:
+            self._fila -= 1
+            metricas.definir(self._metrica("fila"), self._fila)
+
+    def _aguardar_limites(self, tokens_estimados: int, limite: float) -> None:
+        espera = max(self.requisicoes.reservar(1), self.tokens.reservar(tokens_estimados))
+        if espera <= 0:
+            return
+        metricas.incrementar(self._metrica("throttle"))
+        if time.monotonic() + espera > limite:
+            self.requisicoes.ajustar(-1)
+            self.tokens.ajustar(-tokens_estimados)
+            metricas.incrementar(self._metrica("prazo_esgotado"))
+            raise GovernadorSaturado(f"Limite de taxa OpenAI ({self.nome}) excede o prazo da requisição", espera)
+        time.sleep(espera)
+
+    def executar(
+        self,
+        fn: Callable[[], Any],
+        tokens_estimados: int = 0,
+        prazo_s: Optional[float] = None,
+    ) -> Any:
+        """Executa ``fn`` respeitando fila, concorrência, limites de taxa e retentativas."""
+        limite = time.monotonic() + (prazo_s or self.prazo_s)
+        self._entrar_fila()
+        inicio_fila = time.perf_counter()
+        try:
+            if not self._slots.acquire(timeout=max(0.0, limite - time.monotonic())):
+                metricas.incrementar(self._metrica("prazo_esgotado"))
+                raise GovernadorSaturado(f"Sem slot livre para chamada OpenAI ({self.nome}) dentro do prazo")
+        finally:
+            self._sair_fila()
+        metricas.observar(self._metrica("espera_fila"), time.perf_counter() - inicio_fila)
+
+        with self._lock:
+            self._em_voo += 1
+            metricas.definir(self._metrica("em_voo"), self._em_voo)
+        try:
+            return self._com_retentativas(fn, tokens_estimados, limite)
+        finally:
+            with self._lock:
+                self._em_voo -= 1
+                metricas.definir(self._metrica("em_voo"), self._em_voo)
+            self._slots.release()
+
+    def _com_retentativas(self, fn: Callable[[], Any], tokens_estimados: int, limite: float) -> Any:
+        for tentativa in range(1, self.max_tentativas + 1):
+            self._aguardar_limites(tokens_estimados, limite)
+            metricas.incrementar(self._metrica("chamadas"))
+            inicio = time.perf_counter()
+            try:
+                resposta = fn()
+            except Exception as e:
+                status = _status_code(e)
+                if status == 429:
+                    metricas.incrementar(self._metrica("http_429"))
+                if not _retentavel(e) or tentativa == self.max_tentativas:
+                    metricas.incrementar(self._metrica("falhas"))
+                    raise ErroUpstream(f"OpenAI ({self.nome}) falhou: {e}") from e
+
+                backoff = random.uniform(0, min(8.0, 0.5 * 2 ** (tentativa - 1)))
+                espera = max(_retry_after(e) or 0.0, backoff)
+                if time.monotonic() + espera > limite:
+                    metricas.incrementar(self._metrica("falhas"))
+                    raise ErroUpstream(f"OpenAI ({self.nome}) falhou e não há prazo para retentar: {e}") from e
+                metricas.incrementar(self._metrica("retentativas"))
+                time.sleep(espera)
+                continue
+
+            metricas.observar(self._metrica("latencia"), time.perf_counter() - inicio)
+            usado = getattr(getattr(resposta, "usage", None), "total_tokens", None)
+            if usado is not None:
+                self.tokens.ajustar(usado - tokens_estimados)
+                metricas.incrementar(self._metrica("tokens"), usado)
+            custos.registrar(self.nome, resposta)
+            return resposta
+
+@lru_cache(maxsize=None)
+def get_governador(nome: str) -> Governador:
+    """Governador compartilhado por tipo de chamada (``embeddings`` ou ``chat``)."""
+    return Governador(
+        nome,
+        rpm=settings.openai_rpm,
+        tpm=settings.openai_tpm,
+        max_concorrencia=settings.openai_max_concorrencia,
+        max_fila=settings.openai_max_fila,
+        prazo_s=settings.openai_prazo_s,
+        max_tentativas=settings.openai_max_tentativas,
+    )
+
+def estimar_tokens(*textos: str) -> int:
+    """Estimativa barata (~4 caracteres por token) usada para reservar TPM."""
+    return sum(len(t or "") for t in textos) // 4 + 1
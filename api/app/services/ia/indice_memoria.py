@@ -0,0 +1,101 @@
+# app/services/ia/indice_memoria.py
+"""Índice vetorial em memória (numpy) para buscas em lote.
+
+Com INDICE_MEMORIA=1 os embeddings do catálogo são carregados uma vez numa
+matriz normalizada; um lote de consultas vira uma única multiplicação de
+matrizes (consultas × catálogo) em vez de N buscas no Postgres. O índice é
+recarregado após INDICE_MEMORIA_TTL_S ou quando ``invalidar()`` é chamado.
+Há um índice por tenant, montado com a versão ativa do índice dele; a troca
+de versão recarrega.
+numpy é importado só aqui, para não pesar no startup.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.services.ia import versoes
+from app.services.ia.vetores import filtro_versao
+
+class IndiceMemoria:
+    def __init__(self, matriz, meta: List[Dict[str, Any]], versao: Optional[int] = None):
+        self.matriz = matriz  # (n, dim) float32, linhas com norma 1
+        self.meta = meta
+        self.versao = versao
+        self.carregado_em = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    def buscar_lote(self, consultas: List[list[float]], limite: int) -> List[List[Dict[str, Any]]]:
+        import numpy as np
+
+        if not len(self.meta):
+            return [[] for _ in consultas]
+        q = np.asarray(consultas, dtype=np.float32)
+        q /= np.linalg.norm(q, axis=1, keepdims=True) + 1e-12
+        scores = q @ self.matriz.T  # similaridade de cosseno, (consultas, catálogo)
+        k = min(limite, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        saida = []
+        for linha, idxs in enumerate(top):
+            ordem = idxs[np.argsort(-scores[linha, idxs])]
+            saida.append([{**self.meta[i], "score": float(scores[linha, i])} for i in ordem])
+        return saida
+
+def _parse_vetor(v: Any):
+    import numpy as np
+
+    if isinstance(v, (bytes, memoryview)):  # vector_send(): dim e reservado (int16) + float4 big-endian
+        return np.frombuffer(v, dtype=">f4", offset=4).astype(np.float32)
+    if isinstance(v, str):  # pgvector sem adaptador registrado chega como "[0.1,0.2,...]"
+        return np.array(v.strip("[]").split(","), dtype=np.float32)
+    return np.asarray(v, dtype=np.float32)
+
+def carregar(db: Session, tenant: str) -> IndiceMemoria:
+    import numpy as np
+
+    versao = versoes.ativa(db, tenant)
+    if versao is None:
+        return IndiceMemoria(np.zeros((0, 0), dtype=np.float32), [])
+    linhas = db.execute(text(f"""
+        SELECT t.id::text AS id, t.nome, t.cor, t.ambiente, t.acabamento, t.linha,
+               t.features, t.superficie_indicada, te.conteudo, te.embedding
+        FROM embeddings_tintas te
+        JOIN tintas t ON t.id = te.tinta_id
+        WHERE te.tenant = :tenant AND t.tenant = :tenant AND {filtro_versao(versao)}
+    """), {"tenant": tenant}).mappings().all()
+    if not linhas:
+        return IndiceMemoria(np.zeros((0, 0), dtype=np.float32), [], versao.versao)
+    matriz = np.vstack([_parse_vetor(l["embedding"]) for l in linhas])
+    matriz /= np.linalg.norm(matriz, axis=1, keepdims=True) + 1e-12
+    meta = [{k: v for k, v in l.items() if k != "embedding"} for l in linhas]
+    return IndiceMemoria(matriz, meta, versao.versao)
+
+_lock = threading.Lock()
+_indices: Dict[str, IndiceMemoria] = {}
+
+def obter(db: Session, tenant: Optional[str] = None) -> Optional[IndiceMemoria]:
+    """Índice do tenant (ou recarregado se expirou); ``None`` se desabilitado."""
+    if not settings.indice_memoria:
+        return None
+    tenant = tenant or settings.tenant_padrao
+    versao = versoes.ativa(db, tenant)
+    with _lock:
+        indice = _indices.get(tenant)
+        if (
+            indice is None
+            or time.monotonic() - indice.carregado_em > settings.indice_memoria_ttl_s
+            or indice.versao != (versao.versao if versao else None)
+        ):
+            indice = _indices[tenant] = carregar(db, tenant)
+        return indice
+
+def invalidar(tenant: Optional[str] = None) -> None:
+    """Descarta o índice de um tenant (ou de todos)."""
+    with _lock:
+        if tenant is None:
+            _indices.clear()
+        else:
+            _indices.pop(tenant, None)
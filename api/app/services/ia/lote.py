@@ -0,0 +1,114 @@
+# app/services/ia/lote.py
+"""Recomendação em lote (offline / merchandising).
+
+As consultas são processadas em blocos: um request de embeddings por bloco e
+uma única busca por bloco — multiplicação de matrizes no índice em memória
+(INDICE_MEMORIA=1) ou um SQL set-based (LATERAL sobre ``unnest``) no pgvector.
+Os resultados saem como NDJSON, uma linha por consulta, na ordem de entrada.
+
+CLI (a partir de ``api/``), uma consulta por linha:
+    python -m app.services.ia.lote consultas.txt --limite 5 > resultados.ndjson
+"""
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core import metricas
+from app.core.config import settings
+from app.core.respostas import dumps
+from app.services.ia import indice_memoria, versoes
+from app.services.ia.normalizacao import canonizar_consulta
+from app.services.ia.vetores import _to_vec_literal, coluna_vetor, embed_textos, filtro_versao
+from app.services.ia.rerank import reranquear
+
+def _sql_lote(versao: versoes.VersaoIndice):
+    return text(f"""
+        SELECT q.idx, r.*
+        FROM unnest(CAST(:idxs AS int[]), CAST(:vecs AS text[])) AS q(idx, vec)
+        CROSS JOIN LATERAL (
+            SELECT t.id::text AS id, t.nome, t.cor, t.ambiente, t.acabamento, t.linha,
+                   t.features, t.superficie_indicada, te.conteudo,
+                   1 - ({coluna_vetor(versao.dim)} <=> CAST(q.vec AS vector)) AS score
+            FROM embeddings_tintas te
+            JOIN tintas t ON t.id = te.tinta_id
+            WHERE te.tenant = :tenant AND t.tenant = :tenant AND {filtro_versao(versao)}
+            ORDER BY {coluna_vetor(versao.dim)} <=> CAST(q.vec AS vector)
+            LIMIT :limite
+        ) r
+        ORDER BY q.idx, score DESC
+    """)
+
+def _buscar_sql(
+    db: Session, vetores: List[list[float]], limite: int, versao: versoes.VersaoIndice
+) -> List[List[Dict[str, Any]]]:
+    db.execute(text(f"SET LOCAL hnsw.ef_search = {max(40, int(limite))}"))
+    linhas = db.execute(_sql_lote(versao), {
+        "idxs": list(range(len(vetores))),
+        "vecs": [_to_vec_literal(v) for v in vetores],
+        "limite": limite,
+        "tenant": versao.tenant,
+    }).mappings().all()
+    por_consulta: List[List[Dict[str, Any]]] = [[] for _ in vetores]
+    for l in linhas:
+        item = dict(l)
+        por_consulta[item.pop("idx")].append({**item, "score": float(item["score"])})
+    return por_consulta
+
+def recomendar_lote(
+    db: Session,
+    consultas: List[str],
+    limite: int = 5,
+    rerank: bool = False,
+    tamanho_bloco: int = 256,
+    tenant: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Gera ``{"indice", "consulta", "resultados"}`` por consulta, bloco a bloco."""
+    tenant = tenant or settings.tenant_padrao
+    candidatos = max(limite, settings.rerank_candidatos) if rerank else limite
+    # versão fixada no início: o lote inteiro usa o mesmo índice, mesmo se houver troca no meio
+    versao = versoes.ativa(db, tenant)
+    for inicio in range(0, len(consultas), tamanho_bloco):
+        bloco = consultas[inicio:inicio + tamanho_bloco]
+        if versao is None:
+            for i, consulta in enumerate(bloco):
+                yield {"indice": inicio + i, "consulta": consulta, "resultados": []}
+            continue
+        with metricas.cronometro("busca.lote.bloco"):
+            canonicas = [canonizar_consulta(db, c, tenant) for c in bloco]
+            vetores = embed_textos(canonicas, provedor=versao.get_provedor())
+            indice = indice_memoria.obter(db, tenant)
+            if indice is not None and len(indice) and indice.versao == versao.versao:
+                resultados = indice.buscar_lote(vetores, candidatos)
+            else:
+                resultados = _buscar_sql(db, vetores, candidatos, versao)
+        metricas.incrementar("busca.lote.consultas", len(bloco))
+        for i, (consulta, canonica, itens) in enumerate(zip(bloco, canonicas, resultados)):
+            if rerank:
+                itens = reranquear(canonica, itens, limite)
+            yield {"indice": inicio + i, "consulta": consulta, "resultados": itens[:limite]}
+
+def para_ndjson(linhas: Iterator[Dict[str, Any]]) -> Iterator[bytes]:
+    for linha in linhas:
+        yield dumps(linha) + b"\n"
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from app.db.session import SessionLocal
+
+    ap = argparse.ArgumentParser(description="Recomendação em lote (saída NDJSON)")
+    ap.add_argument("arquivo", help="arquivo texto com uma consulta por linha ('-' = stdin)")
+    ap.add_argument("--limite", type=int, default=5)
+    ap.add_argument("--rerank", action="store_true")
+    ap.add_argument("--bloco", type=int, default=256)
+    ap.add_argument("--tenant", default=None, help="catálogo (padrão: TENANT_PADRAO)")
+    args = ap.parse_args()
+
+    fonte = sys.stdin if args.arquivo == "-" else open(args.arquivo, encoding="utf-8")
+    with fonte:
+        consultas = [l.strip() for l in fonte if l.strip()]
+    db = SessionLocal()
+    try:
+        for pedaco in para_ndjson(recomendar_lote(db, consultas, args.limite, args.rerank, args.bloco, args.tenant)):
+            sys.stdout.buffer.write(pedaco)
+    finally:
+        db.close()
@@ -0,0 +1,232 @@
+# app/services/ia/normalizacao.py
+"""Forma canônica da consulta, aplicada antes do embedding.
+
+Sobre o texto sem acento/caixa (``_ascii``):
+
+1. abreviações de chat viram palavras ("p/" -> "para", "q" -> "que", "n" -> "nao");
+2. palavras fora do vocabulário do catálogo são corrigidas para a mais
+   próxima (distância de edição 1, ou 2 a partir de CONSULTA_CORRECAO_MIN_2
+   letras; empate decidido pela frequência no catálogo). A distância 2 só vale
+   se o candidato aparece ao menos CONSULTA_CORRECAO_FREQ_2 vezes no catálogo;
+   sem candidato confiável a palavra fica como veio;
+3. sinônimos das tabelas de ``texto.py`` viram o valor canônico ("matte" ->
+   "fosco", "sem cheiro" -> "sem odor"). Se o sinônimo também é palavra do
+   catálogo ("seda" em "Toque de Seda"), ele fica e o canônico vai no fim.
+
+O vocabulário de cada tenant vem de nome, cor e chaves de features (mais
+linha, superfície e descrição, para não "corrigir" palavras comuns como
+"quarto") e dos sinônimos das tabelas; é montado no startup, atualizado pelo
+CRUD e reconstruído após CONSULTA_VOCAB_TTL_S. Consultas quase iguais chegam
+ao mesmo texto, o que aumenta o acerto dos caches (embedding, single-flight).
+"""
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core import metricas, recarga
+from app.core.config import settings
+from app.services.catalogo.cores import PALAVRAS as PALAVRAS_COR
+from app.services.ia.texto import ACABAMENTOS, AMBIENTES, FEATURES, _ascii
+
+# "p/", "c/", "s/" antes da tokenização; depois, token isolado -> expansão
+_BARRAS = [(re.compile(rf"\b{a}\s*/"), f" {b} ") for a, b in (("p", "para"), ("c", "com"), ("s", "sem"))]
+ABREVIACOES: Dict[str, str] = {
+    "p": "para", "pra": "para", "pro": "para o", "q": "que", "n": "nao", "nn": "nao",
+    "tb": "tambem", "tbm": "tambem", "vc": "voce", "vcs": "voces", "mt": "muito", "mto": "muito",
+    "mta": "muita", "msm": "mesmo", "qto": "quanto", "qdo": "quando", "pq": "porque", "td": "tudo",
+    "obg": "obrigado", "blz": "beleza", "aki": "aqui", "eh": "e",
+}
+# palavras curtas/comuns que nunca são "corrigidas"
+_COMUNS = {
+    "para", "que", "nao", "com", "sem", "uma", "um", "uns", "umas", "de", "do", "da", "dos", "das", "em", "no",
+    "na", "nos", "nas", "por", "pelo", "pela", "meu", "minha", "seu", "sua", "qual", "quais", "quero", "preciso",
+    "tinta", "tintas", "pintar", "pintura", "cor", "cores", "parede", "paredes", "teto", "piso", "quarto", "sala",
+    "cozinha", "banheiro", "casa", "muro", "porta", "janela", "madeira", "metal", "ferro", "alvenaria",
+    "reboco", "gesso", "area", "melhor", "boa", "bom", "barata", "barato", "rapido", "rapida", "forte",
+    "claro", "clara", "escuro", "escura", "desbota", "desbotar", "chuva", "sol", "umidade", "crianca",
+    "criancas", "tambem", "muito", "muita", "mesmo", "quanto", "quando", "porque", "tudo", "aqui", "voce",
+    "algo", "algum", "alguma", "coisa", "outra", "outro", "portao", "portoes", "varanda", "sacada", "garagem",
+    "quintal", "grade", "grades", "escada", "corredor", "escritorio", "lavanderia", "telhado", "calcada",
+    "piscina", "cerca", "movel", "moveis", "banho", "externa", "interna",
+}
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def _sinonimos() -> Dict[Tuple[str, ...], str]:
+    tabela: Dict[Tuple[str, ...], str] = {}
+    for grupo in (AMBIENTES, ACABAMENTOS):
+        for canonico, ss in grupo.items():
+            for s in ss:
+                tabela[tuple(s.split())] = canonico
+    for canonico, ss in FEATURES.items():
+        for s in ss | {canonico.replace("_", " ")}:
+            tabela[tuple(s.split())] = canonico.replace("_", " ")
+    return tabela
+
+_SINONIMOS = _sinonimos()
+_MAX_FRASE = max(len(k) for k in _SINONIMOS)
+
+def tokens(txt: str) -> List[str]:
+    return _TOKEN.findall(_ascii(txt))
+
+def _deletes(palavra: str, distancia: int) -> Set[str]:
+    atuais, todos = {palavra}, set()
+    for _ in range(distancia):
+        atuais = {p[:i] + p[i + 1:] for p in atuais for i in range(len(p))}
+        todos |= atuais
+    return todos
+
+def _distancia(a: str, b: str) -> int:
+    """Damerau-Levenshtein (transposição adjacente conta 1)."""
+    anterior2, anterior = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        atual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            custo = a[i - 1] != b[j - 1]
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+            if anterior2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                atual[j] = min(atual[j], anterior2[j - 2] + 1)
+        anterior2, anterior = anterior, atual
+    return anterior[-1]
+
+class Vocabulario:
+    """Palavras do catálogo + índice de deleções (SymSpell) para correção em O(variações)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frequencia: Counter = Counter()
+        self._catalogo: Set[str] = set()   # só palavras vindas das tintas (não das tabelas)
+        self._deletes: Dict[str, Set[str]] = {}
+        self._correcoes: Dict[str, Optional[str]] = {}
+        self.construido_em: Optional[float] = None
+
+    def _indexar(self, palavra: str) -> None:
+        if len(palavra) < settings.consulta_correcao_min or palavra.isdigit():
+            return
+        for d in _deletes(palavra, 2) | {palavra}:
+            self._deletes.setdefault(d, set()).add(palavra)
+
+    def adicionar(self, textos: Iterable[str], catalogo: bool = True) -> None:
+        """Acrescenta as palavras de ``textos`` (CRUD incremental ou carga)."""
+        with self._lock:
+            for txt in textos:
+                for p in tokens(txt):
+                    if p not in self._frequencia:
+                        self._indexar(p)
+                    self._frequencia[p] += 1
+                    if catalogo:
+                        self._catalogo.add(p)
+            self._correcoes.clear()
+
+    def reconstruir(self, textos: Iterable[str]) -> None:
+        novo = Vocabulario()
+        # nomes de cor e modificadores ("gelo", "claro") não são "corrigidos" para palavras do catálogo
+        novo.adicionar(_COMUNS | PALAVRAS_COR | {w for frase in _SINONIMOS for w in frase}, catalogo=False)
+        novo.adicionar(textos)
+        with self._lock:
+            self._frequencia, self._catalogo = novo._frequencia, novo._catalogo
+            self._deletes, self._correcoes = novo._deletes, {}
+            self.construido_em = time.monotonic()
+
+    def do_catalogo(self, palavra: str) -> bool:
+        return palavra in self._catalogo
+
+    def corrigir(self, palavra: str) -> str:
+        """Palavra do vocabulário mais próxima (ou a própria, se conhecida ou sem candidato confiável)."""
+        if palavra in self._frequencia or len(palavra) < settings.consulta_correcao_min or palavra.isdigit():
+            return palavra
+        with self._lock:
+            if palavra in self._correcoes:
+                return self._correcoes[palavra] or palavra
+            maximo = 2 if len(palavra) >= settings.consulta_correcao_min_2 else 1
+            candidatos = set()
+            for d in _deletes(palavra, maximo) | {palavra}:
+                candidatos |= self._deletes.get(d, set())
+            melhores = sorted(
+                (dist, -self._frequencia[c], c)
+                for c in candidatos
+                if (dist := _distancia(palavra, c)) <= maximo
+            )
+            correcao = None
+            if melhores:
+                dist, freq, c = melhores[0]
+                # 2 erros casam com muita palavra válida ("varanda" -> "laranja"): só candidatos frequentes
+                if dist <= 1 or -freq >= settings.consulta_correcao_freq_2:
+                    correcao = c
+            if len(self._correcoes) >= 10_000:
+                self._correcoes.clear()
+            self._correcoes[palavra] = correcao
+        return correcao or palavra
+
+    def __len__(self) -> int:
+        return len(self._frequencia)
+
+_vocabularios: Dict[str, Vocabulario] = {}
+_vocabularios_lock = threading.Lock()
+
+def vocabulario(tenant: str) -> Vocabulario:
+    with _vocabularios_lock:
+        return _vocabularios.setdefault(tenant, Vocabulario())
+
+def textos_tinta(t) -> List[str]:
+    """Textos de uma tinta (dict ou ORM) que entram no vocabulário."""
+    valor = t.get if isinstance(t, dict) else (lambda c: getattr(t, c, None))
+    campos = [str(valor(c) or "") for c in ("nome", "cor", "linha", "superficie_indicada", "descricao")]
+    return campos + [k.replace("_", " ") for k in (valor("features") or {})]
+
+def carregar(db: Session, tenant: Optional[str] = None) -> None:
+    """Reconstrói o vocabulário de um tenant ou, sem ``tenant``, de todos (startup)."""
+    sql = "SELECT tenant, nome, cor, linha, superficie_indicada, descricao, features FROM tintas WHERE descontinuada_em IS NULL"
+    linhas = db.execute(text(sql + (" AND tenant = :tenant" if tenant else "")), {"tenant": tenant}).mappings().all()
+    por_tenant: Dict[str, List[str]] = {tenant: []} if tenant else {}
+    for l in linhas:
+        por_tenant.setdefault(l["tenant"], []).extend(textos_tinta(dict(l)))
+    for t, textos in por_tenant.items():
+        vocabulario(t).reconstruir(textos)
+
+def _expandir(palavras: List[str], vocab: Vocabulario) -> List[str]:
+    saida, extras, i = [], [], 0
+    while i < len(palavras):
+        for n in range(min(_MAX_FRASE, len(palavras) - i), 0, -1):
+            canonico = _SINONIMOS.get(tuple(palavras[i:i + n]))
+            if canonico is not None:
+                break
+        else:
+            saida.append(palavras[i])
+            i += 1
+            continue
+        frase = " ".join(palavras[i:i + n])
+        if frase != canonico:
+            metricas.incrementar("consulta.sinonimos")
+            if n == 1 and vocab.do_catalogo(frase):
+                saida.append(frase)
+                extras.append(canonico)
+            else:
+                saida.append(canonico)
+        else:
+            saida.append(frase)
+        i += n
+    return saida + [e for e in extras if e not in saida]
+
+def canonizar(consulta: str, vocab: Optional[Vocabulario] = None) -> str:
+    """Consulta canônica: abreviações expandidas, grafia corrigida e sinônimos unificados."""
+    txt = _ascii(consulta)
+    for padrao, troca in _BARRAS:
+        txt = padrao.sub(troca, txt)
+    palavras = [w for p in _TOKEN.findall(txt) for w in ABREVIACOES.get(p, p).split()]
+    if vocab is not None and len(vocab):
+        corrigidas = [vocab.corrigir(p) for p in palavras]
+        metricas.incrementar("consulta.corrigidas", sum(a != b for a, b in zip(palavras, corrigidas)))
+        palavras = corrigidas
+    return " ".join(_expandir(palavras, vocab or Vocabulario()))
+
+def canonizar_consulta(db: Session, consulta: str, tenant: str) -> str:
+    """``canonizar`` com o vocabulário do tenant (relido em segundo plano após CONSULTA_VOCAB_TTL_S)."""
+    if not settings.consulta_normalizar:
+        return consulta
+    vocab = vocabulario(tenant)
+    recarga.se_expirado("vocabulario", vocab, settings.consulta_vocab_ttl_s, db, tenant, carregar)
+    with metricas.cronometro("consulta.normalizar"):
+        return canonizar(consulta, vocab) or consulta
@@ -0,0 +1,154 @@
+# app/services/ia/provedores.py
+"""Provedores de embeddings: OpenAI (API) ou local (CPU, sentence-transformers).
+
+Escolhido por EMBEDDING_PROVEDOR (``openai`` | ``local``). O provedor define o
+``modelo`` e a ``dim`` gravados junto de cada vetor em ``embeddings_tintas``;
+a busca só compara vetores do mesmo modelo, então índices gerados por
+provedores diferentes nunca se misturam.
+
+O provedor local carrega o modelo no primeiro uso e processa lotes
+(EMBEDDING_LOCAL_LOTE) num pool de threads próprio (EMBEDDING_LOCAL_WORKERS):
+torch/onnxruntime liberam o GIL durante a inferência.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from app.core import metricas
+from app.core.config import settings
+from app.services.ia.clientes import get_openai_client
+from app.services.ia.governador import estimar_tokens, get_governador
+
+# dimensão padrão por modelo conhecido (EMBEDDING_DIM sobrescreve)
+DIMENSOES = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+    "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2": 384,
+    "sentence-transformers/paraphrase-multilingual-mpnet-base-v2": 768,
+    "intfloat/multilingual-e5-small": 384,
+}
+
+class ProvedorIndisponivel(RuntimeError):
+    pass
+
+class ProvedorEmbeddings:
+    nome = ""
+
+    def __init__(self, modelo: str, dim: Optional[int] = None):
+        self.modelo = modelo
+        self.dim = dim or DIMENSOES.get(modelo) or 0
+        if not self.dim:
+            raise ValueError(f"Dimensão desconhecida para '{modelo}': defina EMBEDDING_DIM")
+
+    def disponivel(self) -> bool:
+        return True
+
+    def embed(self, textos: List[str]) -> List[list[float]]:
+        raise NotImplementedError
+
+class ProvedorOpenAI(ProvedorEmbeddings):
+    nome = "openai"
+
+    def disponivel(self) -> bool:
+        return get_openai_client() is not None
+
+    def embed(self, textos: List[str]) -> List[list[float]]:
+        client = get_openai_client()
+        if not client:
+            raise ProvedorIndisponivel("OPENAI_API_KEY não definido no .env")
+        vetores: List[list[float]] = []
+        for i in range(0, len(textos), settings.embedding_lote):
+            bloco = textos[i:i + settings.embedding_lote]
+            r = get_governador("embeddings").executar(
+                lambda: client.embeddings.create(model=self.modelo, input=bloco),
+                tokens_estimados=estimar_tokens(*bloco),
+            )
+            vetores.extend(d.embedding for d in sorted(r.data, key=lambda d: d.index))
+        return vetores
+
+class ProvedorLocal(ProvedorEmbeddings):
+    nome = "local"
+
+    def __init__(self, modelo: str, dim: Optional[int] = None):
+        super().__init__(modelo, dim)
+        self._lock = threading.Lock()
+        self._modelo = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _carregar(self):
+        with self._lock:
+            if self._modelo is None:
+                try:
+                    from sentence_transformers import SentenceTransformer  # dependência opcional
+                except ImportError as e:
+                    raise ProvedorIndisponivel("EMBEDDING_PROVEDOR=local exige sentence-transformers") from e
+                kwargs = {"device": "cpu"}
+                if settings.embedding_local_backend != "torch":
+                    kwargs["backend"] = settings.embedding_local_backend  # ex.: onnx
+                with metricas.cronometro("embeddings.local.carga"):
+                    modelo = SentenceTransformer(self.modelo, **kwargs)
+                dim = modelo.get_sentence_embedding_dimension()
+                if dim != self.dim:
+                    raise ProvedorIndisponivel(f"{self.modelo} gera vetores de {dim} dimensões, esperado {self.dim}")
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.embedding_local_workers, thread_name_prefix="embeddings-local"
+                )
+                self._modelo = modelo
+            return self._modelo
+
+    def disponivel(self) -> bool:
+        try:
+            self._carregar()
+            return True
+        except ProvedorIndisponivel as e:
+            print(f"⚠️ {str(e)}")
+            return False
+
+    def embed(self, textos: List[str]) -> List[list[float]]:
+        modelo = self._carregar()
+        tamanho = settings.embedding_local_lote
+
+        def _lote(bloco: List[str]) -> List[list[float]]:
+            # normalizado: cosseno no pgvector = produto interno
+            return modelo.encode(bloco, batch_size=tamanho, normalize_embeddings=True, convert_to_numpy=True).tolist()
+
+        blocos = [textos[i:i + tamanho] for i in range(0, len(textos), tamanho)]
+        with metricas.cronometro("embeddings.local"):
+            if len(blocos) == 1:
+                return _lote(blocos[0])
+            return [v for vetores in self._executor.map(_lote, blocos) for v in vetores]
+
+    def fechar(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+_PROVEDORES = {"openai": ProvedorOpenAI, "local": ProvedorLocal}
+_lock_instancias = threading.Lock()
+_instancias: Dict[Tuple[str, str, Optional[int]], ProvedorEmbeddings] = {}
+
+def provedor_para(nome: str, modelo: str, dim: Optional[int] = None) -> ProvedorEmbeddings:
+    """Provedor de um modelo específico (ex.: o da versão ativa do índice), um por processo."""
+    if nome not in _PROVEDORES:
+        raise ValueError(f"Provedor de embeddings inválido: {nome}")
+    chave = (nome, modelo, dim or DIMENSOES.get(modelo))
+    with _lock_instancias:
+        provedor = _instancias.get(chave)
+        if provedor is None:
+            provedor = _instancias[chave] = _PROVEDORES[nome](modelo, dim)
+        return provedor
+
+def get_provedor() -> ProvedorEmbeddings:
+    """Provedor configurado (EMBEDDING_PROVEDOR): é ele que gera as novas versões do índice."""
+    modelo = settings.embedding_local_modelo if settings.embedding_provedor == "local" else settings.embedding_model
+    return provedor_para(settings.embedding_provedor, modelo or "text-embedding-3-small", settings.embedding_dim or None)
+
+def aquecer() -> None:
+    """Carrega o modelo local no startup (a primeira consulta não paga a carga)."""
+    if isinstance(get_provedor(), ProvedorLocal):
+        get_provedor().disponivel()
+
+def fechar_provedor() -> None:
+    with _lock_instancias:
+        for provedor in _instancias.values():
+            if isinstance(provedor, ProvedorLocal):
+                provedor.fechar()
@@ -1,36 +1,38 @@
 # app/services/ia/recomendador_agente.py - VERSÃO COMPLETA COM LLM
 
 from app.services.ia.embeddings import embed_texto
+from app.core.config import settings
+from app.services.ia import versoes
+from app.services.ia.vetores import coluna_vetor, filtro_versao
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from openai import OpenAI
-from app.core.config import settings
+from app.services.ia.clientes import get_openai_client
+from app.services.ia.governador import estimar_tokens, get_governador
 import json
 from typing import List, Dict, Any
 
-# Cliente OpenAI
-client = OpenAI(api_key=settings.openai_api_key) if settings.openai_api_key else None
-
 def buscar_produtos_similares(db: Session, consulta: str, limite: int = 3) -> List[Dict]:
     """
     PASSO 1: Busca produtos similares usando embeddings + pgvector
     """
-    if not client:
-        raise RuntimeError("OPENAI_API_KEY não configurada")
+    versao = versoes.ativa(db, settings.tenant_padrao)
+    if versao is None or not versao.get_provedor().disponivel():
+        raise RuntimeError("Índice de embeddings indisponível")
     
-    # Gera embedding da consulta
-    embedding_consulta = embed_texto(consulta)
+    # Gera embedding da consulta (mesmo modelo da versão ativa)
+    embedding_consulta = embed_texto(consulta, versao.get_provedor())
     
     # Busca por similaridade usando pgvector
-    sql = text("""
+    sql = text(f"""
         SELECT 
             t.id, t.nome, t.cor, t.ambiente, t.acabamento, 
             t.features, t.linha, t.descricao, t.superficie_indicada,
-            te.conteudo,
-            (1 - (te.embedding <=> :embedding::vector)) as score
+            te.conteudo, te.modelo,
+            (1 - ({coluna_vetor(versao.dim)} <=> CAST(:embedding AS vector))) as score
         FROM tintas t 
         JOIN embeddings_tintas te ON t.id = te.tinta_id
-        ORDER BY te.embedding <=> :embedding::vector
+        WHERE te.tenant = :tenant AND {filtro_versao(versao)}
+        ORDER BY {coluna_vetor(versao.dim)} <=> CAST(:embedding AS vector)
         LIMIT :limite
     """)
     
@@ -39,7 +41,8 @@ def buscar_produtos_similares(db: Session, consulta: str, limite: int = 3) -> Li
     
     resultados = db.execute(sql, {
         "embedding": embedding_str,
-        "limite": limite
+        "limite": limite,
+        "tenant": versao.tenant
     }).mappings().all()
     
     return [dict(item) for item in resultados]
@@ -129,6 +132,7 @@ def chamar_llm_para_recomendacao(consulta_usuario: str, contexto_produtos: str)
     """
     PASSO 4: Chama OpenAI para gerar resposta natural do Conselheiro Suvinil
     """
+    client = get_openai_client()
     if not client:
         return "Erro: OpenAI não configurado. Configure OPENAI_API_KEY no .env"
     
@@ -145,14 +149,17 @@ Seja direto, útil e conversacional.
     """.strip()
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": prompt_sistema},
-                {"role": "user", "content": prompt_usuario}
-            ],
-            max_tokens=400,
-            temperature=0.7
+        response = get_governador("chat").executar(
+            lambda: client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": prompt_sistema},
+                    {"role": "user", "content": prompt_usuario}
+                ],
+                max_tokens=400,
+                temperature=0.7
+            ),
+            tokens_estimados=estimar_tokens(prompt_sistema, prompt_usuario) + 400,
         )
         
         return response.choices[0].message.content.strip()
@@ -181,7 +188,7 @@ def recomendar_com_explicacao(db: Session, consulta: str, limite: int = 3) -> Di
             "produtos_encontrados": produtos,
             "contexto_usado": contexto,
             "consulta_original": consulta,
-            "modelo_embedding": "text-embedding-3-small",
+            "modelo_embedding": produtos[0].get("modelo") if produtos else None,
             "modelo_llm": "gpt-4o-mini"
         }
         
@@ -0,0 +1,187 @@
+# app/services/ia/recuperacao.py
+"""Camada de recuperação compartilhada (chat, /busca e lote).
+
+Embedding da consulta (com cache, no modelo da versão ativa do índice) ->
+candidatos pelo índice HNSW com filtros estruturados -> re-ranking local ->
+diversidade (variantes de cor agrupadas + MMR, ver ``diversidade``) ->
+janela paginada.
+
+Se a consulta pede uma cor ("azul mais claro", "#8fb3d9"), as tintas de cor
+mais próxima no índice Lab (``catalogo/cores.py``) entram como candidatas e a
+proximidade de cor pesa BUSCA_COR_PESO no score, antes da diversidade.
+
+Features do vocabulário citadas na consulta ("sem cheiro" -> ``sem_odor``)
+entram como predicado ``features @> ...`` (índice GIN); se o catálogo não
+tiver itens suficientes com elas, a busca é refeita sem esse filtro inferido.
+"""
+import json
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core import metricas
+from app.core.config import settings
+from app.services.ia.rerank import extrair_intencao, reranquear
+from app.services.catalogo import cores
+from app.services.ia import diversidade, versoes
+from app.services.ia.vetores import _to_vec_literal, coluna_vetor, embed_consulta, filtro_versao
+
+@dataclass
+class Filtros:
+    ambiente: Optional[str] = None
+    acabamento: Optional[str] = None
+    linha: Optional[str] = None
+    features: List[str] = field(default_factory=list)
+    ids: List[str] = field(default_factory=list)  # restringe a essas tintas (ex.: vizinhas de cor)
+
+    def vazio(self) -> bool:
+        return not (self.ambiente or self.acabamento or self.linha or self.features or self.ids)
+
+    def sql(self) -> tuple[str, Dict[str, Any]]:
+        clausulas, params = [], {}
+        if self.ambiente:
+            clausulas.append("t.ambiente::text = :f_ambiente")
+            params["f_ambiente"] = self.ambiente
+        if self.acabamento:
+            clausulas.append("t.acabamento::text = :f_acabamento")
+            params["f_acabamento"] = self.acabamento
+        if self.linha:
+            clausulas.append("lower(t.linha) = lower(:f_linha)")
+            params["f_linha"] = self.linha
+        if self.features:
+            clausulas.append("t.features @> CAST(:f_features AS jsonb)")
+            params["f_features"] = json.dumps({f: True for f in self.features})
+        if self.ids:
+            clausulas.append("t.id = ANY(CAST(:f_ids AS uuid[]))")
+            params["f_ids"] = list(self.ids)
+        return (" AND ".join(clausulas) or "TRUE"), params
+
+def buscar_candidatos(
+    db: Session,
+    vetor: List[float],
+    limite: int,
+    filtros: Optional[Filtros] = None,
+    tenant: Optional[str] = None,
+    versao: Optional[versoes.VersaoIndice] = None,
+    com_vetor: bool = False,
+) -> List[Dict[str, Any]]:
+    """Top-``limite`` por cosseno via HNSW, já filtrado, só na versão ativa do índice do tenant.
+
+    ``com_vetor`` traz também o embedding gravado (chave ``vetor``, binário do
+    ``vector_send``: ~4x menor que o texto e sem parsing), usado pelo MMR.
+    """
+    tenant = tenant or settings.tenant_padrao
+    versao = versao or versoes.ativa(db, tenant)
+    if versao is None:
+        return []
+    filtros = filtros or Filtros()
+    where, params = filtros.sql()
+    db.execute(text(f"SET LOCAL hnsw.ef_search = {max(40, int(limite))}"))
+    if not filtros.vazio() and settings.hnsw_iterative_scan:
+        # filtros descartam linhas depois do índice; o scan iterativo continua até completar o limite
+        db.execute(text(f"SET LOCAL hnsw.iterative_scan = {settings.hnsw_iterative_scan}"))
+    sql = text(f"""
+        SELECT
+            t.id::text as id, t.nome, t.cor, t.ambiente, t.acabamento,
+            t.features, t.linha, t.descricao, t.superficie_indicada,
+            t.atualizado_em, t.contexto_prompt, t.exibicao::text AS exibicao,
+            te.conteudo,{" vector_send(te.embedding) AS vetor," if com_vetor else ""}
+            (1 - ({coluna_vetor(versao.dim)} <=> :embedding_vec)) as score
+        FROM tintas t
+        JOIN embeddings_tintas te ON t.id = te.tinta_id
+        WHERE te.tenant = :tenant AND t.tenant = :tenant AND {filtro_versao(versao)} AND {where}
+        ORDER BY {coluna_vetor(versao.dim)} <=> :embedding_vec
+        LIMIT :limite
+    """)
+    resultados = db.execute(sql, {
+        "embedding_vec": _to_vec_literal(vetor),
+        "limite": limite,
+        "tenant": tenant,
+        **params,
+    }).mappings().all()
+    return [dict(item) for item in resultados]
+
+def buscar(
+    db: Session,
+    consulta: str,
+    limite: int = 3,
+    offset: int = 0,
+    filtros: Optional[Filtros] = None,
+    rerank: bool = True,
+    tempos: Optional[Dict[str, float]] = None,
+    tenant: Optional[str] = None,
+    diversificar: Optional[bool] = None,
+    agrupar_cores: Optional[bool] = None,
+    cor: Optional[cores.Cor] = None,
+) -> List[Dict[str, Any]]:
+    """Busca semântica completa; ``tempos`` (se passado) recebe ms de cada etapa.
+
+    ``diversificar``/``agrupar_cores`` (padrão: BUSCA_MMR/BUSCA_AGRUPAR_CORES)
+    ligam a etapa de diversidade sobre os candidatos re-ranqueados. ``cor``
+    (padrão: ``cores.extrair_cor(consulta)``) aproxima o resultado da cor pedida.
+    """
+    tempos = tempos if tempos is not None else {}
+    janela = offset + limite
+    diversificar = settings.busca_mmr if diversificar is None else diversificar
+    agrupar_cores = settings.busca_agrupar_cores if agrupar_cores is None else agrupar_cores
+    diversidade_ligada = diversificar or agrupar_cores
+    cor = (cor or cores.extrair_cor(consulta)) if settings.busca_cor_peso > 0 else None
+    # variantes agrupadas/preteridas pelo MMR e a reponderação por cor exigem um conjunto maior que a janela
+    amplo = rerank or diversidade_ligada or cor is not None
+    candidatos = max(janela, settings.rerank_candidatos) if amplo else janela
+    versao = versoes.ativa(db, tenant or settings.tenant_padrao)
+    if versao is None:
+        return []
+
+    inicio = time.perf_counter()
+    # a consulta é embedada com o modelo da versão ativa, não com o provedor configurado
+    vetor = embed_consulta(consulta, versao.get_provedor())
+    tempos["embedding"] = (time.perf_counter() - inicio) * 1000
+
+    inicio = time.perf_counter()
+    filtros = filtros or Filtros()
+    inferidas = []
+    if settings.busca_features_consulta:
+        inferidas = [f for f in extrair_intencao(consulta)["features"] if f not in filtros.features]
+    itens = []
+    if inferidas:
+        itens = buscar_candidatos(
+            db, vetor, candidatos, replace(filtros, features=sorted({*filtros.features, *inferidas})), tenant, versao,
+            diversificar,
+        )
+        metricas.incrementar("busca.features.filtradas" if len(itens) >= janela else "busca.features.relaxadas")
+    if len(itens) < janela:
+        itens = buscar_candidatos(db, vetor, candidatos, filtros, tenant, versao, diversificar)
+    tempos["db"] = (time.perf_counter() - inicio) * 1000
+
+    indice_cores = None
+    if cor is not None:
+        inicio = time.perf_counter()
+        indice_cores = cores.indice_atual(db, tenant or settings.tenant_padrao)
+        vistos = {i["id"] for i in itens}
+        vizinhas = indice_cores.vizinhos(
+            cor.lab, settings.rerank_candidatos,
+            {"ambiente": filtros.ambiente, "acabamento": filtros.acabamento, "linha": filtros.linha}, vistos,
+        )
+        if vizinhas:
+            # mesmos filtros e score semântico, restrito às tintas de cor mais próxima
+            itens += buscar_candidatos(
+                db, vetor, len(vizinhas), replace(filtros, ids=[v["id"] for v in vizinhas]), tenant, versao,
+                diversificar,
+            )
+        tempos["cor"] = (time.perf_counter() - inicio) * 1000
+
+    if rerank:
+        inicio = time.perf_counter()
+        itens = reranquear(consulta, itens, len(itens) if amplo else janela)
+        tempos["rerank"] = (time.perf_counter() - inicio) * 1000
+    else:
+        itens = [{**i, "score": float(i["score"]), "score_semantico": float(i["score"])} for i in itens]
+    if indice_cores is not None:
+        itens = cores.reponderar(itens, cor, indice_cores, settings.busca_cor_peso)
+    if diversidade_ligada:
+        inicio = time.perf_counter()
+        itens = diversidade.diversificar(itens, janela, agrupar_cores, diversificar)
+        tempos["diversidade"] = (time.perf_counter() - inicio) * 1000
+    return itens[offset:janela]
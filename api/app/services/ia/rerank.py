@@ -0,0 +1,132 @@
+# app/services/ia/rerank.py
+"""Re-ranking local dos candidatos trazidos pelo índice ANN.
+
+O pgvector devolve um conjunto largo (``RERANK_CANDIDATOS``) ordenado só por
+cosseno; aqui ele é reordenado combinando:
+- score semântico do pgvector;
+- casamento de atributos pedidos na consulta (ambiente, acabamento, features);
+- score lexical (termos da consulta presentes no produto);
+- opcionalmente, um cross-encoder pequeno em CPU (``RERANK_MODELO``).
+"""
+import json
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set
+from app.core.config import settings
+from app.services.ia.texto import ACABAMENTOS, AMBIENTES, FEATURES, _ascii
+
+STOPWORDS = {
+    "a","o","as","os","um","uma","de","da","do","das","dos","em","no","na","nos","nas",
+    "para","pra","pro","por","com","sem","que","e","ou","meu","minha","quero","preciso",
+    "tinta","tintas","algo","uma","pintar","qual","quais","me","eu",
+}
+
+def _termos(txt: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", _ascii(txt))
+
+def _pares(tabela: Dict[str, Set[str]]) -> List[tuple]:
+    # sinônimos mais longos primeiro ("semi brilho" antes de "brilho")
+    return sorted(((s, c) for c, ss in tabela.items() for s in ss), key=lambda p: -len(p[0]))
+
+_PARES_AMBIENTE = _pares(AMBIENTES)
+_PARES_ACABAMENTO = _pares(ACABAMENTOS)
+_PARES_FEATURES = _pares({c: ss | {c.replace("_", " ")} for c, ss in FEATURES.items()})
+
+def _detectar(pares: List[tuple], consulta_ascii: str) -> Optional[str]:
+    texto = f" {consulta_ascii} "
+    for sinonimo, canonico in pares:
+        if f" {sinonimo} " in texto:
+            return canonico
+    return None
+
+def _detectar_todos(pares: List[tuple], consulta_ascii: str) -> List[str]:
+    texto = f" {consulta_ascii} "
+    return sorted({canonico for sinonimo, canonico in pares if f" {sinonimo} " in texto})
+
+def _features_ativas(produto: Dict[str, Any]) -> Set[str]:
+    feats = produto.get("features") or {}
+    if isinstance(feats, str):
+        try:
+            feats = json.loads(feats)
+        except ValueError:
+            return set()
+    return {k for k, v in feats.items() if v} if isinstance(feats, dict) else set()
+
+def extrair_intencao(consulta: str) -> Dict[str, Any]:
+    """Atributos explícitos na consulta (ambiente, acabamento, features do vocabulário e termos)."""
+    termos = _termos(consulta)
+    consulta_ascii = " ".join(termos)
+    return {
+        "ambiente": _detectar(_PARES_AMBIENTE, consulta_ascii),
+        "acabamento": _detectar(_PARES_ACABAMENTO, consulta_ascii),
+        "features": _detectar_todos(_PARES_FEATURES, consulta_ascii),
+        "termos": [t for t in termos if t not in STOPWORDS],
+        "slug": "_".join(termos),
+    }
+
+def _score_atributos(intencao: Dict[str, Any], produto: Dict[str, Any]) -> float:
+    pedidos = acertos = 0
+    for campo in ("ambiente", "acabamento"):
+        if intencao[campo]:
+            pedidos += 1
+            acertos += str(produto.get(campo) or "") == intencao[campo]
+    feats = _features_ativas(produto)
+    if intencao["features"]:
+        pedidos += 1
+        acertos += len(feats.intersection(intencao["features"])) / len(intencao["features"])
+    elif feats:
+        # feature "sem_odor" casa com consulta "... sem odor ..."
+        citadas = [f for f in feats if f and f"_{f}_" in f"_{intencao['slug']}_"]
+        if citadas:
+            pedidos += 1
+            acertos += 1
+    return acertos / pedidos if pedidos else 0.0
+
+def _score_lexical(intencao: Dict[str, Any], produto: Dict[str, Any]) -> float:
+    termos = intencao["termos"]
+    if not termos:
+        return 0.0
+    texto = " ".join(str(produto.get(c) or "") for c in ("nome", "cor", "linha", "superficie_indicada", "conteudo"))
+    vocab = set(_termos(texto)) | {t for f in _features_ativas(produto) for t in f.split("_")}
+    return sum(t in vocab for t in termos) / len(termos)
+
+@lru_cache(maxsize=1)
+def _cross_encoder():
+    if not settings.rerank_modelo:
+        return None
+    try:
+        from sentence_transformers import CrossEncoder  # dependência opcional
+    except ImportError:
+        print("⚠️ sentence-transformers não instalado; re-ranking sem cross-encoder")
+        return None
+    return CrossEncoder(settings.rerank_modelo, device="cpu")
+
+def reranquear(consulta: str, candidatos: List[Dict[str, Any]], limite: int) -> List[Dict[str, Any]]:
+    """Reordena ``candidatos`` e devolve os ``limite`` melhores.
+
+    ``score`` passa a ser o score combinado; o cosseno original fica em
+    ``score_semantico``.
+    """
+    if not candidatos:
+        return []
+    intencao = extrair_intencao(consulta)
+    modelo = _cross_encoder()
+    scores_ce = None
+    if modelo is not None:
+        pares = [(consulta, c.get("conteudo") or c["nome"]) for c in candidatos]
+        scores_ce = [1 / (1 + math.exp(-float(s))) for s in modelo.predict(pares, batch_size=32)]
+
+    pesos = (settings.rerank_peso_semantico, settings.rerank_peso_atributos,
+             settings.rerank_peso_lexical, settings.rerank_peso_modelo if scores_ce else 0.0)
+    total = sum(pesos) or 1.0
+
+    reordenados = []
+    for i, c in enumerate(candidatos):
+        semantico = float(c.get("score") or 0.0)
+        partes = (semantico, _score_atributos(intencao, c), _score_lexical(intencao, c),
+                  scores_ce[i] if scores_ce else 0.0)
+        final = sum(p * s for p, s in zip(pesos, partes)) / total
+        reordenados.append({**c, "score": final, "score_semantico": semantico})
+    reordenados.sort(key=lambda c: c["score"], reverse=True)
+    return reordenados[:limite]
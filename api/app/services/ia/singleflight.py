@@ -0,0 +1,63 @@
+# app/services/ia/singleflight.py
+"""Deduplicação de chamadas idênticas em andamento ("single-flight").
+
+Quando várias requisições iguais chegam ao mesmo tempo, só a primeira
+(líder) executa embedding + busca + LLM; as demais esperam e recebem o
+mesmo resultado. O resultado é compartilhado: quem o recebe não deve mutá-lo.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+from app.core import metricas
+from app.services.ia.texto import _ascii
+
+class _Chamada:
+    __slots__ = ("evento", "resultado", "erro", "seguidores")
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado: Any = None
+        self.erro: Optional[BaseException] = None
+        self.seguidores = 0
+
+class SingleFlight:
+    def __init__(self, nome: str, espera_max_s: float = 30.0):
+        self.nome = nome
+        self.espera_max_s = espera_max_s
+        self._lock = threading.Lock()
+        self._em_voo: Dict[Hashable, _Chamada] = {}
+
+    def executar(self, chave: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            chamada = self._em_voo.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = self._em_voo[chave] = _Chamada()
+            else:
+                chamada.seguidores += 1
+
+        if not lider:
+            metricas.incrementar(f"singleflight.{self.nome}.coalescidas")
+            if not chamada.evento.wait(self.espera_max_s):
+                # líder travado: segue sozinho em vez de prender a requisição
+                metricas.incrementar(f"singleflight.{self.nome}.espera_esgotada")
+                return fn()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        metricas.incrementar(f"singleflight.{self.nome}.execucoes")
+        try:
+            chamada.resultado = fn()
+            return chamada.resultado
+        except BaseException as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock:
+                self._em_voo.pop(chave, None)
+            chamada.evento.set()
+
+def chave_consulta(consulta: str, **params: Any) -> tuple:
+    """Chave canônica: texto sem acento/caixa/espaços extras + parâmetros ordenados."""
+    texto = " ".join(_ascii(consulta).split())
+    return (texto, tuple(sorted(params.items())))
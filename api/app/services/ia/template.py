@@ -0,0 +1,69 @@
+# app/services/ia/template.py
+"""Resposta no formato do Conselheiro Suvinil montada sem LLM.
+
+Usada quando o primeiro produto é um match de alta confiança (score alto e
+boa margem para o segundo) e a pergunta é simples: a resposta sai em
+milissegundos a partir dos atributos e features do produto.
+"""
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.services.ia.rerank import _features_ativas, extrair_intencao
+
+MODOS = ("auto", "template", "llm")
+
+# termos que indicam pergunta aberta/comparativa -> melhor deixar com o LLM
+_TERMOS_COMPLEXOS = {"diferenca", "comparar", "compara", "melhor", "ou", "versus", "vs", "porque", "como"}
+
+_FRASE_AMBIENTE = {
+    "interno": "É indicada para ambientes internos",
+    "externo": "Foi feita para áreas externas e aguenta sol e chuva",
+}
+
+def confianca_alta(consulta: str, produtos: List[Dict[str, Any]]) -> bool:
+    """Top-1 acima do score mínimo, com margem para o top-2, e pergunta simples."""
+    if not produtos:
+        return False
+    top = float(produtos[0].get("score") or 0.0)
+    segundo = float(produtos[1].get("score") or 0.0) if len(produtos) > 1 else 0.0
+    if top < settings.template_score_min or top - segundo < settings.template_margem_min:
+        return False
+    termos = extrair_intencao(consulta)["termos"]
+    return len(termos) <= settings.template_max_termos and not _TERMOS_COMPLEXOS & set(termos)
+
+def escolher_modo(consulta: str, produtos: List[Dict[str, Any]], modo: Optional[str] = None) -> str:
+    """Resolve ``auto`` para ``template`` ou ``llm``; ``template``/``llm`` forçam o caminho."""
+    modo = modo or settings.resposta_modo
+    if modo in ("template", "llm"):
+        return modo
+    return "template" if confianca_alta(consulta, produtos) else "llm"
+
+def _rotulo(feature: str) -> str:
+    return feature.replace("_", " ").capitalize()
+
+def renderizar_resposta(consulta: str, produtos: List[Dict[str, Any]]) -> str:
+    produto = produtos[0]
+    intencao = extrair_intencao(consulta)
+    slug = f"_{intencao['slug']}_"
+
+    # features citadas na consulta primeiro, depois as demais
+    feats = sorted(_features_ativas(produto), key=lambda f: (f"_{f}_" not in slug, f))
+    bullets = [_rotulo(f) for f in feats[:3]]
+    if len(bullets) < 3 and produto.get("acabamento"):
+        bullets.append(f"Acabamento {produto['acabamento']}")
+    if len(bullets) < 3 and produto.get("superficie_indicada"):
+        bullets.append(f"Indicada para {produto['superficie_indicada']}")
+
+    ambiente = str(produto.get("ambiente") or "")
+    porque = _FRASE_AMBIENTE.get(ambiente, "Atende bem o que você descreveu")
+    if feats and f"_{feats[0]}_" in slug:
+        porque += f" e é {_rotulo(feats[0]).lower()}"
+
+    linhas = [
+        f"Para o que você precisa, recomendo a **{produto['nome']}** na cor {produto['cor']}.",
+        f"{porque}.",
+        "",
+        *[f"• {b}" for b in bullets],
+        "",
+        "💡 Já escolheu a cor ou quer sugestões de tons? 🎨",
+    ]
+    return "\n".join(linhas)
@@ -0,0 +1,72 @@
+# app/services/ia/texto.py
+"""Normalização de texto e tabelas de sinônimos compartilhadas (ingestão e busca)."""
+import unicodedata
+from typing import Any, Dict, Optional, Set
+
+def _norm(v: Any) -> str:
+    return (str(v or "").strip())
+
+def _slug(s: str) -> str:
+    s = s.replace("\ufeff", "").replace("\xa0", " ")
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = s.strip().lower().replace("\n", " ").replace("\r", " ")
+    for ch in ("  ", "   "): s = s.replace(ch, " ")
+    for ch in (" ", "-", "/", "\\", "(", ")", "."): s = s.replace(ch, "_")
+    while "__" in s: s = s.replace("__", "_")
+    return s.strip("_")
+
+def _ascii(v: str) -> str:
+    v = str(v or "").strip().lower()
+    v = unicodedata.normalize("NFKD", v)
+    return "".join(ch for ch in v if not unicodedata.combining(ch))
+
+# valor canônico -> sinônimos aceitos (já sem acento)
+AMBIENTES: Dict[str, Set[str]] = {
+    "interno": {"interno","interior","dentro","area interna"},
+    "externo": {"externo","exterior","fora","area externa","fachada"},
+}
+ACABAMENTOS: Dict[str, Set[str]] = {
+    "fosco": {"fosco","mate","matte","fosco completo"},
+    "acetinado": {"acetinado","satin","seda"},
+    "semibrilho": {"semibrilho","semi brilho","eggshell","egg shell","casca de ovo"},
+    "brilho": {"brilho","brilhante","alto brilho","gloss"},
+}
+
+# vocabulário canônico de features (chave gravada no jsonb -> sinônimos em texto livre)
+FEATURES: Dict[str, Set[str]] = {
+    "lavavel": {"lavavel","lavaveis","alta lavabilidade","lavabilidade","facil de limpar","facil limpeza"},
+    "sem_odor": {"sem odor","sem cheiro","baixo odor","odor suave","inodora","sem cheiro forte"},
+    "anti_mofo": {"anti mofo","antimofo","contra mofo","resistente a mofo","antifungo","anti fungo"},
+    "alta_cobertura": {"alta cobertura","boa cobertura","cobre bem","maior cobertura"},
+    "anti_respingo": {"anti respingo","antirrespingo","nao respinga","sem respingo"},
+    "secagem_rapida": {"secagem rapida","seca rapido","rapida secagem"},
+    "impermeabilizante": {"impermeabilizante","impermeavel","a prova d agua","protecao contra chuva"},
+}
+
+def _canonico(tabela: Dict[str, Set[str]], x: str) -> Optional[str]:
+    for canonico, sinonimos in tabela.items():
+        if x in sinonimos:
+            return canonico
+    return None
+
+def ambiente_ou_none(v: str) -> Optional[str]:
+    return _canonico(AMBIENTES, _ascii(v).replace("-", " "))
+
+def acabamento_ou_none(v: str) -> Optional[str]:
+    return _canonico(ACABAMENTOS, _ascii(v).replace("-", " ").replace("_", " "))
+
+def feature_ou_none(v: str) -> Optional[str]:
+    x = _ascii(v).replace("-", " ").replace("_", " ").replace("'", " ")
+    x = " ".join(x.split())
+    return x.replace(" ", "_") if x.replace(" ", "_") in FEATURES else _canonico(FEATURES, x)
+
+def canonizar_features(features: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chaves do vocabulário canônico; fora dele ficam como slug."""
+    return {(feature_ou_none(k) or _slug(k)): v for k, v in (features or {}).items() if _slug(str(k))}
+
+def map_ambiente(v: str) -> str:
+    return ambiente_ou_none(v) or "interno"
+
+def map_acabamento(v: str) -> str:
+    return acabamento_ou_none(v) or "fosco"
@@ -0,0 +1,300 @@
+# app/services/ia/versoes.py
+"""Versões do índice de embeddings por tenant (reindexação blue/green).
+
+Cada versão é uma subpartição da partição do tenant (``emb_<tenant>_v<N>``)
+com seus próprios HNSW. A busca lê só a versão apontada por ``indice_ativo``;
+uma reindexação grava numa versão nova em transações curtas, valida
+(cobertura do catálogo + recall@k do HNSW contra a busca exata numa amostra)
+e só então troca o ponteiro — um UPDATE de uma linha. As versões anteriores
+ficam guardadas para rollback até serem descartadas. Cada worker relê o
+ponteiro a cada INDICE_VERSAO_TTL_S.
+
+CLI (a partir de ``api/``):
+    python -m app.services.ia.versoes listar --tenant suvinil
+    python -m app.services.ia.versoes reindexar catalogo.csv --tenant suvinil
+    python -m app.services.ia.versoes ativar 7
+    python -m app.services.ia.versoes rollback --tenant suvinil
+    python -m app.services.ia.versoes descartar 5
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core import metricas
+from app.core.config import settings
+from app.services.ia.provedores import ProvedorEmbeddings, get_provedor, provedor_para
+from app.services.ia.vetores import _to_vec_literal, coluna_vetor, embed_textos, filtro_versao, garantir_indice
+
+@dataclass(frozen=True)
+class VersaoIndice:
+    versao: int
+    tenant: str
+    provedor: str
+    modelo: str
+    dim: int
+
+    @property
+    def tabela(self) -> str:
+        return f"emb_{self.tenant}_v{self.versao}"
+
+    def get_provedor(self) -> ProvedorEmbeddings:
+        """Provedor que gerou os vetores da versão (as consultas usam o mesmo modelo)."""
+        return provedor_para(self.provedor, self.modelo, self.dim)
+
+class VersaoInvalida(ValueError):
+    pass
+
+_COLUNAS = "i.versao, i.tenant, i.provedor, i.modelo, i.dim"
+
+_lock = threading.Lock()
+_ativas: Dict[str, Tuple[Optional[VersaoIndice], float]] = {}
+
+def ativa(db: Session, tenant: str) -> Optional[VersaoIndice]:
+    """Versão lida pela busca do tenant (``None`` = ainda não indexado), em cache."""
+    with _lock:
+        cache = _ativas.get(tenant)
+    if cache is not None and time.monotonic() - cache[1] < settings.indice_versao_ttl_s:
+        return cache[0]
+    linha = db.execute(text(f"""
+        SELECT {_COLUNAS} FROM indice_ativo a JOIN indices_embeddings i ON i.versao = a.versao
+        WHERE a.tenant = :tenant
+    """), {"tenant": tenant}).mappings().first()
+    versao = VersaoIndice(**linha) if linha else None
+    with _lock:
+        _ativas[tenant] = (versao, time.monotonic())
+    return versao
+
+def invalidar(tenant: Optional[str] = None) -> None:
+    with _lock:
+        if tenant is None:
+            _ativas.clear()
+        else:
+            _ativas.pop(tenant, None)
+
+def obter(db: Session, versao: int) -> VersaoIndice:
+    linha = db.execute(
+        text(f"SELECT {_COLUNAS} FROM indices_embeddings i WHERE i.versao = :v"), {"v": versao}
+    ).mappings().first()
+    if linha is None:
+        raise VersaoInvalida(f"versão {versao} não existe")
+    return VersaoIndice(**linha)
+
+def listar(db: Session, tenant: str) -> List[Dict[str, Any]]:
+    return [dict(l) for l in db.execute(text("""
+        SELECT i.versao, i.provedor, i.modelo, i.dim, i.status, i.linhas, i.recall,
+               i.criado_em, i.ativado_em, (a.versao IS NOT NULL) AS ativa
+        FROM indices_embeddings i
+        LEFT JOIN indice_ativo a ON a.versao = i.versao
+        WHERE i.tenant = :tenant
+        ORDER BY i.versao DESC
+    """), {"tenant": tenant}).mappings()]
+
+def criar(db: Session, tenant: str, provedor: Optional[ProvedorEmbeddings] = None) -> VersaoIndice:
+    """Registra uma versão em construção e cria sua partição (herda PK e HNSW do pai)."""
+    provedor = provedor or get_provedor()
+    numero = db.execute(text("""
+        INSERT INTO indices_embeddings (tenant, provedor, modelo, dim)
+        VALUES (:tenant, :provedor, :modelo, :dim)
+        RETURNING versao
+    """), {"tenant": tenant, "provedor": provedor.nome, "modelo": provedor.modelo, "dim": provedor.dim}).scalar()
+    versao = VersaoIndice(numero, tenant, provedor.nome, provedor.modelo, provedor.dim)
+    garantir_indice(db, versao.dim)
+    # tenant validado no cadastro ([a-z0-9_]) e versão inteira: seguro interpolar no DDL
+    db.execute(text(
+        f"CREATE TABLE {versao.tabela} PARTITION OF embeddings_tintas_{tenant} FOR VALUES IN ({versao.versao})"
+    ))
+    db.commit()
+    return versao
+
+def inserir(db: Session, versao: VersaoIndice, ids: List[str], conteudos: List[str], vetores: List[list[float]]) -> None:
+    """Grava (ou regrava) os vetores de um bloco na versão; o commit fica com quem chama."""
+    if not ids:
+        return
+    db.execute(text("""
+        INSERT INTO embeddings_tintas (tenant, versao, tinta_id, modelo, dim, embedding, conteudo, atualizado_em)
+        VALUES (:tenant, :versao, CAST(:tinta_id AS uuid), :modelo, :dim, (:vec)::vector, :conteudo, NOW())
+        ON CONFLICT (tenant, versao, tinta_id) DO UPDATE
+        SET embedding = EXCLUDED.embedding,
+            conteudo = EXCLUDED.conteudo,
+            atualizado_em = NOW()
+    """), [
+        {"tenant": versao.tenant, "versao": versao.versao, "tinta_id": tinta_id, "modelo": versao.modelo,
+         "dim": versao.dim, "vec": _to_vec_literal(vetor), "conteudo": conteudo}
+        for tinta_id, conteudo, vetor in zip(ids, conteudos, vetores)
+    ])
+
+# campos que entram no texto embedado: mudou um deles, a tinta volta para a fila
+CAMPOS_EMBEDADOS = ("nome", "cor", "superficie_indicada", "ambiente", "acabamento", "linha", "descricao")
+
+def conteudo_tinta(d: Dict[str, Any]) -> str:
+    """Texto embedado de uma tinta."""
+    return " ".join(str(s) for s in [
+        d["nome"], d["cor"], d["superficie_indicada"], d["ambiente"],
+        d["acabamento"], d.get("linha") or "", d.get("descricao") or "",
+    ] if s).strip()
+
+def enfileirar(db: Session, tenant: str, ids: List[str]) -> None:
+    """Põe as tintas em ``fila_embeddings`` (consumida por ``sincronizacao.processar_fila``); sem commit."""
+    if ids:
+        db.execute(text("""
+            INSERT INTO fila_embeddings (tenant, tinta_id) VALUES (:tenant, CAST(:tinta_id AS uuid))
+            ON CONFLICT (tenant, tinta_id) DO UPDATE SET enfileirado_em = NOW(), tentativas = 0
+        """), [{"tenant": tenant, "tinta_id": str(i)} for i in ids])
+
+def completar(db: Session, versao: VersaoIndice, tamanho_bloco: int = 500) -> int:
+    """Embeda as tintas do tenant que ainda não estão na versão (ex.: cadastradas pela API)."""
+    total = 0
+    while True:
+        faltantes = db.execute(text("""
+            SELECT t.id::text AS id, t.nome, t.cor, t.superficie_indicada, t.ambiente::text AS ambiente,
+                   t.acabamento::text AS acabamento, t.linha, t.descricao
+            FROM tintas t
+            WHERE t.tenant = :tenant AND t.descontinuada_em IS NULL
+              AND NOT EXISTS (SELECT 1 FROM embeddings_tintas te
+                              WHERE te.tenant = :tenant AND te.versao = :versao AND te.tinta_id = t.id)
+            LIMIT :limite
+        """), {"tenant": versao.tenant, "versao": versao.versao, "limite": tamanho_bloco}).mappings().all()
+        if not faltantes:
+            return total
+        conteudos = [conteudo_tinta(f) for f in faltantes]
+        inserir(db, versao, [f["id"] for f in faltantes], conteudos, embed_textos(conteudos, provedor=versao.get_provedor()))
+        db.commit()
+        total += len(faltantes)
+
+def validar(db: Session, versao: VersaoIndice) -> Dict[str, Any]:
+    """Cobertura do catálogo e recall@k do HNSW contra a busca exata; marca ``pronto`` ou ``falhou``."""
+    linhas = db.execute(text(f"SELECT COUNT(*) FROM {versao.tabela}")).scalar()
+    tintas = db.execute(
+        text("SELECT COUNT(*) FROM tintas WHERE tenant = :t AND descontinuada_em IS NULL"), {"t": versao.tenant}
+    ).scalar()
+    cobertura = linhas / tintas if tintas else 0.0
+
+    k = settings.indice_recall_k
+    amostra = db.execute(
+        text(f"SELECT embedding::text FROM {versao.tabela} ORDER BY random() LIMIT :n"),
+        {"n": settings.indice_recall_amostra},
+    ).scalars().all()
+    # mesma expressão/filtro da busca (usa o HNSW) vs. coluna crua (sem índice: ordem exata)
+    sql_ann = text(f"""
+        SELECT te.tinta_id FROM embeddings_tintas te
+        WHERE te.tenant = :tenant AND {filtro_versao(versao)}
+        ORDER BY {coluna_vetor(versao.dim)} <=> CAST(:vec AS vector) LIMIT :k
+    """)
+    sql_exata = text(f"""
+        SELECT te.tinta_id FROM embeddings_tintas te
+        WHERE te.tenant = :tenant AND te.versao = {int(versao.versao)}
+        ORDER BY te.embedding <=> CAST(:vec AS vector) LIMIT :k
+    """)
+    acertos = []
+    with metricas.cronometro("indice.validacao"):
+        db.execute(text(f"SET LOCAL hnsw.ef_search = {max(40, settings.rerank_candidatos)}"))
+        for vec in amostra:
+            params = {"tenant": versao.tenant, "vec": vec, "k": k}
+            exatos = set(db.execute(sql_exata, params).scalars())
+            if exatos:
+                acertos.append(len(exatos & set(db.execute(sql_ann, params).scalars())) / len(exatos))
+    recall = sum(acertos) / len(acertos) if acertos else 0.0
+
+    ok = cobertura >= settings.indice_cobertura_min and recall >= settings.indice_recall_min
+    db.execute(text("""
+        UPDATE indices_embeddings SET status = :status, linhas = :linhas, recall = :recall WHERE versao = :v
+    """), {"status": "pronto" if ok else "falhou", "linhas": linhas, "recall": recall, "v": versao.versao})
+    db.commit()
+    return {
+        "versao": versao.versao, "linhas": linhas, "tintas": tintas, "cobertura": round(cobertura, 4),
+        "recall_at_k": round(recall, 4), "k": k, "amostra": len(acertos), "ok": ok,
+    }
+
+def ativar(db: Session, numero: int) -> VersaoIndice:
+    """Troca o ponteiro do tenant para a versão (precisa estar ``pronto``)."""
+    versao = obter(db, numero)
+    status = db.execute(
+        text("SELECT status FROM indices_embeddings WHERE versao = :v FOR UPDATE"), {"v": numero}
+    ).scalar()
+    if status != "pronto":
+        raise VersaoInvalida(f"versão {numero} está '{status}', só versões validadas podem ser ativadas")
+    db.execute(text("""
+        INSERT INTO indice_ativo (tenant, versao, ativado_em) VALUES (:tenant, :v, NOW())
+        ON CONFLICT (tenant) DO UPDATE SET versao = EXCLUDED.versao, ativado_em = NOW()
+    """), {"tenant": versao.tenant, "v": numero})
+    db.execute(text("UPDATE indices_embeddings SET ativado_em = NOW() WHERE versao = :v"), {"v": numero})
+    db.commit()
+    _apos_troca(versao)
+    return versao
+
+def rollback(db: Session, tenant: str) -> VersaoIndice:
+    """Reativa a versão que estava ativa antes da atual."""
+    atual = db.execute(text("SELECT versao FROM indice_ativo WHERE tenant = :t"), {"t": tenant}).scalar()
+    anterior = db.execute(text("""
+        SELECT versao FROM indices_embeddings
+        WHERE tenant = :t AND status = 'pronto' AND ativado_em IS NOT NULL AND versao <> COALESCE(:atual, -1)
+        ORDER BY ativado_em DESC LIMIT 1
+    """), {"t": tenant, "atual": atual}).scalar()
+    if anterior is None:
+        raise VersaoInvalida(f"tenant '{tenant}' não tem versão anterior para rollback")
+    return ativar(db, anterior)
+
+def descartar(db: Session, numero: int) -> None:
+    """Apaga uma versão que não está ativa (DROP da partição: sem bloat nem DELETE em massa)."""
+    versao = obter(db, numero)
+    if db.execute(text("SELECT 1 FROM indice_ativo WHERE versao = :v"), {"v": numero}).first():
+        raise VersaoInvalida(f"versão {numero} está ativa; ative outra antes de descartar")
+    db.execute(text(f"DROP TABLE IF EXISTS {versao.tabela}"))
+    db.execute(text("DELETE FROM indices_embeddings WHERE versao = :v"), {"v": numero})
+    db.commit()
+
+def marcar_falha(db: Session, versao: VersaoIndice) -> None:
+    db.rollback()
+    db.execute(text("UPDATE indices_embeddings SET status = 'falhou' WHERE versao = :v"), {"v": versao.versao})
+    db.commit()
+
+def _apos_troca(versao: VersaoIndice) -> None:
+    from app.services.ia import indice_memoria
+
+    invalidar(versao.tenant)
+    indice_memoria.invalidar(versao.tenant)
+    metricas.incrementar("indice.ativacoes")
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from app.db.session import SessionLocal
+
+    ap = argparse.ArgumentParser(description="Versões do índice de embeddings (blue/green)")
+    sub = ap.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("listar")
+    p.add_argument("--tenant", default=settings.tenant_padrao)
+    p = sub.add_parser("reindexar", help="indexa o arquivo numa versão nova e ativa se validar")
+    p.add_argument("arquivo")
+    p.add_argument("--tenant", default=settings.tenant_padrao)
+    p.add_argument("--bloco", type=int, default=500)
+    p.add_argument("--nao-ativar", action="store_true", help="só constrói e valida")
+    p = sub.add_parser("ativar")
+    p.add_argument("versao", type=int)
+    p = sub.add_parser("rollback")
+    p.add_argument("--tenant", default=settings.tenant_padrao)
+    p = sub.add_parser("descartar")
+    p.add_argument("versao", type=int)
+    args = ap.parse_args()
+
+    if args.comando == "reindexar":
+        from app.services.ia.embeddings import indexar_csv_tintas
+
+        saida: Any = indexar_csv_tintas(args.arquivo, args.bloco, args.tenant, ativar=not args.nao_ativar)
+    else:
+        sessao = SessionLocal()
+        try:
+            if args.comando == "listar":
+                saida = listar(sessao, args.tenant)
+            elif args.comando == "ativar":
+                saida = ativar(sessao, args.versao)
+            elif args.comando == "rollback":
+                saida = rollback(sessao, args.tenant)
+            else:
+                descartar(sessao, args.versao)
+                saida = {"descartada": args.versao}
+        finally:
+            sessao.close()
+    print(json.dumps(saida.__dict__ if isinstance(saida, VersaoIndice) else saida, ensure_ascii=False, indent=2, default=str))
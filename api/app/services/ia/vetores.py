@@ -0,0 +1,82 @@
+# app/services/ia/vetores.py
+"""Geração de embeddings (por provedor) e cache LRU dos embeddings de consultas.
+
+Cada vetor em ``embeddings_tintas`` guarda ``modelo`` e ``dim`` e pertence a
+uma versão do índice (ver ``versoes``); a coluna não tem dimensão fixa e cada
+dimensão tem seu HNSW parcial sobre ``embedding::vector(dim)``. Toda busca usa
+``coluna_vetor``/``filtro_versao`` para casar com esse índice e ler só a
+versão (e o modelo) ativos.
+"""
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core import metricas
+from app.core.config import settings
+from app.services.ia.provedores import ProvedorEmbeddings, get_provedor
+from app.services.ia.texto import _ascii
+
+if TYPE_CHECKING:
+    from app.services.ia.versoes import VersaoIndice
+
+def _to_vec_literal(vec: Iterable[float]) -> str:
+    return "[" + ",".join(f"{float(x):.6f}" for x in vec) + "]"
+
+def coluna_vetor(dim: int, alias: str = "te") -> str:
+    """Expressão do vetor com a dimensão fixada (a mesma do índice parcial)."""
+    return f"({alias}.embedding::vector({int(dim)}))"
+
+def filtro_versao(versao: "VersaoIndice", alias: str = "te") -> str:
+    """Predicado da versão (poda as partições) e da dimensão (casa com o HNSW parcial)."""
+    return f"{alias}.versao = {int(versao.versao)} AND {alias}.dim = {int(versao.dim)}"
+
+def garantir_indice(db: Session, dim: int) -> None:
+    """Cria (se faltar) o HNSW parcial de uma dimensão; a migração já cria o de 1536."""
+    dim = int(dim)
+    db.execute(text(f"""
+        CREATE INDEX IF NOT EXISTS ix_embeddings_tintas_hnsw_{dim}
+            ON embeddings_tintas USING hnsw ((embedding::vector({dim})) vector_cosine_ops)
+            WITH (m = 16, ef_construction = 64)
+            WHERE dim = {dim}
+    """))
+
+def embed_texto(txt: str, provedor: Optional[ProvedorEmbeddings] = None) -> list[float]:
+    return (provedor or get_provedor()).embed([txt])[0]
+
+def embed_textos(
+    textos: List[str], tamanho_lote: Optional[int] = None, provedor: Optional[ProvedorEmbeddings] = None
+) -> List[list[float]]:
+    """Embeddings de vários textos em lote (uma requisição/inferência por bloco)"""
+    provedor = provedor or get_provedor()
+    tamanho_lote = tamanho_lote or len(textos) or 1
+    vetores: List[list[float]] = []
+    for i in range(0, len(textos), tamanho_lote):
+        vetores.extend(provedor.embed(textos[i:i + tamanho_lote]))
+    return vetores
+
+# ---------- cache de consultas ----------
+_cache_lock = threading.Lock()
+_cache: "OrderedDict[Tuple[str, str], list[float]]" = OrderedDict()
+
+def _chave_cache(txt: str) -> str:
+    return " ".join(_ascii(txt).split())
+
+def embed_consulta(txt: str, provedor: Optional[ProvedorEmbeddings] = None) -> list[float]:
+    """``embed_texto`` com cache LRU por (modelo, consulta normalizada) (EMBEDDING_CACHE_TAMANHO)."""
+    provedor = provedor or get_provedor()
+    chave = (provedor.modelo, _chave_cache(txt))
+    with _cache_lock:
+        vetor = _cache.get(chave)
+        if vetor is not None:
+            _cache.move_to_end(chave)
+    if vetor is not None:
+        metricas.incrementar("embeddings.cache.hits")
+        return vetor
+    metricas.incrementar("embeddings.cache.misses")
+    vetor = embed_texto(txt, provedor)
+    with _cache_lock:
+        _cache[chave] = vetor
+        while len(_cache) > settings.embedding_cache_tamanho:
+            _cache.popitem(last=False)
+    return vetor
@@ -0,0 +1,317 @@
+# app/services/ingestao/leitores.py
+"""Leitura do catálogo (CSV, XLSX, Parquet) em blocos, com normalização por coluna.
+
+- CSV: encoding detectado (UTF-8 com/sem BOM, depois CP1252/Latin-1) e dialeto
+  farejado — exports brasileiros com ``;`` funcionam sem configuração.
+- XLSX (openpyxl) e Parquet (pyarrow) são dependências opcionais.
+- Cada bloco é normalizado coluna a coluna com lookups memoizados
+  (ambiente, acabamento, features); valores inválidos vão para o relatório
+  por coluna em vez de sumirem. Features são gravadas com as chaves do
+  vocabulário canônico (``texto.FEATURES``), as mesmas usadas nos filtros.
+"""
+import codecs
+import csv
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from app.services.catalogo import cores
+from app.services.ia.texto import _norm, _slug, acabamento_ou_none, ambiente_ou_none, feature_ou_none
+
+ENCODINGS = ("utf-8-sig", "cp1252", "latin-1")
+DELIMITADORES = ",;\t|"
+_AMOSTRA_BYTES = 256 * 1024
+_EXEMPLOS_POR_COLUNA = 5
+
+# ---------- mapeamento de colunas ----------
+ALIASES = {
+    "nome": {"nome","nome_da_tinta","produto","nome_tinta","Nome da tinta"},
+    "cor": {"cor","tom","cor_nome","cor_tinta","Cor"},
+    "superficie_indicada": {"superficie_indicada","superficie","tipo_de_superficie","superficie_recomendada","superfície_indicada","Tipo de superfície indicada"},
+    "ambiente": {"ambiente","ambiente_indicado","ambiente_(interno/externo)","uso","Ambiente"},
+    "acabamento": {"acabamento","tipo_de_acabamento","Tipo de acabamento"},
+    "linha": {"linha","linha_produto","segmento","Linha"},
+    "descricao": {"descricao","descrição","observacoes","observações","detalhes"},
+    "rendimento_m2_litro": {"rendimento","rendimento_m2_litro","rendimento_(m2/litro)","rendimento_m2_l"},
+    "resistencia_uv": {"resistencia_uv","resistente_uv","resistência_uv","resistencia_ao_sol"},
+    "voc_baixo": {"voc_baixo","baixo_voc","voc"},
+    "cor_hex": {"cor_hex","hex","codigo_hex","rgb","cor_rgb"},
+}
+FEATURES_TEXT_HEADERS = {"Features relevantes"}
+
+def _build_map(fieldnames: list[str]) -> Dict[str, str]:
+    slugs = {fn: _slug(fn) for fn in fieldnames}
+    inv = {v: k for k, v in slugs.items()}
+
+    def pick(keys:set[str]) -> Optional[str]:
+        for k in keys:
+            if k in inv: return inv[k]
+        return None
+
+    mapping: Dict[str, str] = {}
+    for target, keys in ALIASES.items():
+        mapping[target] = pick({ _slug(k) for k in keys }) or ""
+
+    for fn in fieldnames:
+        if fn in FEATURES_TEXT_HEADERS or slugs[fn] in {_slug(h) for h in FEATURES_TEXT_HEADERS}:
+            mapping["_features_text_col"] = fn
+            break
+    return mapping
+
+# ---------- conversões ----------
+_VERDADEIROS = {"1","true","t","yes","y","sim","s","verdadeiro"}
+_FALSOS = {"0","false","f","no","n","nao","não","falso"}
+
+def _bool_from_any(v: Any) -> Optional[bool]:
+    if v is None: return None
+    s = str(v).strip().lower()
+    if s in _VERDADEIROS: return True
+    if s in _FALSOS: return False
+    return None
+
+def _float_or_none(v: Any) -> Optional[float]:
+    try:
+        return float(v) if v not in (None, "", "null", "None") else None
+    except Exception:
+        return None
+
+def _float_br(v: str) -> Optional[float]:
+    """Aceita "12.5", "12,5" e "1.234,5"; levanta ValueError se não for número."""
+    if "," in v:
+        v = v.replace(".", "").replace(",", ".")
+    return float(v)
+
+# lookups memoizados: catálogos repetem os mesmos poucos valores em milhares de linhas
+_ambiente = lru_cache(maxsize=None)(ambiente_ou_none)
+_acabamento = lru_cache(maxsize=None)(acabamento_ou_none)
+
+@lru_cache(maxsize=4096)
+def _features(raw: str) -> Tuple[Tuple[str, bool], ...]:
+    """(chave, está no vocabulário canônico) para cada feature da célula."""
+    saida: Dict[str, bool] = {}
+    for t in raw.replace(";", ",").split(","):
+        if t.strip():
+            canonica = feature_ou_none(t)
+            saida.setdefault(canonica or _slug(t), canonica is not None)
+    return tuple(saida.items())
+
+# ---------- relatório ----------
+@dataclass
+class RelatorioLeitura:
+    arquivo: str
+    formato: str = ""
+    encoding: Optional[str] = None
+    delimitador: Optional[str] = None
+    linhas_lidas: int = 0
+    linhas_validas: int = 0
+    linhas_ignoradas: int = 0
+    erros: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def erro(self, coluna: str, linha: int, valor: Any, motivo: str) -> None:
+        e = self.erros.setdefault(coluna, {"total": 0, "exemplos": []})
+        e["total"] += 1
+        if len(e["exemplos"]) < _EXEMPLOS_POR_COLUNA:
+            e["exemplos"].append({"linha": linha, "valor": str(valor)[:80], "motivo": motivo})
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "arquivo": self.arquivo, "formato": self.formato, "encoding": self.encoding,
+            "delimitador": self.delimitador, "linhas_lidas": self.linhas_lidas,
+            "linhas_validas": self.linhas_validas, "linhas_ignoradas": self.linhas_ignoradas,
+            "erros_por_coluna": self.erros,
+        }
+
+# ---------- detecção ----------
+def detectar_encoding(amostra: bytes) -> str:
+    for enc in ENCODINGS:
+        try:
+            # final=False: a amostra pode cortar um caractere multibyte no fim
+            codecs.getincrementaldecoder(enc)().decode(amostra, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+def detectar_delimitador(amostra: str) -> str:
+    try:
+        return csv.Sniffer().sniff(amostra, delimiters=DELIMITADORES).delimiter
+    except csv.Error:
+        cabecalho = amostra.splitlines()[0] if amostra else ""
+        return max(DELIMITADORES, key=cabecalho.count)
+
+# ---------- leitor ----------
+class LeitorCatalogo:
+    """Lê o arquivo em blocos de dicts ``{coluna_original: valor}``."""
+
+    def __init__(self, caminho: str, tamanho_bloco: int = 500):
+        self.caminho = Path(caminho)
+        self.tamanho_bloco = tamanho_bloco
+        sufixo = self.caminho.suffix.lower()
+        self.formato = {".xlsx": "xlsx", ".xlsm": "xlsx", ".parquet": "parquet", ".pq": "parquet"}.get(sufixo, "csv")
+        self.relatorio = RelatorioLeitura(arquivo=str(caminho), formato=self.formato)
+        self.colunas: List[str] = []
+        if self.formato == "csv":
+            with open(self.caminho, "rb") as f:
+                amostra = f.read(_AMOSTRA_BYTES)
+            self.relatorio.encoding = detectar_encoding(amostra)
+            texto = codecs.getincrementaldecoder(self.relatorio.encoding)().decode(amostra, final=False)
+            self.relatorio.delimitador = detectar_delimitador(texto)
+            cabecalho = next(csv.reader([texto.splitlines()[0]], delimiter=self.relatorio.delimitador), []) if texto else []
+            self.colunas = [c.strip() for c in cabecalho]
+        elif self.formato == "xlsx":
+            self.colunas = self._colunas_xlsx()
+        else:
+            self.colunas = self._colunas_parquet()
+
+    def _colunas_xlsx(self) -> List[str]:
+        try:
+            from openpyxl import load_workbook  # dependência opcional
+        except ImportError as e:
+            raise RuntimeError("Leitura de XLSX requer openpyxl (pip install openpyxl)") from e
+        wb = load_workbook(self.caminho, read_only=True, data_only=True)
+        try:
+            primeira = next(wb.active.iter_rows(max_row=1, values_only=True), ())
+            return [str(c).strip() if c is not None else "" for c in primeira]
+        finally:
+            wb.close()
+
+    def _colunas_parquet(self) -> List[str]:
+        try:
+            import pyarrow.parquet as pq  # dependência opcional
+        except ImportError as e:
+            raise RuntimeError("Leitura de Parquet requer pyarrow (pip install pyarrow)") from e
+        return list(pq.ParquetFile(self.caminho).schema_arrow.names)
+
+    def blocos(self) -> Iterator[List[Dict[str, Any]]]:
+        gerador = {"csv": self._blocos_csv, "xlsx": self._blocos_xlsx, "parquet": self._blocos_parquet}[self.formato]
+        for bloco in gerador():
+            self.relatorio.linhas_lidas += len(bloco)
+            yield bloco
+
+    def _agrupar(self, linhas: Iterator[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        bloco: List[Dict[str, Any]] = []
+        for linha in linhas:
+            bloco.append(linha)
+            if len(bloco) >= self.tamanho_bloco:
+                yield bloco
+                bloco = []
+        if bloco:
+            yield bloco
+
+    def _blocos_csv(self) -> Iterator[List[Dict[str, Any]]]:
+        # o encoding vem só da amostra: bytes inválidos depois dela viram U+FFFD e entram no
+        # relatório (coluna, linha) em vez de derrubar a leitura com UnicodeDecodeError
+        with open(self.caminho, "r", encoding=self.relatorio.encoding, errors="replace", newline="") as f:
+            reader = csv.reader(f, delimiter=self.relatorio.delimitador)
+            next(reader, None)  # cabeçalho já lido
+
+            def linhas() -> Iterator[Dict[str, Any]]:
+                for row in reader:
+                    if not any(row):
+                        continue
+                    linha = dict(zip(self.colunas, row))
+                    for coluna, valor in linha.items():
+                        if "\ufffd" in valor:
+                            self.relatorio.erro(
+                                coluna, reader.line_num, valor, f"bytes inválidos em {self.relatorio.encoding}; trocados por �"
+                            )
+                    yield linha
+
+            yield from self._agrupar(linhas())
+
+    def _blocos_xlsx(self) -> Iterator[List[Dict[str, Any]]]:
+        from openpyxl import load_workbook
+
+        wb = load_workbook(self.caminho, read_only=True, data_only=True)
+        try:
+            linhas = wb.active.iter_rows(min_row=2, values_only=True)
+            yield from self._agrupar(dict(zip(self.colunas, row)) for row in linhas if any(v is not None for v in row))
+        finally:
+            wb.close()
+
+    def _blocos_parquet(self) -> Iterator[List[Dict[str, Any]]]:
+        import pyarrow.parquet as pq
+
+        for lote in pq.ParquetFile(self.caminho).iter_batches(batch_size=self.tamanho_bloco):
+            yield lote.to_pylist()
+
+# ---------- normalização ----------
+def normalizar_bloco(
+    linhas: List[Dict[str, Any]],
+    mapping: Dict[str, str],
+    relatorio: RelatorioLeitura,
+    primeira_linha: int = 2,
+) -> List[Dict[str, Any]]:
+    """Converte um bloco bruto nos campos de ``tintas``, coluna a coluna.
+
+    Devolve só as linhas válidas; problemas ficam em ``relatorio.erros``.
+    """
+    n = len(linhas)
+
+    def coluna(alvo: str) -> List[str]:
+        src = mapping.get(alvo) or ""
+        return [_norm(l.get(src)) for l in linhas] if src else [""] * n
+
+    cols = {alvo: coluna(alvo) for alvo in ALIASES}
+    feats_raw = coluna("_features_text_col")
+
+    registros: List[Dict[str, Any]] = []
+    for i in range(n):
+        num = primeira_linha + i
+        nome, cor = cols["nome"][i], cols["cor"][i]
+        if not nome or not cor:
+            relatorio.erro("nome" if not nome else "cor", num, "", "vazio; linha ignorada")
+            relatorio.linhas_ignoradas += 1
+            continue
+
+        amb_raw, acab_raw = cols["ambiente"][i], cols["acabamento"][i]
+        ambiente = _ambiente(amb_raw) if amb_raw else "interno"
+        if ambiente is None:
+            relatorio.erro("ambiente", num, amb_raw, "valor desconhecido; usado 'interno'")
+            ambiente = "interno"
+        acabamento = _acabamento(acab_raw) if acab_raw else "fosco"
+        if acabamento is None:
+            relatorio.erro("acabamento", num, acab_raw, "valor desconhecido; usado 'fosco'")
+            acabamento = "fosco"
+
+        rendimento = None
+        rend_raw = cols["rendimento_m2_litro"][i]
+        if rend_raw and rend_raw.lower() not in ("null", "none"):
+            try:
+                rendimento = _float_br(rend_raw)
+            except ValueError:
+                relatorio.erro("rendimento_m2_litro", num, rend_raw, "não numérico")
+
+        booleanos = {}
+        for campo in ("resistencia_uv", "voc_baixo"):
+            raw = cols[campo][i]
+            booleanos[campo] = _bool_from_any(raw) if raw else None
+            if raw and booleanos[campo] is None:
+                relatorio.erro(campo, num, raw, "não booleano")
+
+        # só entra no registro quando informada: linhas sem hex mantêm o hash de sincronização
+        cor_hex = {}
+        if cols["cor_hex"][i]:
+            try:
+                cor_hex["cor_hex"] = cores.hex_de(cols["cor_hex"][i])
+            except ValueError:
+                relatorio.erro("cor_hex", num, cols["cor_hex"][i], "não é hex nem RGB; cor pelo nome")
+
+        feats = _features(feats_raw[i]) if feats_raw[i] else ()
+        for f, conhecida in feats:
+            if not conhecida:
+                relatorio.erro("features", num, f, "fora do vocabulário; mantida como slug")
+        registros.append({
+            "nome": nome, "cor": cor,
+            "superficie_indicada": cols["superficie_indicada"][i] or "alvenaria",
+            "ambiente": ambiente, "acabamento": acabamento,
+            "features": json.dumps({f: True for f, _ in feats}) if feats else None,
+            "linha": cols["linha"][i] or None,
+            "descricao": cols["descricao"][i],
+            "rendimento_m2_litro": rendimento,
+            **booleanos,
+            **cor_hex,
+        })
+    relatorio.linhas_validas += len(registros)
+    return registros
@@ -0,0 +1,271 @@
+# app/services/ingestao/sincronizacao.py
+"""Sincronização incremental do catálogo a partir do dump completo do ERP.
+
+O arquivo novo é comparado com o snapshot do último import
+(``catalogo_snapshot``) por chave natural (nome|cor|linha, sem caixa) e hash
+da linha normalizada:
+
+- chave nova: insere (ou reaproveita a tinta já cadastrada com a mesma chave);
+- hash diferente: atualiza;
+- hash igual: não toca no banco;
+- chave que sumiu do arquivo: ``remover`` (DELETE), ``marcar`` (fica
+  descontinuada e sai do índice) ou ``manter`` (SINC_AUSENTES).
+
+Só as tintas cujo texto embedado mudou (comparado com o ``conteudo`` da
+versão ativa do índice) entram em ``fila_embeddings``; a fila é consumida
+para a versão ativa no fim, ou depois por ``processar_fila``. Se faltar mais
+que SINC_MAX_AUSENTES do snapshot (dump truncado?), as ausências não são
+aplicadas sem ``forcar``.
+
+Uso:
+    python -m app.services.ingestao.sincronizacao catalogo.csv --tenant suvinil --ausentes marcar
+    python -m app.services.ingestao.sincronizacao --fila --tenant suvinil   # só consome a fila
+"""
+import hashlib
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core import metricas
+from app.core.config import settings
+from app.core.tenant import padrao as tenant_padrao
+from app.db.session import SessionLocal
+from app.services.ia import versoes
+from app.services.ia.embeddings import _find_tinta_id, _insert_tinta, _update_tinta
+from app.services.ia.vetores import embed_textos
+from app.services.ingestao.leitores import LeitorCatalogo, _build_map, normalizar_bloco
+
+POLITICAS_AUSENTES = ("remover", "marcar", "manter")
+
+def chave_natural(d: Dict[str, Any]) -> str:
+    """Mesma identidade de ``_find_tinta_id``: nome e cor sem caixa, linha exata."""
+    return f"{d['nome'].strip().lower()}|{d['cor'].strip().lower()}|{d.get('linha') or ''}"
+
+def hash_linha(d: Dict[str, Any]) -> str:
+    campos = {k: v for k, v in d.items() if k != "tenant"}
+    if isinstance(campos.get("features"), str):
+        campos["features"] = json.loads(campos["features"])  # ordem das chaves não conta
+    return hashlib.sha256(json.dumps(campos, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+
+@contextmanager
+def _cronometro(tempos: Dict[str, float], etapa: str) -> Iterator[None]:
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[etapa] = tempos.get(etapa, 0.0) + (time.perf_counter() - inicio) * 1000
+
+def _snapshot(db: Session, tenant: str) -> Dict[str, Tuple[str, str]]:
+    linhas = db.execute(
+        text("SELECT chave, hash, tinta_id::text FROM catalogo_snapshot WHERE tenant = :tenant"), {"tenant": tenant}
+    ).all()
+    return {chave: (h, tinta_id) for chave, h, tinta_id in linhas}
+
+def _enfileirar(db: Session, tenant: str, conteudos: Dict[str, str], versao: Optional[versoes.VersaoIndice]) -> int:
+    """Enfileira as tintas cujo texto embedado difere do gravado na versão ativa."""
+    if not conteudos:
+        return 0
+    atuais: Dict[str, str] = {}
+    if versao is not None:
+        atuais = dict(db.execute(
+            text(f"SELECT tinta_id::text, conteudo FROM {versao.tabela} WHERE tinta_id = ANY(CAST(:ids AS uuid[]))"),
+            {"ids": list(conteudos)},
+        ).all())
+    ids = [i for i, c in conteudos.items() if atuais.get(i) != c]
+    versoes.enfileirar(db, tenant, ids)
+    return len(ids)
+
+def _aplicar(
+    db: Session, tenant: str, mudancas: List[Tuple[str, str, Dict[str, Any], Optional[str]]],
+    versao: Optional[versoes.VersaoIndice], contagem: Counter,
+) -> None:
+    snapshot, conteudos = [], {}
+    for chave, h, dados, tinta_id in mudancas:
+        tinta_id = tinta_id or _find_tinta_id(db, dados["nome"], dados["cor"], dados["linha"], tenant)
+        if tinta_id:
+            _update_tinta(db, tinta_id, dados)
+            contagem["atualizadas"] += 1
+        else:
+            tinta_id = _insert_tinta(db, dados)
+            contagem["inseridas"] += 1
+        snapshot.append({"tenant": tenant, "chave": chave, "hash": h, "tinta_id": tinta_id})
+        conteudos[tinta_id] = versoes.conteudo_tinta(dados)
+    if snapshot:
+        db.execute(text("""
+            INSERT INTO catalogo_snapshot (tenant, chave, hash, tinta_id, importado_em)
+            VALUES (:tenant, :chave, :hash, CAST(:tinta_id AS uuid), NOW())
+            ON CONFLICT (tenant, chave) DO UPDATE
+            SET hash = EXCLUDED.hash, tinta_id = EXCLUDED.tinta_id, importado_em = NOW()
+        """), snapshot)
+    contagem["enfileiradas"] += _enfileirar(db, tenant, conteudos, versao)
+
+def _tratar_ausentes(db: Session, tenant: str, ausentes: Dict[str, str], politica: str, tamanho_bloco: int) -> int:
+    itens = list(ausentes.items())
+    for i in range(0, len(itens), tamanho_bloco):
+        bloco = itens[i:i + tamanho_bloco]
+        params = {"tenant": tenant, "ids": [t for _, t in bloco], "chaves": [c for c, _ in bloco]}
+        if politica == "remover":
+            # cascata: embeddings de todas as versões, snapshot e fila
+            db.execute(text("DELETE FROM tintas WHERE tenant = :tenant AND id = ANY(CAST(:ids AS uuid[]))"), params)
+        else:
+            db.execute(text("""
+                UPDATE tintas SET descontinuada_em = NOW()
+                WHERE tenant = :tenant AND id = ANY(CAST(:ids AS uuid[])) AND descontinuada_em IS NULL
+            """), params)
+            for tabela in ("embeddings_tintas", "fila_embeddings"):
+                db.execute(text(f"DELETE FROM {tabela} WHERE tenant = :tenant AND tinta_id = ANY(CAST(:ids AS uuid[]))"), params)
+            # fora do snapshot: se voltar ao feed, entra como nova e é reativada
+            db.execute(text("DELETE FROM catalogo_snapshot WHERE tenant = :tenant AND chave = ANY(:chaves)"), params)
+        db.commit()
+    return len(itens)
+
+def processar_fila(db: Session, tenant: str, tamanho_bloco: int = 256) -> int:
+    """Embeda as tintas da fila na versão ativa do índice; devolve quantas foram gravadas.
+
+    ``FOR UPDATE SKIP LOCKED``: vários workers podem consumir a mesma fila.
+    """
+    versao = versoes.ativa(db, tenant)
+    if versao is None:
+        return 0
+    total = 0
+    while True:
+        linhas = db.execute(text("""
+            SELECT t.id::text AS id, t.nome, t.cor, t.superficie_indicada, t.ambiente::text AS ambiente,
+                   t.acabamento::text AS acabamento, t.linha, t.descricao
+            FROM fila_embeddings f JOIN tintas t ON t.id = f.tinta_id
+            WHERE f.tenant = :tenant AND f.tentativas < :max
+            ORDER BY f.enfileirado_em
+            LIMIT :n
+            FOR UPDATE OF f SKIP LOCKED
+        """), {"tenant": tenant, "max": settings.fila_embeddings_max_tentativas, "n": tamanho_bloco}).mappings().all()
+        if not linhas:
+            return total
+        ids = [l["id"] for l in linhas]
+        conteudos = [versoes.conteudo_tinta(l) for l in linhas]
+        try:
+            vetores = embed_textos(conteudos, provedor=versao.get_provedor())
+        except Exception as e:
+            db.rollback()
+            db.execute(text("""
+                UPDATE fila_embeddings SET tentativas = tentativas + 1
+                WHERE tenant = :tenant AND tinta_id = ANY(CAST(:ids AS uuid[]))
+            """), {"tenant": tenant, "ids": ids})
+            db.commit()
+            print(f"⚠️ Falha ao embedar a fila ({len(ids)} tintas ficam para depois): {str(e)}")
+            return total
+        versoes.inserir(db, versao, ids, conteudos, vetores)
+        db.execute(text("DELETE FROM fila_embeddings WHERE tenant = :tenant AND tinta_id = ANY(CAST(:ids AS uuid[]))"),
+                   {"tenant": tenant, "ids": ids})
+        db.commit()
+        total += len(ids)
+        metricas.incrementar("sincronizacao.embedadas", len(ids))
+
+def sincronizar(
+    caminho: str,
+    tenant: Optional[str] = None,
+    ausentes: Optional[str] = None,
+    forcar: bool = False,
+    embedar: bool = True,
+    tamanho_bloco: int = 500,
+) -> Dict[str, Any]:
+    """Aplica só as diferenças entre ``caminho`` e o último import do tenant."""
+    tenant = tenant or tenant_padrao().id
+    politica = ausentes or settings.sinc_ausentes
+    if politica not in POLITICAS_AUSENTES:
+        raise ValueError(f"Política de ausentes inválida: {politica} (use {', '.join(POLITICAS_AUSENTES)})")
+    inicio = time.perf_counter()
+    tempos: Dict[str, float] = {}
+    contagem: Counter = Counter()
+    db = SessionLocal()
+    try:
+        with _cronometro(tempos, "snapshot"):
+            anterior = _snapshot(db, tenant)
+            versao = versoes.ativa(db, tenant)
+        leitor = LeitorCatalogo(caminho, tamanho_bloco)
+        mapping = _build_map(leitor.colunas)
+        vistas: set = set()
+        proxima_linha = 2  # linha 1 = cabeçalho
+        blocos = iter(leitor.blocos())
+        while True:
+            with _cronometro(tempos, "leitura"):
+                bloco = next(blocos, None)
+                if bloco is None:
+                    break
+                registros = normalizar_bloco(bloco, mapping, leitor.relatorio, proxima_linha)
+                proxima_linha += len(bloco)
+            with _cronometro(tempos, "diff"):
+                mudancas = []
+                for dados in registros:
+                    dados["tenant"] = tenant
+                    chave = chave_natural(dados)
+                    if chave in vistas:
+                        contagem["duplicadas"] += 1  # vale a primeira ocorrência no arquivo
+                        continue
+                    vistas.add(chave)
+                    h = hash_linha(dados)
+                    hash_anterior, tinta_id = anterior.get(chave, (None, None))
+                    if hash_anterior == h:
+                        contagem["inalteradas"] += 1
+                    else:
+                        mudancas.append((chave, h, dados, tinta_id))
+            with _cronometro(tempos, "escrita"):
+                _aplicar(db, tenant, mudancas, versao, contagem)
+                db.commit()
+
+        faltando = {chave: tinta_id for chave, (_, tinta_id) in anterior.items() if chave not in vistas}
+        fracao = len(faltando) / len(anterior) if anterior else 0.0
+        bloqueadas = bool(faltando) and politica != "manter" and fracao > settings.sinc_max_ausentes and not forcar
+        if bloqueadas:
+            print(f"⚠️ {len(faltando)} tintas ({fracao:.0%} do último import) ausentes do arquivo; "
+                  f"acima de SINC_MAX_AUSENTES, nada removido (use --forcar)")
+        elif faltando and politica != "manter":
+            with _cronometro(tempos, "ausentes"):
+                contagem["removidas" if politica == "remover" else "marcadas"] = _tratar_ausentes(
+                    db, tenant, faltando, politica, tamanho_bloco
+                )
+
+        if embedar:
+            with _cronometro(tempos, "embeddings"):
+                contagem["embedadas"] = processar_fila(db, tenant)
+    finally:
+        db.close()
+
+    for k, v in contagem.items():
+        metricas.incrementar(f"sincronizacao.{k}", v)
+    return {
+        **leitor.relatorio.como_dict(),
+        "tenant": tenant, "ausentes_politica": politica, "snapshot_anterior": len(anterior),
+        "inseridas": 0, "atualizadas": 0, "inalteradas": 0, "duplicadas": 0, "enfileiradas": 0,
+        **contagem,
+        "ausentes": len(faltando), "ausentes_bloqueadas": bloqueadas,
+        "tempos_ms": {k: round(v, 1) for k, v in tempos.items()},
+        "total_ms": round((time.perf_counter() - inicio) * 1000, 1),
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Sincronização incremental do catálogo (delta contra o último import)")
+    ap.add_argument("arquivo", nargs="?", help="dump completo do catálogo (CSV, XLSX ou Parquet)")
+    ap.add_argument("--tenant")
+    ap.add_argument("--ausentes", choices=POLITICAS_AUSENTES, help="padrão: SINC_AUSENTES")
+    ap.add_argument("--forcar", action="store_true", help="aplica ausências acima de SINC_MAX_AUSENTES")
+    ap.add_argument("--sem-embeddings", action="store_true", help="só enfileira; embeda depois com --fila")
+    ap.add_argument("--fila", action="store_true", help="só consome a fila de re-embedding")
+    ap.add_argument("--bloco", type=int, default=500)
+    args = ap.parse_args()
+
+    if args.fila:
+        db = SessionLocal()
+        try:
+            saida: Any = {"embedadas": processar_fila(db, args.tenant or tenant_padrao().id)}
+        finally:
+            db.close()
+    elif args.arquivo:
+        saida = sincronizar(args.arquivo, args.tenant, args.ausentes, args.forcar, not args.sem_embeddings, args.bloco)
+    else:
+        ap.error("informe o arquivo ou --fila")
+    print(json.dumps(saida, ensure_ascii=False, indent=2, default=str))
@@ -0,0 +1,303 @@
+# benchmarks/avaliar_recuperacao.py
+"""Qualidade e latência da recuperação contra o conjunto dourado de consultas.
+
+Cada consulta de ``benchmarks/golden/consultas_vN.json`` traz as tintas
+esperadas: ``ideais`` (trecho do nome, ganho 3) e ``criterios`` (atributos;
+toda tinta do catálogo que os satisfaz tem ganho 1). Os julgamentos são
+resolvidos contra o catálogo do tenant no banco, então o mesmo arquivo vale
+para qualquer carga do catálogo.
+
+Para cada configuração (backend x re-ranking x filtros x consulta canônica x diversidade x cor)
+mede recall@k (sobre min(relevantes, k)), MRR e nDCG@k, e a latência p50/p95/p99
+da recuperação com o embedding da consulta já em cache (o custo do embedding
+sai à parte, em ``embedding_ms``). O relatório JSON guarda versão e hash do
+conjunto dourado, commit e versão ativa do índice, para comparar execuções.
+
+Precisa do banco e do provedor de embeddings da versão ativa. Uso (de ``api/``):
+    python benchmarks/avaliar_recuperacao.py --json avaliacao.json
+    python benchmarks/avaliar_recuperacao.py --configs hnsw,hibrida --k 5
+    python benchmarks/avaliar_recuperacao.py --comparar avaliacao_anterior.json --max-queda 0.02
+"""
+import argparse
+import hashlib
+import json
+import math
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+API_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(API_DIR))
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from app.services.ia import indice_memoria, normalizacao, versoes  # noqa: E402
+from app.services.ia.recuperacao import Filtros, buscar  # noqa: E402
+from app.services.ia.rerank import reranquear  # noqa: E402
+from app.services.ia.texto import _ascii  # noqa: E402
+from app.services.ia.vetores import _to_vec_literal, embed_consulta, filtro_versao  # noqa: E402
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+GANHO_IDEAL, GANHO_CRITERIO = 3, 1
+
+# backend: exata (varredura sem índice) | hnsw (pgvector) | memoria (numpy, INDICE_MEMORIA)
+# hibrida = cosseno + termos + atributos (re-ranking de rerank.py)
+# filtros = filtros do conjunto dourado (no hnsw, mais as features inferidas da consulta)
+# cor = reponderação pela cor pedida na consulta (BUSCA_COR_PESO); fora de +cor fica em 0
+CONFIGURACOES: Dict[str, Dict[str, Any]] = {
+    "exata":            {"backend": "exata",   "rerank": False, "filtros": False, "canonica": False, "diversa": False, "cor": False},
+    "exata+filtros":    {"backend": "exata",   "rerank": False, "filtros": True,  "canonica": False, "diversa": False, "cor": False},
+    "hnsw":             {"backend": "hnsw",    "rerank": False, "filtros": False, "canonica": False, "diversa": False, "cor": False},
+    "hnsw+filtros":     {"backend": "hnsw",    "rerank": False, "filtros": True,  "canonica": False, "diversa": False, "cor": False},
+    "memoria":          {"backend": "memoria", "rerank": False, "filtros": False, "canonica": False, "diversa": False, "cor": False},
+    "hibrida":          {"backend": "hnsw",    "rerank": True,  "filtros": False, "canonica": False, "diversa": False, "cor": False},
+    "hibrida+filtros":  {"backend": "hnsw",    "rerank": True,  "filtros": True,  "canonica": False, "diversa": False, "cor": False},
+    "hibrida+canonica": {"backend": "hnsw",    "rerank": True,  "filtros": False, "canonica": True,  "diversa": False, "cor": False},
+    "hibrida+diversa":  {"backend": "hnsw",    "rerank": True,  "filtros": False, "canonica": False, "diversa": True,  "cor": False},
+    "hibrida+cor":      {"backend": "hnsw",    "rerank": True,  "filtros": False, "canonica": False, "diversa": False, "cor": True},
+}
+
+# ---------- conjunto dourado ----------
+def golden_padrao() -> Path:
+    arquivos = sorted(GOLDEN_DIR.glob("consultas_v*.json"), key=lambda p: int(p.stem.rsplit("_v", 1)[1]))
+    if not arquivos:
+        raise SystemExit(f"Nenhum conjunto dourado em {GOLDEN_DIR}")
+    return arquivos[-1]
+
+def _casa(t: Dict[str, Any], criterios: Dict[str, Any]) -> bool:
+    for campo in ("ambiente", "acabamento"):
+        if criterios.get(campo) and str(t[campo]) != criterios[campo]:
+            return False
+    if any(not (t["features"] or {}).get(f) for f in criterios.get("features", [])):
+        return False
+    for campo, coluna in (("cor", "cor"), ("superficie", "superficie_indicada"), ("nome", "nome")):
+        if criterios.get(campo) and _ascii(criterios[campo]) not in _ascii(t[coluna]):
+            return False
+    return True
+
+def julgamentos(item: Dict[str, Any], tintas: List[Dict[str, Any]]) -> Dict[str, int]:
+    """tinta_id -> ganho (3 = ideal, 1 = satisfaz os critérios)."""
+    ganhos: Dict[str, int] = {}
+    ideais = [_ascii(n) for n in item.get("ideais", [])]
+    criterios = item.get("criterios") or {}
+    for t in tintas:
+        if any(n in _ascii(t["nome"]) for n in ideais):
+            ganhos[t["id"]] = GANHO_IDEAL
+        elif criterios and _casa(t, criterios):
+            ganhos[t["id"]] = GANHO_CRITERIO
+    return ganhos
+
+# ---------- métricas ----------
+def recall_at_k(ranking: List[str], ganhos: Dict[str, int], k: int) -> float:
+    return len(set(ranking[:k]) & ganhos.keys()) / min(len(ganhos), k)
+
+def mrr(ranking: List[str], ganhos: Dict[str, int], k: int) -> float:
+    return next((1 / i for i, x in enumerate(ranking[:k], 1) if x in ganhos), 0.0)
+
+def ndcg_at_k(ranking: List[str], ganhos: Dict[str, int], k: int) -> float:
+    dcg = sum((2 ** ganhos.get(x, 0) - 1) / math.log2(i + 1) for i, x in enumerate(ranking[:k], 1))
+    ideal = sorted(ganhos.values(), reverse=True)[:k]
+    idcg = sum((2 ** g - 1) / math.log2(i + 1) for i, g in enumerate(ideal, 1))
+    return dcg / idcg if idcg else 0.0
+
+def percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)] if ordenados else 0.0
+
+# ---------- backends ----------
+@contextmanager
+def _ajustes(**valores):
+    antes = {k: getattr(settings, k) for k in valores}
+    for k, v in valores.items():
+        setattr(settings, k, v)
+    try:
+        yield
+    finally:
+        for k, v in antes.items():
+            setattr(settings, k, v)
+
+def _exata(db: Session, vetor: list, limite: int, filtros: Filtros, versao: versoes.VersaoIndice) -> List[dict]:
+    where, params = filtros.sql()
+    # coluna crua: o HNSW parcial (expressão ::vector(dim)) não é usado, a ordem é exata
+    return [dict(l) for l in db.execute(text(f"""
+        SELECT t.id::text AS id, t.nome, t.cor, t.ambiente, t.acabamento, t.features, t.linha,
+               t.descricao, t.superficie_indicada, te.conteudo,
+               1 - (te.embedding <=> CAST(:vec AS vector)) AS score
+        FROM tintas t JOIN embeddings_tintas te ON t.id = te.tinta_id
+        WHERE te.tenant = :tenant AND t.tenant = :tenant AND {filtro_versao(versao)} AND {where}
+        ORDER BY te.embedding <=> CAST(:vec AS vector)
+        LIMIT :limite
+    """), {"vec": _to_vec_literal(vetor), "tenant": versao.tenant, "limite": limite, **params}).mappings()]
+
+def _executor(db: Session, cfg: Dict[str, Any], versao: versoes.VersaoIndice, k: int) -> Callable[[str, Filtros], List[dict]]:
+    candidatos = max(k, settings.rerank_candidatos) if cfg["rerank"] else k
+    provedor = versao.get_provedor()
+    if cfg["backend"] == "hnsw":
+        return lambda consulta, filtros: buscar(
+            db, consulta, k, 0, filtros, cfg["rerank"], None, versao.tenant, cfg["diversa"], cfg["diversa"]
+        )
+    if cfg["backend"] == "exata":
+        def exata(consulta: str, filtros: Filtros) -> List[dict]:
+            itens = _exata(db, embed_consulta(consulta, provedor), candidatos, filtros, versao)
+            return reranquear(consulta, itens, k) if cfg["rerank"] else itens
+        return exata
+    indice = indice_memoria.carregar(db, versao.tenant)
+
+    def memoria(consulta: str, filtros: Filtros) -> List[dict]:
+        itens = indice.buscar_lote([embed_consulta(consulta, provedor)], candidatos)[0]
+        return reranquear(consulta, itens, k) if cfg["rerank"] else itens
+    return memoria
+
+# ---------- execução ----------
+def avaliar(golden: Path, configs: List[str], k: int, repeticoes: int, tenant: Optional[str]) -> Dict[str, Any]:
+    conjunto = json.loads(golden.read_text(encoding="utf-8"))
+    tenant = tenant or conjunto.get("tenant") or settings.tenant_padrao
+    db = SessionLocal()
+    try:
+        versao = versoes.ativa(db, tenant)
+        if versao is None:
+            raise SystemExit(f"Tenant '{tenant}' sem versão ativa do índice")
+        tintas = [dict(l) for l in db.execute(text("""
+            SELECT id::text AS id, nome, cor, ambiente::text AS ambiente, acabamento::text AS acabamento,
+                   superficie_indicada, features
+            FROM tintas WHERE tenant = :t
+        """), {"t": tenant}).mappings()]
+        consultas = []
+        for item in conjunto["consultas"]:
+            ganhos = julgamentos(item, tintas)
+            canonica = normalizacao.canonizar_consulta(db, item["consulta"], tenant)
+            consultas.append({**item, "ganhos": ganhos, "canonica": canonica})
+        julgadas = [c for c in consultas if c["ganhos"]]
+
+        # aquece o cache de embeddings: a latência medida abaixo é só da recuperação
+        provedor = versao.get_provedor()
+        embedding_ms = []
+        for c in julgadas:
+            for txt in {c["consulta"], c["canonica"]}:
+                inicio = time.perf_counter()
+                embed_consulta(txt, provedor)
+                embedding_ms.append((time.perf_counter() - inicio) * 1000)
+
+        resultados = {}
+        for nome in configs:
+            cfg = CONFIGURACOES[nome]
+            # buscar() extrai a cor da consulta sozinho: só a configuração +cor a usa
+            peso_cor = settings.busca_cor_peso if cfg["cor"] else 0.0
+            with _ajustes(busca_features_consulta=cfg["filtros"], busca_cor_peso=peso_cor):
+                executar = _executor(db, cfg, versao, k)
+                por_consulta, latencias = {}, []
+                for c in julgadas:
+                    filtros = Filtros(**c.get("filtros", {})) if cfg["filtros"] else Filtros()
+                    consulta = c["canonica"] if cfg["canonica"] else c["consulta"]
+                    ranking: List[str] = []
+                    for r in range(repeticoes):
+                        inicio = time.perf_counter()
+                        itens = executar(consulta, filtros)
+                        latencias.append((time.perf_counter() - inicio) * 1000)
+                        db.rollback()  # encerra a transação (SET LOCAL do ef_search / iterative_scan)
+                        if r == 0:
+                            ranking = [str(i["id"]) for i in itens]
+                    por_consulta[c["id"]] = {
+                        "recall": round(recall_at_k(ranking, c["ganhos"], k), 4),
+                        "mrr": round(mrr(ranking, c["ganhos"], k), 4),
+                        "ndcg": round(ndcg_at_k(ranking, c["ganhos"], k), 4),
+                    }
+            n = len(por_consulta) or 1
+            resultados[nome] = {
+                **cfg,
+                f"recall@{k}": round(sum(m["recall"] for m in por_consulta.values()) / n, 4),
+                "mrr": round(sum(m["mrr"] for m in por_consulta.values()) / n, 4),
+                f"ndcg@{k}": round(sum(m["ndcg"] for m in por_consulta.values()) / n, 4),
+                "latencia_ms": {f"p{p}": round(percentil(latencias, p), 2) for p in (50, 95, 99)},
+                "por_consulta": por_consulta,
+            }
+    finally:
+        db.close()
+
+    return {
+        "golden": {
+            "arquivo": golden.name, "versao": conjunto.get("versao"),
+            "sha256": hashlib.sha256(golden.read_bytes()).hexdigest()[:16],
+            "consultas": len(consultas), "julgadas": len(julgadas),
+            "sem_relevantes": [c["id"] for c in consultas if not c["ganhos"]],
+        },
+        "execucao": {
+            "quando": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": _commit(),
+            "tenant": tenant, "versao_indice": versao.versao, "modelo": versao.modelo, "k": k,
+            "repeticoes": repeticoes, "rerank_modelo": settings.rerank_modelo or None,
+            "hnsw_iterative_scan": settings.hnsw_iterative_scan or None, "busca_cor_peso": settings.busca_cor_peso,
+        },
+        "embedding_ms": {f"p{p}": round(percentil(embedding_ms, p), 2) for p in (50, 95, 99)},
+        "configuracoes": resultados,
+    }
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def comparar(atual: Dict[str, Any], anterior: Dict[str, Any]) -> float:
+    """Imprime as diferenças por configuração; devolve a maior queda de nDCG."""
+    if atual["golden"]["versao"] != anterior["golden"]["versao"]:
+        print(f"⚠️ conjuntos dourados diferentes (v{anterior['golden']['versao']} x v{atual['golden']['versao']})")
+    k = atual["execucao"]["k"]
+    maior_queda = 0.0
+    print(f"\nComparação com {anterior['execucao'].get('commit') or '?'} ({anterior['execucao']['quando']}):")
+    for nome, r in atual["configuracoes"].items():
+        antes = anterior["configuracoes"].get(nome)
+        if not antes or f"ndcg@{k}" not in antes:
+            continue
+        deltas = {m: r[m] - antes[m] for m in (f"recall@{k}", "mrr", f"ndcg@{k}")}
+        p95 = r["latencia_ms"]["p95"] - antes["latencia_ms"]["p95"]
+        maior_queda = max(maior_queda, -deltas[f"ndcg@{k}"])
+        print(f"  {nome:18s} " + "  ".join(f"{m} {d:+.4f}" for m, d in deltas.items()) + f"  p95 {p95:+.1f} ms")
+    return maior_queda
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--golden", type=Path, help="padrão: versão mais recente em benchmarks/golden/")
+    ap.add_argument("--configs", default=",".join(CONFIGURACOES), help=f"entre: {', '.join(CONFIGURACOES)}")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--repeticoes", type=int, default=5, help="execuções por consulta (latência)")
+    ap.add_argument("--tenant")
+    ap.add_argument("--json", dest="saida_json")
+    ap.add_argument("--comparar", type=Path, help="relatório anterior (JSON) para mostrar as diferenças")
+    ap.add_argument("--max-queda", type=float, help="sai com código 1 se algum nDCG cair mais que isso")
+    args = ap.parse_args()
+
+    configs = [c.strip() for c in args.configs.split(",") if c.strip()]
+    desconhecidas = [c for c in configs if c not in CONFIGURACOES]
+    if desconhecidas:
+        ap.error(f"configurações desconhecidas: {', '.join(desconhecidas)}")
+
+    rel = avaliar(args.golden or golden_padrao(), configs, args.k, args.repeticoes, args.tenant)
+    g, k = rel["golden"], args.k
+    print(f"{g['arquivo']} (v{g['versao']}): {g['julgadas']}/{g['consultas']} consultas com relevantes no catálogo"
+          f" | índice v{rel['execucao']['versao_indice']} ({rel['execucao']['modelo']})"
+          f" | embedding p50 {rel['embedding_ms']['p50']} ms")
+    print(f"  {'configuração':18s} {'recall@' + str(k):>9s} {'MRR':>7s} {'nDCG@' + str(k):>8s}"
+          f" {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}")
+    for nome, r in rel["configuracoes"].items():
+        lat = r["latencia_ms"]
+        print(f"  {nome:18s} {r[f'recall@{k}']:9.4f} {r['mrr']:7.4f} {r[f'ndcg@{k}']:8.4f}"
+              f" {lat['p50']:8.2f} {lat['p95']:8.2f} {lat['p99']:8.2f}")
+
+    if args.saida_json:
+        Path(args.saida_json).write_text(json.dumps(rel, indent=2, ensure_ascii=False))
+    if args.comparar:
+        queda = comparar(rel, json.loads(args.comparar.read_text(encoding="utf-8")))
+        if args.max_queda is not None and queda > args.max_queda:
+            print(f"❌ nDCG caiu {queda:.4f} (máximo {args.max_queda})")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+def test_autocompletar_encontra_tinta_recem_criada(client, tinta_criada):
+    prefixo = tinta_criada["nome"][:9].lower()  # "tinta xxx" sem caixa
+    r = client.get("/busca/autocompletar", params={"q": prefixo, "campos": ["nome"]})
+    assert r.status_code == 200, r.text
+    assert any(s["texto"] == tinta_criada["nome"] for s in r.json())
+
+def test_autocompletar_ignora_acentos(client, tinta_criada):
+    r = client.get("/busca/autocompletar", params={"q": "CÍNZA", "campos": ["cor"]})
+    assert r.status_code == 200, r.text
+    assert any(s["texto"].lower() == "cinza" for s in r.json())
@@ -10,5 +10,78 @@ def test_recomendacao_basica_funciona():
 
     r = httpx.get(f"{BASE_URL}/busca/recomendar", params={"q": "quero tinta lavável sem odor", "limite": 3})
     assert r.status_code == 200, r.text
-    itens = r.json()
-    assert isinstance(itens, list)
+    body = r.json()
+    assert isinstance(body["itens"], list)
+    assert len(body["itens"]) <= 3
+    assert "Server-Timing" in r.headers
+
+def test_recomendacao_com_filtros_e_paginacao():
+    if not os.getenv("OPENAI_API_KEY"):
+        import pytest
+        pytest.skip("Sem OPENAI_API_KEY — pulando teste de recomendação.")
+
+    params = {"q": "tinta para parede", "limite": 2, "offset": 2, "ambiente": "externo"}
+    r = httpx.get(f"{BASE_URL}/busca/recomendar", params=params)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["offset"] == 2
+    assert all(i["ambiente"] == "externo" for i in body["itens"])
+
+def test_recomendacao_rejeita_janela_grande():
+    r = httpx.get(f"{BASE_URL}/busca/recomendar", params={"q": "x", "limite": 50, "offset": 90})
+    assert r.status_code == 400
+
+def test_recomendacao_rejeita_consulta_em_branco():
+    r = httpx.get(f"{BASE_URL}/busca/recomendar", params={"q": "   "})
+    assert r.status_code == 422
+
+def test_recomendacao_filtro_feature_aceita_sinonimo():
+    if not os.getenv("OPENAI_API_KEY"):
+        import pytest
+        pytest.skip("Sem OPENAI_API_KEY — pulando teste de recomendação.")
+
+    # "sem cheiro" é normalizado para a chave canônica "sem_odor"
+    r = httpx.get(f"{BASE_URL}/busca/recomendar", params={"q": "tinta para quarto", "features": "sem cheiro"})
+    assert r.status_code == 200, r.text
+    assert all(i["features"].get("sem_odor") for i in r.json()["itens"])
+
+def test_recomendacao_normaliza_consulta():
+    if not os.getenv("OPENAI_API_KEY"):
+        import pytest
+        pytest.skip("Sem OPENAI_API_KEY — pulando teste de recomendação.")
+
+    # abreviações de chat e sinônimos chegam na mesma forma canônica
+    r1 = httpx.get(f"{BASE_URL}/busca/recomendar", params={"q": "tinta p/ quarto s/ cheiro"})
+    r2 = httpx.get(f"{BASE_URL}/busca/recomendar", params={"q": "Tinta para quarto sem odor"})
+    assert r1.status_code == 200 and r2.status_code == 200
+    assert r1.json()["consulta_canonica"] == r2.json()["consulta_canonica"]
+
+def test_recomendacao_agrupa_variantes_de_cor():
+    if not os.getenv("OPENAI_API_KEY"):
+        import pytest
+        pytest.skip("Sem OPENAI_API_KEY — pulando teste de recomendação.")
+
+    r = httpx.get(f"{BASE_URL}/busca/recomendar", params={"q": "tinta acrílica para parede", "limite": 5})
+    assert r.status_code == 200, r.text
+    itens = r.json()["itens"]
+    produtos = [(i["nome"].lower(), (i["linha"] or "").lower()) for i in itens]
+    assert len(produtos) == len(set(produtos))
+    for item in itens:
+        for variante in item["outras_cores"]:
+            cores = httpx.get(f"{BASE_URL}/tintas/{item['id']}/cores")
+            assert cores.status_code == 200, cores.text
+            assert variante["id"] in {c["id"] for c in cores.json()}
+            break
+
+def test_busca_por_cor_ordena_por_delta_e():
+    # índice Lab em memória: não depende de embeddings
+    r = httpx.get(f"{BASE_URL}/busca/cores", params={"cor": "#8fb3d9", "limite": 5})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["cor_hex"] == "#8fb3d9"
+    distancias = [i["delta_e"] for i in body["itens"]]
+    assert distancias == sorted(distancias)
+
+def test_busca_por_cor_rejeita_cor_desconhecida():
+    r = httpx.get(f"{BASE_URL}/busca/cores", params={"cor": "xyzw"})
+    assert r.status_code == 400
@@ -0,0 +1,54 @@
+import os
+import httpx
+import pytest
+
+BASE_URL = "http://localhost:8000"
+
+def test_modo_template_responde_sem_llm(auth_headers):
+    if not os.getenv("OPENAI_API_KEY"):
+        pytest.skip("Sem OPENAI_API_KEY — pulando teste do chat.")
+
+    r = httpx.post(
+        f"{BASE_URL}/chat/recomendar",
+        params={"debug": True},
+        json={"mensagem": "tinta sem cheiro para quarto", "limite_produtos": 3, "modo": "template"},
+        headers=auth_headers,
+        timeout=30.0,
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    if body["produtos_encontrados"] and body["debug_info"]["status"] == "ok":
+        assert body["debug_info"]["modo_resposta"] == "template"
+        assert body["produtos_encontrados"][0]["nome"] in body["resposta"]
+
+def test_conversa_guarda_turnos_e_aceita_follow_up(auth_headers, client, user_data):
+    r1 = httpx.post(f"{BASE_URL}/chat/recomendar", json={"mensagem": "tinta para fachada"}, headers=auth_headers, timeout=30.0)
+    assert r1.status_code == 200, r1.text
+    conversa_id = r1.json()["conversa_id"]
+    assert conversa_id
+
+    r2 = httpx.post(
+        f"{BASE_URL}/chat/recomendar",
+        json={"mensagem": "e na cor azul?", "conversa_id": conversa_id},
+        headers=auth_headers,
+        timeout=30.0,
+    )
+    assert r2.status_code == 200, r2.text
+    assert r2.json()["conversa_id"] == conversa_id
+
+    r3 = httpx.get(f"{BASE_URL}/chat/conversas/{conversa_id}", headers=auth_headers)
+    assert r3.status_code == 200, r3.text
+    body = r3.json()
+    assert [t["papel"] for t in body["turnos"]] == ["usuario", "assistente", "usuario", "assistente"]
+    assert body["resumo"]
+
+    # só o dono lê a conversa
+    assert httpx.get(f"{BASE_URL}/chat/conversas/{conversa_id}").status_code == 401
+    assert client.post("/usuarios/", json=user_data).status_code in (200, 201)
+    outro = client.post("/auth/login", json={"email": user_data["email"], "senha": user_data["senha"]}).json()["access_token"]
+    r4 = httpx.get(f"{BASE_URL}/chat/conversas/{conversa_id}", headers={"Authorization": f"Bearer {outro}"})
+    assert r4.status_code == 404
+
+def test_chat_exige_token():
+    r = httpx.post(f"{BASE_URL}/chat/recomendar", json={"mensagem": "tinta para quarto"}, timeout=30.0)
+    assert r.status_code == 401
@@ -0,0 +1,19 @@
+import httpx
+
+BASE_URL = "http://localhost:8000"
+
+def test_live_responde_ok():
+    r = httpx.get(f"{BASE_URL}/health/live")
+    assert r.status_code == 200
+    assert r.json() == {"status": "ok"}
+
+def test_ready_informa_banco_e_estimativas():
+    r = httpx.get(f"{BASE_URL}/health/ready")
+    assert r.status_code in (200, 503), r.text
+    body = r.json()
+    assert body["banco"]["status"] in ("ok", "erro")
+    assert "openai" in body and "pronto" in body
+
+def test_diagnostico_exige_admin(auth_headers):
+    r = httpx.get(f"{BASE_URL}/health/diagnostico", headers=auth_headers)
+    assert r.status_code == 403
@@ -0,0 +1,22 @@
+import json
+import os
+import httpx
+import pytest
+
+BASE_URL = "http://localhost:8000"
+
+def test_lote_devolve_uma_linha_ndjson_por_consulta(auth_headers):
+    if not os.getenv("OPENAI_API_KEY"):
+        pytest.skip("Sem OPENAI_API_KEY — pulando teste de lote.")
+
+    consultas = ["quarto sem cheiro", "fachada sol e chuva", "cozinha lavável"]
+    r = httpx.post(f"{BASE_URL}/busca/lote", json={"consultas": consultas, "limite": 2}, headers=auth_headers, timeout=60.0)
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(l) for l in r.text.splitlines() if l]
+    assert [l["indice"] for l in linhas] == [0, 1, 2]
+    assert all(len(l["resultados"]) <= 2 for l in linhas)
+
+def test_lote_rejeita_consulta_vazia(auth_headers):
+    r = httpx.post(f"{BASE_URL}/busca/lote", json={"consultas": ["quarto sem cheiro", "   "]}, headers=auth_headers)
+    assert r.status_code == 422
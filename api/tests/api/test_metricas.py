@@ -0,0 +1,27 @@
+import httpx
+
+BASE_URL = "http://localhost:8000"
+
+def test_metricas_expoe_contadores_e_latencias(admin_headers):
+    r = httpx.get(f"{BASE_URL}/metricas/", headers=admin_headers)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert {"contadores", "gauges", "latencias"} <= body.keys()
+
+def test_custos_por_cliente(admin_headers):
+    r = httpx.get(f"{BASE_URL}/metricas/custos", headers=admin_headers)
+    assert r.status_code == 200, r.text
+    assert all("custo_usd" in v for v in r.json().values())
+    # IP nunca em claro
+    assert not any(c.startswith("ip:") and "." in c for c in r.json())
+
+def test_metricas_exigem_admin(auth_headers):
+    for rota in ("/metricas/", "/metricas/custos"):
+        assert httpx.get(f"{BASE_URL}{rota}").status_code == 401
+        assert httpx.get(f"{BASE_URL}{rota}", headers=auth_headers).status_code == 403
+
+def test_probe_de_embeddings_usa_cache():
+    r1 = httpx.get(f"{BASE_URL}/chat/test-embeddings")
+    r2 = httpx.get(f"{BASE_URL}/chat/test-embeddings")
+    assert r1.status_code == r2.status_code == 200
+    assert r2.json()["cache_idade_s"] >= r1.json()["cache_idade_s"]
@@ -0,0 +1,20 @@
+import httpx
+
+BASE_URL = "http://localhost:8000"
+
+def test_tenant_desconhecido_retorna_404():
+    r = httpx.get(f"{BASE_URL}/tintas/", headers={"X-Tenant": "tenant_que_nao_existe"})
+    assert r.status_code == 404
+
+def test_tenant_invalido_retorna_400():
+    r = httpx.get(f"{BASE_URL}/tintas/", headers={"X-Tenant": "loja; drop"})
+    assert r.status_code == 400
+
+def test_tenant_padrao_sem_header():
+    r = httpx.get(f"{BASE_URL}/tintas/")
+    assert r.status_code == 200
+
+def test_token_de_outro_tenant_e_recusado(auth_headers, tinta_payload):
+    # o editor pertence ao tenant padrão: trocar o header não dá acesso a outro catálogo
+    r = httpx.post(f"{BASE_URL}/tintas/", json=tinta_payload, headers={**auth_headers, "X-Tenant": "outra_loja"})
+    assert r.status_code == 403
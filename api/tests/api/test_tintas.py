@@ -18,8 +18,8 @@ def _payload_tinta():
         "features": {"lavavel": True, "sem_odor": True},
     }
 
-def test_criar_listar_tinta():
-    r = httpx.post(f"{BASE_URL}/tintas/", json=_payload_tinta())
+def test_criar_listar_tinta(auth_headers):
+    r = httpx.post(f"{BASE_URL}/tintas/", json=_payload_tinta(), headers=auth_headers)
     assert r.status_code == 200, r.text
     tinta_id = r.json()["id"]
 
@@ -27,15 +27,26 @@ def test_criar_listar_tinta():
     assert r_list.status_code == 200
     assert any(t["id"] == tinta_id for t in r_list.json())
 
-def test_editar_deletar_tinta():
-    r = httpx.post(f"{BASE_URL}/tintas/", json=_payload_tinta())
+def test_editar_deletar_tinta(auth_headers):
+    r = httpx.post(f"{BASE_URL}/tintas/", json=_payload_tinta(), headers=auth_headers)
     assert r.status_code == 200, r.text
     tinta_id = r.json()["id"]
 
     # sua API expõe PATCH (não PUT)
-    r_edit = httpx.patch(f"{BASE_URL}/tintas/{tinta_id}", json={"descricao": "Atualizada"})
+    r_edit = httpx.patch(f"{BASE_URL}/tintas/{tinta_id}", json={"descricao": "Atualizada"}, headers=auth_headers)
     assert r_edit.status_code == 200, r_edit.text
     assert r_edit.json()["descricao"] == "Atualizada"
 
-    r_del = httpx.delete(f"{BASE_URL}/tintas/{tinta_id}")
+    r_del = httpx.delete(f"{BASE_URL}/tintas/{tinta_id}", headers=auth_headers)
     assert r_del.status_code == 200
+
+def test_escrita_exige_token():
+    r = httpx.post(f"{BASE_URL}/tintas/", json=_payload_tinta())
+    assert r.status_code == 401
+
+def test_leitor_nao_pode_criar_tinta(client, user_data):
+    # cadastro público: sempre leitor
+    assert client.post("/usuarios/", json=user_data).status_code in (200, 201)
+    token = client.post("/auth/login", json={"email": user_data["email"], "senha": user_data["senha"]}).json()["access_token"]
+    r = client.post("/tintas/", json=_payload_tinta(), headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 403
@@ -18,3 +18,13 @@ def test_criar_usuario_duplicado():
 
     r2 = httpx.post(f"{BASE_URL}/usuarios/", json=payload)
     assert r2.status_code == 400  # já existe
+
+def test_cadastro_publico_nao_concede_papel(client, user_data):
+    for papel in ("editor", "admin"):
+        r = client.post("/usuarios/", json={**user_data, "papel": papel})
+        assert r.status_code == 403
+
+def test_admin_cria_editor(client, user_data, admin_headers):
+    r = client.post("/usuarios/", json={**user_data, "papel": "editor"}, headers=admin_headers)
+    assert r.status_code in (200, 201), r.text
+    assert r.json()["papel"] == "editor"
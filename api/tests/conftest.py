@@ -5,6 +5,9 @@ import httpx
 
 BASE_URL = os.getenv("TEST_BASE_URL", "http://localhost:8000")
 DEFAULT_PASSWORD = "senha123"
+# admin criado no startup da API (ADMIN_EMAIL/ADMIN_SENHA); o cadastro público só cria leitores
+ADMIN_EMAIL = os.getenv("TEST_ADMIN_EMAIL") or os.getenv("ADMIN_EMAIL")
+ADMIN_SENHA = os.getenv("TEST_ADMIN_SENHA") or os.getenv("ADMIN_SENHA")
 
 
 def _unique_email(prefix: str = "tester") -> str:
@@ -19,24 +22,33 @@ def client():
 
 @pytest.fixture()
 def user_data():
-    """Gera dados únicos de usuário para cada teste."""
+    """Gera dados únicos de usuário (leitor) para cada teste."""
     return {
         "nome": f"Tester {uuid.uuid4().hex[:4]}",
         "email": _unique_email(),
         "senha": DEFAULT_PASSWORD,
-        "papel": "editor",
     }
 
 
 @pytest.fixture()
-def token(client, user_data):
+def admin_headers(client):
+    """Token do admin inicial da API."""
+    assert ADMIN_EMAIL and ADMIN_SENHA, "Defina ADMIN_EMAIL/ADMIN_SENHA (ou TEST_ADMIN_*) iguais aos da API"
+    r = client.post("/auth/login", json={"email": ADMIN_EMAIL, "senha": ADMIN_SENHA})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.fixture()
+def token(client, user_data, admin_headers):
     """
-    Cria um usuário único e retorna um token JWT válido.
+    Cria um editor único (pelo admin) e retorna um token JWT válido.
     Evita colisão com e-mails existentes.
     """
+    user_data = {**user_data, "papel": "editor"}
     # tenta criar; se colidir (improvável), gera outro e-mail e tenta de novo
     for _ in range(3):
-        r = client.post("/usuarios/", json=user_data)
+        r = client.post("/usuarios/", json=user_data, headers=admin_headers)
         if r.status_code in (200, 201):
             break
         # e-mail já existe (400) -> regere e tenta novamente
@@ -82,12 +94,12 @@ def tinta_payload():
 
 
 @pytest.fixture()
-def tinta_criada(client, tinta_payload):
+def tinta_criada(client, tinta_payload, auth_headers):
     """
     Cria uma tinta antes do teste e apaga após o teste.
     Retorna o dicionário da tinta criada.
     """
-    r = client.post("/tintas/", json=tinta_payload)
+    r = client.post("/tintas/", json=tinta_payload, headers=auth_headers)
     assert r.status_code == 200, r.text
     tinta = r.json()
 
@@ -95,6 +107,6 @@ def tinta_criada(client, tinta_payload):
     yield tinta
 
     # tenta deletar; se já foi deletada no teste, ignora erro 404
-    dr = client.delete(f"/tintas/{tinta['id']}")
+    dr = client.delete(f"/tintas/{tinta['id']}", headers=auth_headers)
     if dr.status_code not in (200, 404):
         raise AssertionError(f"Falha ao limpar tinta {tinta['id']}: {dr.status_code} {dr.text}")
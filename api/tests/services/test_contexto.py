@@ -0,0 +1,11 @@
+import time
+from app.core import chaves_api
+from app.core.contexto import identificar
+
+def test_so_chave_cadastrada_identifica_o_cliente(monkeypatch):
+    monkeypatch.setattr(chaves_api, "_hashes", {chaves_api.hash_chave("chave-valida")})
+    monkeypatch.setattr(chaves_api, "_carregado_em", time.monotonic())
+
+    assert identificar({"x-api-key": "chave-valida"}, "10.0.0.1").startswith("chave:")
+    # chave aleatória não ganha balde/linha de custo próprios: conta pelo IP
+    assert identificar({"x-api-key": "qualquer-coisa"}, "10.0.0.1") == "ip:10.0.0.1"
@@ -0,0 +1,20 @@
+import pytest
+from app.models.conversa import Conversa
+from app.services.ia.conversas import eh_follow_up
+
+@pytest.fixture()
+def conversa():
+    return Conversa(produtos_ids=["00000000-0000-0000-0000-000000000001"])
+
+@pytest.mark.parametrize("mensagem", [
+    "e na cor azul?", "essa serve pra banheiro?", "alguma delas é lavável?", "mais barata?", "azul?", "fosco",
+])
+def test_follow_up_com_referencia_ou_so_atributos(conversa, mensagem):
+    assert eh_follow_up(conversa, mensagem)
+
+@pytest.mark.parametrize("mensagem", ["tinta para piscina", "esmalte para ferro", "tinta para madeira externa"])
+def test_assunto_novo_curto_nao_e_follow_up(conversa, mensagem):
+    assert not eh_follow_up(conversa, mensagem)
+
+def test_sem_produtos_anteriores_nao_e_follow_up():
+    assert not eh_follow_up(Conversa(produtos_ids=[]), "e na cor azul?")
@@ -0,0 +1,21 @@
+from collections import OrderedDict, defaultdict
+from types import SimpleNamespace
+from app.core import custos
+from app.core.contexto import cliente_atual
+
+def test_clientes_alem_do_limite_vao_para_outros(monkeypatch):
+    monkeypatch.setattr(custos, "_MAX_CLIENTES", 3)
+    monkeypatch.setattr(custos, "_por_cliente", OrderedDict())
+    monkeypatch.setattr(custos, "_outros", defaultdict(float))
+    resposta = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=1000, completion_tokens=0), model="gpt-4o-mini")
+
+    for i in range(5):
+        token = cliente_atual.set(f"ip:10.0.0.{i}")
+        custos.registrar("chat", resposta)
+        cliente_atual.reset(token)
+
+    snapshot = custos.snapshot()
+    assert len(custos._por_cliente) == 3
+    assert snapshot["outros"]["chamadas"] == 2
+    assert sum(d["chamadas"] for d in snapshot.values()) == 5
+    assert not any("10.0.0" in c for c in snapshot)
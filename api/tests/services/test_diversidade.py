@@ -0,0 +1,33 @@
+from app.services.ia.diversidade import agrupar, diversificar, mmr
+
+def _item(id_, nome, cor, score, linha="Premium"):
+    return {"id": id_, "nome": nome, "cor": cor, "linha": linha, "score": score}
+
+def test_agrupar_junta_variantes_de_cor():
+    itens = [
+        _item("1", "Toque de Seda", "Branco", 0.9), _item("2", "Fachada", "Cinza", 0.8),
+        _item("3", "toque de seda ", "Azul", 0.7), _item("4", "Toque de Seda", "Verde", 0.6, linha="Standard"),
+    ]
+    grupos = agrupar(itens)
+
+    assert [g["id"] for g in grupos] == ["1", "2", "4"]
+    assert grupos[0]["outras_cores"] == [{"id": "3", "cor": "Azul", "score": 0.7}]
+    assert grupos[1]["outras_cores"] == [] and grupos[2]["outras_cores"] == []
+
+def test_mmr_com_lambda_1_mantem_ordem_de_relevancia():
+    itens = [_item(str(i), f"T{i}", "Branco", s) for i, s in enumerate([0.5, 0.9, 0.7, 0.8])]
+    vetores = [[1.0, 0.0], [1.0, 0.01], [0.0, 1.0], [1.0, 0.02]]
+    assert [i["id"] for i in mmr(itens, vetores, 4, lambda_=1.0)] == ["1", "3", "2", "0"]
+
+def test_mmr_troca_quase_duplicado_por_item_diferente():
+    itens = [_item("a", "A", "Branco", 0.9), _item("b", "B", "Branco", 0.89), _item("c", "C", "Branco", 0.7)]
+    vetores = [[1.0, 0.0], [1.0, 0.001], [0.0, 1.0]]
+    assert [i["id"] for i in mmr(itens, vetores, 2, lambda_=0.5)] == ["a", "c"]
+
+def test_diversificar_remove_vetor_da_saida():
+    itens = [{**_item("1", "A", "Branco", 0.9), "vetor": [1.0, 0.0]},
+             {**_item("2", "A", "Azul", 0.8), "vetor": [1.0, 0.0]},
+             {**_item("3", "B", "Cinza", 0.7), "vetor": [0.0, 1.0]}]
+    saida = diversificar(itens, 3)
+    assert [i["id"] for i in saida] == ["1", "3"]
+    assert all("vetor" not in i for i in saida)
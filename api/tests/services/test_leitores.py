@@ -0,0 +1,15 @@
+from app.services.ingestao.leitores import _AMOSTRA_BYTES, LeitorCatalogo
+
+def test_byte_invalido_fora_da_amostra_vai_para_o_relatorio(tmp_path):
+    arquivo = tmp_path / "catalogo.csv"
+    linhas = "".join(f"Tinta {i},Azul,interno\n" for i in range(_AMOSTRA_BYTES // 20))
+    arquivo.write_bytes(b"nome,cor,ambiente\n" + linhas.encode() + b"Tinta X,Cinza\xff,interno\n")
+
+    leitor = LeitorCatalogo(str(arquivo))
+    total = sum(len(b) for b in leitor.blocos())
+
+    assert leitor.relatorio.encoding == "utf-8-sig"
+    assert total == _AMOSTRA_BYTES // 20 + 1
+    erro = leitor.relatorio.erros["cor"]
+    assert erro["total"] == 1
+    assert erro["exemplos"][0]["linha"] == total + 1
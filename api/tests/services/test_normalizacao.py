@@ -0,0 +1,32 @@
+import pytest
+from app.services.ia.normalizacao import Vocabulario, canonizar
+
+_CATALOGO = [
+    "Suvinil Toque de Seda", "Laranja Cítrico", "Laranja Queimado", "Porta e Janela Esmalte", "Alto Rendimento",
+    "Fachada Acrílica", "Fachada Premium", "Fachada Sem Odor", "Branco Neve", "Parede interna e externa",
+]
+
+@pytest.fixture()
+def vocab():
+    v = Vocabulario()
+    v.reconstruir(_CATALOGO)
+    return v
+
+@pytest.mark.parametrize("consulta, esperado", [
+    ("tinta p/ fachda", "tinta para fachada externo"),
+    ("brnaco neve", "branco neve"),
+])
+def test_corrige_erro_de_digitacao(vocab, consulta, esperado):
+    assert canonizar(consulta, vocab) == esperado
+
+@pytest.mark.parametrize("consulta, esperado", [
+    ("tinta com brilho para varanda", "tinta com brilho para varanda"),
+    ("tinta para portão", "tinta para portao"),
+    ("quero algo", "quero algo"),
+])
+def test_palavra_valida_fora_do_catalogo_nao_vira_outra(vocab, consulta, esperado):
+    assert canonizar(consulta, vocab) == esperado
+
+def test_dois_erros_so_para_candidato_frequente(vocab):
+    assert vocab.corrigir("fachdaa") == "fachada"
+    assert vocab.corrigir("queimodi") == "queimodi"
@@ -0,0 +1,38 @@
+import pytest
+from app.core.config import settings
+from app.services.ia import rerank
+from app.services.ia.rerank import extrair_intencao, reranquear
+
+@pytest.fixture(autouse=True)
+def pesos(monkeypatch):
+    monkeypatch.setattr(settings, "rerank_modelo", "")
+    rerank._cross_encoder.cache_clear()
+    for nome, peso in (("semantico", 1.0), ("atributos", 1.0), ("lexical", 0.0), ("modelo", 0.0)):
+        monkeypatch.setattr(settings, f"rerank_peso_{nome}", peso)
+    yield
+    rerank._cross_encoder.cache_clear()
+
+def _tinta(id_, score, ambiente="interno", acabamento="fosco", **extra):
+    return {"id": id_, "nome": f"Tinta {id_}", "cor": "Branco", "score": score,
+            "ambiente": ambiente, "acabamento": acabamento, "features": {}, **extra}
+
+def test_intencao_detecta_atributos_e_sinonimos():
+    intencao = extrair_intencao("quero tinta matte para fachada sem cheiro")
+    assert (intencao["ambiente"], intencao["acabamento"]) == ("externo", "fosco")
+    assert intencao["features"] == ["sem_odor"]
+
+def test_ordena_pelo_score_combinado():
+    candidatos = [_tinta("a", 0.9), _tinta("b", 0.8, ambiente="externo")]
+    saida = reranquear("tinta para area externa", candidatos, 2)
+
+    assert [c["id"] for c in saida] == ["b", "a"]
+    assert saida[0]["score"] == pytest.approx((0.8 + 1.0) / 2)
+    assert saida[0]["score_semantico"] == 0.8
+
+def test_empate_mantem_a_ordem_de_entrada():
+    candidatos = [_tinta(i, 0.5) for i in "abcd"]
+    assert [c["id"] for c in reranquear("tinta para area externa", candidatos, 4)] == list("abcd")
+
+def test_respeita_limite_e_lista_vazia():
+    assert reranquear("x", [], 3) == []
+    assert len(reranquear("x", [_tinta(i, 0.5) for i in "abcd"], 2)) == 2
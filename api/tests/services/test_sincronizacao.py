@@ -0,0 +1,107 @@
+import os
+import uuid
+import pytest
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("DATABASE_URL não definida", allow_module_level=True)
+
+from sqlalchemy import text
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.ingestao.sincronizacao import chave_natural, hash_linha, sincronizar
+
+_CABECALHO = "nome,cor,superficie_indicada,ambiente,acabamento,linha\n"
+
+def test_chave_natural_ignora_caixa_de_nome_e_cor():
+    assert chave_natural({"nome": " Toque de Seda ", "cor": "Branco", "linha": "Premium"}) == \
+        chave_natural({"nome": "toque de seda", "cor": "BRANCO", "linha": "Premium"})
+
+def test_hash_ignora_tenant_e_ordem_das_features():
+    a = {"nome": "X", "tenant": "a", "features": '{"lavavel": true, "sem_odor": true}'}
+    b = {"nome": "X", "tenant": "b", "features": '{"sem_odor": true, "lavavel": true}'}
+    assert hash_linha(a) == hash_linha(b)
+    assert hash_linha(a) != hash_linha({**a, "nome": "Y"})
+
+@pytest.fixture()
+def db():
+    s = SessionLocal()
+    try:
+        s.execute(text("SELECT 1"))
+    except Exception as e:
+        s.close()
+        pytest.skip(f"banco indisponível: {e}")
+    yield s
+    s.close()
+
+@pytest.fixture()
+def tenant(db):
+    """Tenant descartável: as ausências são calculadas sobre o snapshot do tenant inteiro."""
+    t = f"sinc_{uuid.uuid4().hex[:8]}"
+    db.execute(text("INSERT INTO tenants (id, nome, marca) VALUES (:t, :t, :t)"), {"t": t})
+    db.commit()
+    yield t
+    for tabela in ("catalogo_snapshot", "fila_embeddings", "tintas"):
+        db.execute(text(f"DELETE FROM {tabela} WHERE tenant = :t"), {"t": t})
+    db.execute(text("DELETE FROM tenants WHERE id = :t"), {"t": t})
+    db.commit()
+
+@pytest.fixture()
+def catalogo(tmp_path):
+    def escrever(*linhas: str) -> str:
+        arquivo = tmp_path / f"{uuid.uuid4().hex}.csv"
+        arquivo.write_text(_CABECALHO + "".join(f"{l}\n" for l in linhas), encoding="utf-8")
+        return str(arquivo)
+    return escrever
+
+_A = "Tinta A,Branco,alvenaria,interno,fosco,Premium"
+_B = "Tinta B,Azul,alvenaria,externo,fosco,Premium"
+_C = "Tinta C,Cinza,madeira,interno,brilho,Standard"
+_D = "Tinta D,Verde,metal,externo,acetinado,Standard"
+
+def _tintas(db, tenant):
+    linhas = db.execute(text("SELECT nome, descontinuada_em IS NOT NULL FROM tintas WHERE tenant = :t"), {"t": tenant})
+    return dict(linhas.all())
+
+def test_diff_insere_atualiza_e_ignora_inalteradas(db, tenant, catalogo):
+    r = sincronizar(catalogo(_A, _B, _A), tenant, "marcar", embedar=False)
+    assert (r["inseridas"], r["duplicadas"]) == (2, 1)
+
+    r = sincronizar(catalogo(_A, _B.replace("alvenaria", "reboco"), _C), tenant, "marcar", embedar=False)
+    assert (r["inseridas"], r["atualizadas"], r["inalteradas"]) == (1, 1, 1)
+    assert db.execute(
+        text("SELECT superficie_indicada FROM tintas WHERE tenant = :t AND nome = 'Tinta B'"), {"t": tenant}
+    ).scalar() == "reboco"
+
+def test_ausentes_marcar_e_reativar(db, tenant, catalogo):
+    sincronizar(catalogo(_A, _B, _C, _D), tenant, "marcar", embedar=False)
+    r = sincronizar(catalogo(_A, _B, _C), tenant, "marcar", embedar=False)
+    assert r["marcadas"] == 1
+    assert _tintas(db, tenant) == {"Tinta A": False, "Tinta B": False, "Tinta C": False, "Tinta D": True}
+
+    r = sincronizar(catalogo(_A, _B, _C, _D), tenant, "marcar", embedar=False)
+    assert (r["inseridas"], r["atualizadas"]) == (0, 1)  # mesma tinta, não uma nova
+    assert _tintas(db, tenant)["Tinta D"] is False
+
+def test_ausentes_remover(db, tenant, catalogo):
+    sincronizar(catalogo(_A, _B, _C, _D), tenant, "remover", embedar=False)
+    r = sincronizar(catalogo(_A, _B, _C), tenant, "remover", embedar=False)
+    assert r["removidas"] == 1
+    assert set(_tintas(db, tenant)) == {"Tinta A", "Tinta B", "Tinta C"}
+
+def test_ausentes_manter(db, tenant, catalogo):
+    sincronizar(catalogo(_A, _B, _C, _D), tenant, "manter", embedar=False)
+    r = sincronizar(catalogo(_A), tenant, "manter", embedar=False)
+    assert r["ausentes"] == 3 and not r["ausentes_bloqueadas"]
+    assert not any(_tintas(db, tenant).values())
+
+def test_limite_de_ausentes_bloqueia_sem_forcar(db, tenant, catalogo, monkeypatch):
+    monkeypatch.setattr(settings, "sinc_max_ausentes", 0.5)
+    sincronizar(catalogo(_A, _B, _C, _D), tenant, "remover", embedar=False)
+
+    r = sincronizar(catalogo(_A), tenant, "remover", embedar=False)
+    assert r["ausentes_bloqueadas"] and "removidas" not in r
+    assert len(_tintas(db, tenant)) == 4
+
+    r = sincronizar(catalogo(_A), tenant, "remover", forcar=True, embedar=False)
+    assert r["removidas"] == 3
+    assert set(_tintas(db, tenant)) == {"Tinta A"}
@@ -0,0 +1,64 @@
+import threading
+import time
+import pytest
+from app.services.ia.singleflight import SingleFlight, chave_consulta
+
+def _concorrentes(voos, chave, fn, n):
+    """Dispara ``n`` chamadas; o líder só termina depois que os demais viraram seguidores."""
+    liberar = threading.Event()
+    saidas = [None] * n
+
+    def lider_espera():
+        liberar.wait(5)
+        return fn()
+
+    def rodar(i):
+        try:
+            saidas[i] = ("ok", voos.executar(chave, lider_espera))
+        except Exception as e:
+            saidas[i] = ("erro", e)
+
+    threads = [threading.Thread(target=rodar, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    limite = time.monotonic() + 5
+    while time.monotonic() < limite:
+        chamada = voos._em_voo.get(chave)
+        if chamada is not None and chamada.seguidores == n - 1:
+            break
+        time.sleep(0.001)
+    liberar.set()
+    for t in threads:
+        t.join(5)
+    return saidas
+
+def test_chamadas_iguais_executam_uma_vez():
+    execucoes = []
+    resultado = {"itens": [1, 2]}
+
+    def fn():
+        execucoes.append(1)
+        return resultado
+
+    saidas = _concorrentes(SingleFlight("teste"), "k", fn, 8)
+    assert len(execucoes) == 1
+    assert all(s == ("ok", resultado) and s[1] is resultado for s in saidas)
+
+def test_erro_do_lider_chega_a_todos():
+    erro = RuntimeError("upstream fora")
+
+    def fn():
+        raise erro
+
+    saidas = _concorrentes(SingleFlight("teste"), "k", fn, 5)
+    assert all(tipo == "erro" and e is erro for tipo, e in saidas)
+
+def test_chaves_diferentes_nao_se_misturam():
+    voos = SingleFlight("teste")
+    assert voos.executar("a", lambda: 1) == 1
+    assert voos.executar("b", lambda: 2) == 2
+    assert not voos._em_voo
+
+def test_chave_consulta_ignora_acento_caixa_e_espacos():
+    assert chave_consulta("Tinta  LAVÁVEL ", limite=3, tenant="t") == chave_consulta("tinta lavavel", tenant="t", limite=3)
+    assert chave_consulta("tinta lavavel", limite=3) != chave_consulta("tinta lavavel", limite=5)
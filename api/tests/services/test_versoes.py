@@ -0,0 +1,116 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+import pytest
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("DATABASE_URL não definida", allow_module_level=True)
+
+from sqlalchemy import text
+from app.core import tenant as tenants
+from app.db.session import SessionLocal
+from app.models.tinta import Acabamento, Ambiente, Tinta
+from app.services.ia import versoes
+from app.services.ia.provedores import ProvedorEmbeddings
+
+API_DIR = Path(__file__).resolve().parents[2]
+_DIM = 1536  # HNSW parcial criado pela migração 006
+_TINTAS = 12
+
+class _Provedor(ProvedorEmbeddings):
+    """Só nome/modelo/dim: os vetores do teste são gravados direto com ``inserir``."""
+    nome = "teste"
+
+@pytest.fixture()
+def db():
+    s = SessionLocal()
+    try:
+        s.execute(text("SELECT 1"))
+    except Exception as e:
+        s.close()
+        pytest.skip(f"banco indisponível: {e}")
+    yield s
+    s.close()
+
+@pytest.fixture()
+def tenant(db):
+    t = f"vers_{uuid.uuid4().hex[:8]}"
+    tenants.criar(db, t, t, t)
+    for i in range(_TINTAS):
+        db.add(Tinta(tenant=t, nome=f"Tinta {i}", cor="Branco", superficie_indicada="alvenaria",
+                     ambiente=Ambiente.interno, acabamento=Acabamento.fosco, linha="Premium"))
+    db.commit()
+    yield t
+    db.rollback()
+    db.execute(text("DELETE FROM indice_ativo WHERE tenant = :t"), {"t": t})
+    db.execute(text(f"DROP TABLE IF EXISTS embeddings_tintas_{t} CASCADE"))
+    for tabela in ("indices_embeddings", "tintas"):
+        db.execute(text(f"DELETE FROM {tabela} WHERE tenant = :t"), {"t": t})
+    db.execute(text("DELETE FROM tenants WHERE id = :t"), {"t": t})
+    db.commit()
+    versoes.invalidar(t)
+
+def _versao(db, tenant, cobertura=1.0):
+    """Versão nova com vetores aleatórios (fixos) para uma fração das tintas, já validada."""
+    versao = versoes.criar(db, tenant, _Provedor("teste-modelo", _DIM))
+    ids = db.execute(text("SELECT id::text FROM tintas WHERE tenant = :t ORDER BY nome"), {"t": tenant}).scalars().all()
+    ids = ids[:int(len(ids) * cobertura)]
+    rnd = random.Random(versao.versao)
+    vetores = [[rnd.uniform(-1, 1) for _ in range(_DIM)] for _ in ids]
+    versoes.inserir(db, versao, ids, [f"conteudo {i}" for i in ids], vetores)
+    db.commit()
+    return versao, versoes.validar(db, versao)
+
+def _ativa(db, tenant):
+    return db.execute(text("SELECT versao FROM indice_ativo WHERE tenant = :t"), {"t": tenant}).scalar()
+
+def test_validacao_reprovada_bloqueia_ativar(db, tenant):
+    versao, relatorio = _versao(db, tenant, cobertura=0.5)
+    assert not relatorio["ok"] and relatorio["cobertura"] == 0.5
+
+    with pytest.raises(versoes.VersaoInvalida):
+        versoes.ativar(db, versao.versao)
+    assert _ativa(db, tenant) is None
+
+def test_ativar_e_rollback_restaura_ponteiro_anterior(db, tenant):
+    v1, r1 = _versao(db, tenant)
+    assert r1["ok"] and r1["recall_at_k"] >= 0.9
+    versoes.ativar(db, v1.versao)
+    v2, _ = _versao(db, tenant)
+    versoes.ativar(db, v2.versao)
+    assert _ativa(db, tenant) == v2.versao
+
+    assert versoes.rollback(db, tenant).versao == v1.versao
+    assert _ativa(db, tenant) == v1.versao
+    assert versoes.ativa(db, tenant).versao == v1.versao  # cache invalidado na troca
+
+def test_rollback_sem_versao_anterior(db, tenant):
+    v1, _ = _versao(db, tenant)
+    versoes.ativar(db, v1.versao)
+    with pytest.raises(versoes.VersaoInvalida):
+        versoes.rollback(db, tenant)
+
+def test_descartar_recusa_versao_ativa(db, tenant):
+    v1, _ = _versao(db, tenant)
+    versoes.ativar(db, v1.versao)
+    v2, _ = _versao(db, tenant, cobertura=0.5)
+
+    with pytest.raises(versoes.VersaoInvalida):
+        versoes.descartar(db, v1.versao)
+    versoes.descartar(db, v2.versao)
+    assert [v["versao"] for v in versoes.listar(db, tenant)] == [v1.versao]
+    assert db.execute(text("SELECT to_regclass(:t)"), {"t": v2.tabela}).scalar() is None
+
+def test_cli_listar(db, tenant):
+    v1, _ = _versao(db, tenant)
+    versoes.ativar(db, v1.versao)
+    saida = subprocess.run(
+        [sys.executable, "-m", "app.services.ia.versoes", "listar", "--tenant", tenant],
+        cwd=API_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    linhas = json.loads(saida[saida.index("["):])
+    assert [(l["versao"], l["status"], l["ativa"]) for l in linhas] == [(v1.versao, "pronto", True)]